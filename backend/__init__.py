@@ -16,9 +16,12 @@ from backend.models.database import db
 from backend.models.user import User
 from backend.models.article import Article
 import os
-# Import des services
-from backend.services.rag_system import EnhancedMUragSystem
-# from config import config  # Ajoute cette ligne en haut du fichier
+# Les services (RAG, modèles IA) sont importés à la demande : les dépendances
+# ML ne sont pas chargées au démarrage de l'application
+from config import Config
+
+# Préfixes des réglages IA repris depuis config.Config
+AI_CONFIG_PREFIXES = ('OLLAMA_', 'DEFAULT_', 'RAG_', 'LLM_', 'ARTIFACT_', 'TTS_', 'SUMMARIZE_')
 
 def create_app(config_name='default'):
     """
@@ -39,6 +42,10 @@ def create_app(config_name='default'):
     app.config['RAG_CHROMA_PATH'] = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'chroma2')
     app.config['RAG_LEXICAL_INDEX'] = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'lexical_index_1.pkl')
     app.config['RAG_CONVERSATION_MEMORY'] = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'conversation_memory.pkl')
+    # Réglages des services IA (modèles, préchargement...) sans écraser ceux ci-dessus
+    for key in dir(Config):
+        if key.startswith(AI_CONFIG_PREFIXES):
+            app.config.setdefault(key, getattr(Config, key))
     # Initialiser les extensions
     db.init_app(app)
     CORS(app, origins=['http://localhost:3000'])  # Pour React en développement
@@ -87,4 +94,9 @@ def create_app(config_name='default'):
     with app.app_context():
         db.create_all()
     
+    # Préchargement du système RAG et des modèles en arrière-plan (non bloquant)
+    if app.config.get('RAG_WARMUP_ON_STARTUP'):
+        from backend.services import start_background_warmup
+        start_background_warmup(app)
+    
     return app
\ No newline at end of file
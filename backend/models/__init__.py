@@ -4,7 +4,7 @@ Module modèles pour ArticSpace
 
 from .database import db
 from .user import User
-from .article import Article
+from .article import Article, ArticleTranslation
 
 # Fonction utilitaire pour créer toutes les tables
 def create_all_tables(app):
@@ -54,6 +54,7 @@ __all__ = [
     'db',
     'User',
     'Article',
+    'ArticleTranslation',
     'create_all_tables',
     'drop_all_tables',
     'create_test_data'
@@ -3,7 +3,7 @@ from datetime import datetime
 import uuid
 import os
 
-from .database import db, TimestampMixin, SoftDeleteMixin, article_tags
+from .database import db, TimestampMixin, SoftDeleteMixin, article_tags, article_translations
 
 class Article(db.Model, TimestampMixin, SoftDeleteMixin):
     __tablename__ = 'article'
@@ -121,9 +121,12 @@ class Article(db.Model, TimestampMixin, SoftDeleteMixin):
         return self.get_file_extension() == '.pdf'
     
     def get_summary_languages(self):
-        """Obtenir les langues de résumé disponibles"""
-        # Pour l'instant simple, mais peut être étendu pour plusieurs résumés
-        return [self.summary_language] if self.summary_language else []
+        """Obtenir les langues de résumé disponibles (résumé + traductions enregistrées)"""
+        languages = [self.summary_language] if self.summary_language else []
+        for translation in self.translations:
+            if translation.language not in languages:
+                languages.append(translation.language)
+        return languages
     
     def can_edit(self, user):
         """Vérifier si un utilisateur peut modifier l'article"""
@@ -306,4 +309,41 @@ class ChatMessage(db.Model, TimestampMixin):
         }
     
     def __repr__(self):
-        return f'<ChatMessage {self.message_type}: {self.content[:50]}>'
\ No newline at end of file
+        return f'<ChatMessage {self.message_type}: {self.content[:50]}>'
+
+
+class ArticleTranslation(db.Model, TimestampMixin):
+    """
+    Traduction du résumé d'un document, une par langue. Partagée par les
+    articles issus du même PDF : supprimer un article ne retire que son lien.
+    """
+    __tablename__ = 'article_translation'
+    __table_args__ = (
+        db.UniqueConstraint('document_id', 'language', name='uq_article_translation_document_language'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    document_id = db.Column(db.String(64), nullable=False, index=True)  # SHA-256 du PDF
+    language = db.Column(db.String(5), nullable=False)
+    source_language = db.Column(db.String(5), nullable=True)
+    summary = db.Column(db.Text, nullable=False)
+    model = db.Column(db.String(100), nullable=True)
+    
+    # Relations
+    articles = db.relationship('Article', secondary=article_translations,
+                               backref=db.backref('translations', lazy='dynamic'))
+    
+    def to_dict(self):
+        """Sérialisation pour JSON"""
+        return {
+            'document_id': self.document_id,
+            'language': self.language,
+            'source_language': self.source_language,
+            'summary': self.summary,
+            'model': self.model,
+            'article_ids': [article.id for article in self.articles],
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+    
+    def __repr__(self):
+        return f'<ArticleTranslation {self.document_id[:8]} {self.language}>'
\ No newline at end of file
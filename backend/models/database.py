@@ -38,6 +38,12 @@ article_tags = db.Table('article_tags',
     db.Column('tag_id', db.Integer, db.ForeignKey('tag.id'), primary_key=True)
 )
 
+# Une traduction (document, langue) est partagée par tous les articles de ce document
+article_translations = db.Table('article_translations',
+    db.Column('article_id', db.Integer, db.ForeignKey('article.id'), primary_key=True),
+    db.Column('translation_id', db.Integer, db.ForeignKey('article_translation.id'), primary_key=True)
+)
+
 user_favorites = db.Table('user_favorites',
     db.Column('user_id', db.Integer, db.ForeignKey('user.id'), primary_key=True),
     db.Column('article_id', db.Integer, db.ForeignKey('article.id'), primary_key=True),
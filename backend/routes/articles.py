@@ -24,7 +24,6 @@ from backend.utils.helpers import (
     format_file_size, truncate_text, log_user_activity, generate_article_slug, escape_search_term
 )
 from backend.utils.decorators import json_required
-from backend.services.summarization_service import extract_from_pdf
 from backend.services.rag_system import EnhancedMUragSystem
 
 articles_bp = Blueprint('articles', __name__)
@@ -165,6 +164,8 @@ def get_my_articles():
 
 def handle_file_upload():
     """Gère l'upload de fichiers"""
+    from backend.services.summarization_service import extract_from_pdf
+    
     if 'file' not in request.files:
         error_msg = "Aucun fichier sélectionné"
         return jsonify({'success': False, 'message': error_msg}), 400
@@ -213,7 +214,7 @@ def handle_file_upload():
         try:
             # content = extract_from_pdf(filepath)
             with open(filepath, 'rb') as f:
-                content, image_paths, temp_dir = extract_from_pdf(f)
+                content, _ = extract_from_pdf(f, extract_images=False)
             if not content.strip():
                 content = "Contenu non extractible automatiquement"
         except Exception as e:
@@ -2,7 +2,7 @@ from flask import Blueprint, request, jsonify, session
 from flask_login import login_required, current_user
 import time
 import logging
-from backend.services.rag_system import EnhancedMUragSystem
+from backend.services import get_rag_system as get_shared_rag_system
 from backend.utils.decorators import require_api_key
 from backend.utils.validators import validate_question
 from backend.utils.helpers import clean_text, format_response
@@ -14,12 +14,29 @@ logger = logging.getLogger(__name__)
 
 chatbot_bp = Blueprint('chatbot', __name__)
 
+# Suggestions de base (aussi utilisées comme checklist par /ask-batch)
+BASE_SUGGESTIONS = [
+    "Résume ce document en français",
+    "Quels sont les résultats principaux de cette étude ?",
+    "Quelle méthodologie a été utilisée ?",
+    "Quelles sont les conclusions de cette recherche ?",
+    "Y a-t-il des limitations mentionnées ?",
+    "Qui sont les auteurs principaux ?",
+    "Dans quel domaine s'inscrit cette recherche ?",
+    "Quelles sont les applications pratiques ?",
+    "Y a-t-il des travaux futurs suggérés ?",
+    "Comment cette étude se compare-t-elle aux autres ?"
+]
+
+# Nombre maximal de questions par lot
+MAX_BATCH_QUESTIONS = 20
+
 def get_rag_system():
-    """Initialise le système RAG de manière lazy"""
+    """Retourne le système RAG partagé (initialisé de manière lazy ou par le préchargement)"""
     global rag_system
     if rag_system is None:
         try:
-            rag_system = EnhancedMUragSystem()
+            rag_system = get_shared_rag_system()
             logger.info("✅ Système RAG initialisé avec succès")
         except Exception as e:
             logger.error(f"❌ Erreur d'initialisation du système RAG: {str(e)}")
@@ -165,6 +182,106 @@ def ask_question():
             'error': f'Erreur interne: {str(e)}'
         }), 500
 
+@chatbot_bp.route('/ask-batch', methods=['POST'])
+@login_required
+def ask_batch():
+    """
+    Poser plusieurs questions en une requête (ex: toute la checklist des suggestions)
+    """
+    try:
+        data = request.get_json() or {}
+        
+        if data.get('use_suggestions'):
+            questions = list(BASE_SUGGESTIONS)
+        else:
+            questions = data.get('questions')
+        
+        if not questions or not isinstance(questions, list):
+            return jsonify({
+                'success': False,
+                'error': 'Liste de questions manquante'
+            }), 400
+        
+        if len(questions) > MAX_BATCH_QUESTIONS:
+            return jsonify({
+                'success': False,
+                'error': f'Maximum {MAX_BATCH_QUESTIONS} questions par lot'
+            }), 400
+        
+        clean_questions = []
+        for question in questions:
+            question = str(question).strip()
+            validation_result = validate_question(question)
+            if not validation_result['valid']:
+                return jsonify({
+                    'success': False,
+                    'error': f"{validation_result['message']} ({question[:50]})"
+                }), 400
+            clean_questions.append(clean_text(question))
+        
+        # Mêmes options (et mêmes défauts) que /ask
+        return_metadata = data.get('return_metadata', True)
+        validation_threshold = data.get('validation_threshold', 0.7)
+        
+        rag = get_rag_system()
+        
+        logger.info(f"📋 Lot de {len(clean_questions)} questions de {current_user.username}")
+        
+        start_time = time.time()
+        results = rag.ask_batch(
+            clean_questions,
+            article_id=data.get('article_id'),
+            return_metadata=return_metadata,
+            validation_threshold=validation_threshold
+        )
+        processing_time = time.time() - start_time
+        
+        if 'chat_history' not in session:
+            session['chat_history'] = []
+        
+        formatted_results = []
+        for result in results:
+            session['chat_history'].append({
+                'id': len(session['chat_history']) + 1,
+                'question': result['question'],
+                'answer': result['answer'],
+                'timestamp': time.time(),
+                'metadata': {
+                    'verification_status': result['verification_status'],
+                    'processing_time': processing_time,
+                    'batch': True
+                }
+            })
+            formatted_results.append({
+                'question': result['question'],
+                'answer': format_response(result['answer'], result['verification_status']),
+                'verification_status': result['verification_status'],
+                'verification_score': result.get('verification_score'),
+                'sources': result['sources']
+            })
+        
+        # Limiter l'historique en session à 50 entrées max
+        if len(session['chat_history']) > 50:
+            session['chat_history'] = session['chat_history'][-50:]
+        
+        return jsonify({
+            'success': True,
+            'data': {
+                'results': formatted_results,
+                'metadata': {
+                    'count': len(formatted_results),
+                    'processing_time': round(processing_time, 2)
+                }
+            }
+        })
+        
+    except Exception as e:
+        logger.error(f"❌ Erreur dans ask_batch: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': f'Erreur interne: {str(e)}'
+        }), 500
+
 @chatbot_bp.route('/history', methods=['GET'])
 @login_required
 def get_chat_history():
@@ -265,27 +382,13 @@ def get_question_suggestions():
     Fournit des suggestions de questions basées sur les articles de l'utilisateur
     """
     try:
-        # Suggestions de base
-        base_suggestions = [
-            "Résume ce document en français",
-            "Quels sont les résultats principaux de cette étude ?",
-            "Quelle méthodologie a été utilisée ?",
-            "Quelles sont les conclusions de cette recherche ?",
-            "Y a-t-il des limitations mentionnées ?",
-            "Qui sont les auteurs principaux ?",
-            "Dans quel domaine s'inscrit cette recherche ?",
-            "Quelles sont les applications pratiques ?",
-            "Y a-t-il des travaux futurs suggérés ?",
-            "Comment cette étude se compare-t-elle aux autres ?"
-        ]
-        
         # TODO: Améliorer avec des suggestions personnalisées basées sur les articles de l'utilisateur
         # Cela nécessiterait une analyse des articles uploadés par l'utilisateur
         
         return jsonify({
             'success': True,
             'data': {
-                'suggestions': base_suggestions[:6],  # Limiter à 6 suggestions
+                'suggestions': BASE_SUGGESTIONS[:6],  # Limiter à 6 suggestions
                 'categories': {
                     'analysis': ['Résume ce document', 'Quels sont les résultats principaux ?'],
                     'methodology': ['Quelle méthodologie a été utilisée ?', 'Y a-t-il des limitations ?'],
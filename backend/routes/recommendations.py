@@ -8,7 +8,7 @@ import datetime
 import os
 import csv
 import io
-from backend.services.rag_system import EnhancedMUragSystem
+from backend.services import get_rag_system as get_shared_rag_system
 from backend.models.article import Article
 from backend.utils.validators import validate_search_query
 from backend.utils.helpers import clean_text, extract_keywords
@@ -24,11 +24,11 @@ recommendations_bp = Blueprint('recommendations', __name__, url_prefix='/api/rec
 rag_system = None
 
 def get_rag_system():
-    """Initialise le système RAG de manière lazy"""
+    """Retourne le système RAG partagé (initialisé de manière lazy ou par le préchargement)"""
     global rag_system
     if rag_system is None:
         try:
-            rag_system = EnhancedMUragSystem()
+            rag_system = get_shared_rag_system()
             logger.info("✅ Système RAG initialisé pour les recommandations")
         except Exception as e:
             logger.error(f"❌ Erreur d'initialisation du système RAG: {str(e)}")
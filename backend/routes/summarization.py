@@ -1,72 +1,207 @@
-from flask import Blueprint, request, jsonify, send_file
-from backend.services.summarization_service import extract_from_pdf, summarize_document_with_vision, translate_text, generate_audio, create_pdf
-from backend.services.pptx_service import generate_advanced_presentation_with_visuals
+from flask import Blueprint, Response, request, jsonify, send_file, current_app, url_for
+from flask_login import current_user
 from langdetect import detect
-import os
+import time
 import asyncio
-from backend.services.podcast_service import generate_improved_podcast_script, generate_complete_emotional_podcast
 import base64
+import itertools
+import json
+
+from backend.services.summarize_pipeline import is_error_text
+
+# Les services (PyMuPDF, OpenCV, matplotlib, pydub, edge-tts...) sont importés
+# dans les vues pour ne pas ralentir create_app()
 
 
 summarization_bp = Blueprint('summarization', __name__)
+
+def _use_result_cache(data):
+    """no_cache=true force le recalcul des étapes LLM (le résultat reste mis en cache)"""
+    return str((data or {}).get('no_cache', 'false')).lower() != 'true'
+
+def _owned_article_id(article_id):
+    """Article de l'utilisateur connecté auquel rattacher les traductions, sinon None"""
+    if not article_id or not current_user.is_authenticated:
+        return None
+    from backend.models.article import Article
+    article = Article.query.get(article_id)
+    return article.id if article and article.can_edit(current_user) else None
+
+def _stored_summary(document_id, lang=None):
+    """Résumé d'un document déjà traité (traduit dans ``lang`` si disponible) et sa langue"""
+    from backend.services.artifact_store import get_artifact_store, is_document_id
+    if not is_document_id(document_id):
+        return None, None
+    artifact = get_artifact_store().get_json(document_id, 'summary')
+    if not artifact:
+        return None, None
+    if lang and lang in artifact.get('translations', {}):
+        return artifact['translations'][lang], lang
+    return artifact['summary'], artifact['lang']
+
+def _compression_ratio(form):
+    ratio = form.get('compression_ratio', type=float)
+    if ratio is None or not 0 < ratio <= 1:
+        return None  # valeur de la configuration
+    return ratio
+
+def _summarize_params(form):
+    """Paramètres communs de /summarize et /summarize/jobs"""
+    return {
+        'lang': form.get('lang', 'fr'),  # Langue cible, défaut français
+        'use_cache': _use_result_cache(form),
+        # Opt-in : traduire aussi le résumé dans toutes les langues supportées, en arrière-plan
+        'fanout': form.get('fanout', 'false').lower() == 'true',
+        'article_id': _owned_article_id(form.get('article_id', type=int)),
+        # Part des tokens du texte conservée avant le résumé (1.0 = nettoyage seul)
+        'compression_ratio': _compression_ratio(form),
+    }
+
 @summarization_bp.route('/summarize', methods=['POST'])
 def summarize():
+    from backend.services.artifact_store import hash_upload
+    from backend.services.summarize_pipeline import DocumentError, summarize_document
+    
     if 'pdf' not in request.files:
         return jsonify({'error': 'Aucun fichier PDF fourni.'}), 400
-    pdf_file = request.files['pdf']
-    lang = request.form.get('lang', 'fr')  # Langue cible, défaut français
-
-    # Extraction texte + images
-    text, image_paths, temp_dir = extract_from_pdf(pdf_file)
-    if not text.strip():
-        return jsonify({'error': 'Impossible d\'extraire le texte du PDF.'}), 400
+    params = _summarize_params(request.form)
+    timings = {}
 
-    # Génération du résumé avancé
-    summary = summarize_document_with_vision(text, image_paths)
+    # Identifiant du document = SHA-256 du PDF, calculé pendant la lecture de l'upload
+    start = time.perf_counter()
+    document_id, pdf_stream = hash_upload(request.files['pdf'])
+    timings['upload'] = round(time.perf_counter() - start, 3)
 
-    # Détection de la langue du résumé généré
     try:
-        detected_lang = detect(summary)
-    except Exception:
-        detected_lang = 'en'
+        result = summarize_document(current_app._get_current_object(), document_id, pdf_stream,
+                                    timings=timings, **params)
+    except DocumentError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(result)
+
+@summarization_bp.route('/summarize/jobs', methods=['POST'])
+def submit_summarize_job():
+    """
+    Version asynchrone de /summarize : retourne 202 et l'identifiant du job.
+    Un même PDF (mêmes options : langue, cache, traductions...) déjà en cours de
+    traitement rejoint le job existant.
+    """
+    from backend.services.artifact_store import hash_upload
+    from backend.services.job_manager import get_job_manager
+    from backend.services.summarize_pipeline import SUMMARY_STAGES, summarize_document
+    
+    if 'pdf' not in request.files:
+        return jsonify({'error': 'Aucun fichier PDF fourni.'}), 400
+    params = _summarize_params(request.form)
+    document_id, pdf_stream = hash_upload(request.files['pdf'])
+    app = current_app._get_current_object()
+
+    def run(progress):
+        with app.app_context():
+            return summarize_document(app, document_id, pdf_stream, progress=progress, **params)
+
+    job, attached = get_job_manager().submit(
+        'summarize', ('summarize', document_id) + tuple(sorted(params.items())), run,
+        stages=SUMMARY_STAGES
+    )
+    job_id = job['job_id']
+    return jsonify(dict(job, document_id=document_id, attached=attached, urls={
+        'status': url_for('summarization.summarize_job_status', job_id=job_id),
+        'events': url_for('summarization.summarize_job_events', job_id=job_id),
+        'result': url_for('summarization.summarize_job_result', job_id=job_id),
+    })), 202
+
+@summarization_bp.route('/summarize/jobs/<job_id>', methods=['GET'])
+def summarize_job_status(job_id):
+    from backend.services.job_manager import get_job_manager
+    
+    job = get_job_manager().get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job inconnu ou expiré.'}), 404
+    return jsonify(job)
+
+@summarization_bp.route('/summarize/jobs/<job_id>/events', methods=['GET'])
+def summarize_job_events(job_id):
+    """Avancement du job en Server-Sent Events ; reprise possible via Last-Event-ID"""
+    from backend.services.job_manager import get_job_manager
+    
+    manager = get_job_manager()
+    if manager.get(job_id) is None:
+        return jsonify({'error': 'Job inconnu ou expiré.'}), 404
+    last_event_id = request.headers.get('Last-Event-ID', type=int) or request.args.get('since', 0, type=int)
+
+    def stream():
+        after = last_event_id
+        while True:
+            events, finished = manager.wait_events(job_id, after, timeout=15)
+            for event in events:
+                after = event['id']
+                yield f"id: {event['id']}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+            if finished:
+                yield f"event: end\ndata: {json.dumps(manager.get(job_id), ensure_ascii=False)}\n\n"
+                return
+            if not events:
+                yield ": keep-alive\n\n"
 
-    # Traduction si nécessaire
-    translated_summary = summary
-    if lang and lang != detected_lang:
-        translated_summary = translate_text(summary, lang)
+    return Response(stream(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
-    # Nettoyage des images temporaires
-    if temp_dir and os.path.exists(temp_dir):
-        import shutil
-        shutil.rmtree(temp_dir)
+@summarization_bp.route('/summarize/jobs/<job_id>/result', methods=['GET'])
+def summarize_job_result(job_id):
+    from backend.services.job_manager import get_job_manager
+    
+    job, result, client_error = get_job_manager().get_result(job_id)
+    if job is None:
+        return jsonify({'error': 'Job inconnu ou expiré.'}), 404
+    if job['status'] == 'error':
+        return jsonify({'error': job['error'], 'job': job}), 400 if client_error else 500
+    if job['status'] != 'completed':
+        return jsonify(job), 202
+    return jsonify(result)
 
+@summarization_bp.route('/summarize/translations/<document_id>', methods=['GET'])
+def summary_translations(document_id):
+    """Traductions disponibles d'un résumé et avancement du job de traduction"""
+    from backend.models.article import ArticleTranslation
+    from backend.services.artifact_store import is_document_id
+    from backend.services.translation_jobs import get_translation_fanout
+    
+    if not is_document_id(document_id):
+        return jsonify({'error': 'Identifiant de document invalide.'}), 400
+    translations = ArticleTranslation.query.filter_by(document_id=document_id).all()
     return jsonify({
-        'summary': summary,
-        'lang': detected_lang,
-        'translated_summary': translated_summary,
-        'target_lang': lang
+        'document_id': document_id,
+        'translations': {t.language: t.summary for t in translations},
+        'fanout': get_translation_fanout(document_id)
     })
 
 @summarization_bp.route('/summarize/audio', methods=['POST'])
 def summarize_audio():
+    from backend.services.tts_service import get_tts_backend, stream_speech, voice_for_language
+    
     data = request.form or request.json
     text = data.get('text')
     lang = data.get('lang', 'fr')
     if not text:
         return jsonify({'error': 'Aucun texte fourni pour la synthèse vocale.'}), 400
     try:
-        audio_bytes = asyncio.run(generate_audio(text, lang))
-        return send_file(
-            audio_bytes,
-            mimetype='audio/mpeg',
-            as_attachment=True,
-            download_name='summary.mp3'
+        # Audio relayé bloc par bloc : le premier bloc est attendu ici pour
+        # pouvoir encore répondre par une erreur si le moteur TTS échoue
+        backend = get_tts_backend()
+        chunks = stream_speech(text, voice_for_language(lang), backend=backend)
+        first_chunk = next(chunks, b'')
+        return Response(
+            itertools.chain([first_chunk], chunks),
+            mimetype=backend.mimetype,
+            headers={'Content-Disposition': f'attachment; filename=summary.{backend.extension}'}
         )
     except Exception as e:
         return jsonify({'error': f'Erreur lors de la génération audio : {e}'}), 500
 
 @summarization_bp.route('/summarize/pdf', methods=['POST'])
 def summarize_pdf():
+    from backend.services.summarization_service import create_pdf
+    
     data = request.form or request.json
     summary = data.get('summary')
     lang = data.get('lang', 'fr')
@@ -85,14 +220,38 @@ def summarize_pdf():
 
 @summarization_bp.route('/summarize/pptx', methods=['POST'])
 def summarize_pptx():
+    from backend.services.pptx_service import generate_advanced_presentation_with_visuals
+    
     data = request.form or request.json
     summary = data.get('summary')
+    document_id = data.get('document_id')
     title = data.get('title', 'Présentation Scientifique')
     theme = data.get('theme', '🧬 Scientifique Moderne')
+    use_cache = _use_result_cache(data)
+
+    # Document déjà résumé : pas besoin de renvoyer le résumé
+    summary_lang = None
+    if document_id and not summary:
+        summary, summary_lang = _stored_summary(document_id, data.get('lang'))
+        if not summary:
+            return jsonify({'error': 'Document inconnu, résumez-le d\'abord via /summarize.'}), 404
     if not summary:
         return jsonify({'error': 'Aucun résumé fourni pour la génération PPTX.'}), 400
     try:
-        pptx_buffer = generate_advanced_presentation_with_visuals(summary, title=title, theme_name=theme)
+        slides_data = None
+        if summary_lang:
+            from backend.services.artifact_store import get_artifact_store, artifact_name
+            from backend.services.pptx_service import extract_key_points
+            store = get_artifact_store()
+            slides_name = artifact_name('slides', summary_lang)
+            slides_data = store.get_json(document_id, slides_name) if use_cache else None
+            if slides_data is None:
+                slides_data = extract_key_points(summary, use_cache=use_cache)
+                if slides_data:
+                    store.put_json(document_id, slides_name, slides_data)
+        pptx_buffer = generate_advanced_presentation_with_visuals(
+            summary, title=title, theme_name=theme, use_cache=use_cache, slides_data=slides_data or None
+        )
         if not pptx_buffer:
             return jsonify({'error': 'Erreur lors de la génération de la présentation.'}), 500
         return send_file(
@@ -106,13 +265,27 @@ def summarize_pptx():
 
 @summarization_bp.route('/summarize/podcast', methods=['POST'])
 def summarize_podcast():
+    from backend.services.podcast_service import generate_improved_podcast_script, generate_complete_emotional_podcast
+    
     data = request.form or request.json
     summary = data.get('summary')
+    document_id = data.get('document_id')
     lang = data.get('lang')  # Peut être None
     style = data.get('style', 'Interview d\'expert')
     duration = data.get('duration', '5-7 min')
-    with_audio = data.get('with_audio', 'true').lower() == 'true'
-    with_video = data.get('with_video', 'false').lower() == 'true'
+    with_audio = str(data.get('with_audio', 'true')).lower() == 'true'
+    with_video = str(data.get('with_video', 'false')).lower() == 'true'
+    use_cache = _use_result_cache(data)
+
+    # Document déjà résumé : pas besoin de renvoyer le résumé
+    store = None
+    if document_id and not summary:
+        from backend.services.artifact_store import get_artifact_store
+        summary, summary_lang = _stored_summary(document_id, lang)
+        if not summary:
+            return jsonify({'error': 'Document inconnu, résumez-le d\'abord via /summarize.'}), 404
+        lang = lang or summary_lang
+        store = get_artifact_store()
 
     if not summary:
         return jsonify({'error': 'Aucun résumé fourni pour la génération du podcast.'}), 400
@@ -124,20 +297,34 @@ def summarize_podcast():
         except Exception:
             lang = 'fr'
 
-    # Générer le script
-    script = generate_improved_podcast_script(summary, lang, style, duration)
+    # Générer le script (ou le relire depuis les artefacts du document)
+    script = None
+    if store:
+        from backend.services.artifact_store import artifact_name
+        podcast_name = artifact_name('podcast', lang, style, duration)
+        cached_script = store.get_json(document_id, f'{podcast_name}_script') if use_cache else None
+        script = cached_script and cached_script['script']
+    if not script:
+        script = generate_improved_podcast_script(summary, lang, style, duration)
+        if store and not is_error_text(script):
+            store.put_json(document_id, f'{podcast_name}_script', {'script': script})
 
     audio_b64 = None
     video_b64 = None
-    if with_audio or with_video:
-        import asyncio
+    cached_audio = store.get_bytes(document_id, f'{podcast_name}_audio') if (store and use_cache and with_audio and not with_video) else None
+    if cached_audio:
+        audio_b64 = base64.b64encode(cached_audio).decode('utf-8')
+    elif with_audio or with_video:
         audio_bytes, video_bytes = asyncio.run(generate_complete_emotional_podcast(script, lang, include_video=with_video))
+        if audio_bytes and store:
+            store.put_bytes(document_id, f'{podcast_name}_audio', audio_bytes)
         if audio_bytes:
             audio_b64 = base64.b64encode(audio_bytes).decode('utf-8')
         if video_bytes:
             video_b64 = base64.b64encode(video_bytes).decode('utf-8')
 
     return jsonify({
+        'document_id': document_id,
         'script': script,
         'lang': lang,
         'audio_b64': audio_b64,
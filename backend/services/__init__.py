@@ -2,10 +2,24 @@
 Module services pour ArticSpace
 """
 
+import threading
+import time
+
 from .rag_system import EnhancedMUragSystem
 
 # Instance globale du système RAG (singleton)
 _rag_instance = None
+_rag_lock = threading.Lock()
+
+# Préchargement en arrière-plan
+_warmup_thread = None
+_warmup_status = {
+    'state': 'idle',  # idle, running, done, partial (étapes en échec), failed (toutes en échec), error
+    'started_at': None,
+    'duration': None,
+    'steps': {},
+    'error': None
+}
 
 def get_rag_system():
     """
@@ -13,13 +27,82 @@ def get_rag_system():
     """
     global _rag_instance
     if _rag_instance is None:
+        with _rag_lock:
+            if _rag_instance is None:
+                try:
+                    _rag_instance = EnhancedMUragSystem()
+                    print("✅ Système RAG initialisé")
+                except Exception as e:
+                    print(f"❌ Erreur d'initialisation du système RAG: {str(e)}")
+                    raise
+    return _rag_instance
+
+def _warm_ollama_model(model, keep_alive):
+    """
+    Charge un modèle Ollama en mémoire sans générer de texte (prompt vide)
+    """
+    from .llm_client import generate
+    generate(model, prompt='', keep_alive=keep_alive)
+
+def start_background_warmup(app):
+    """
+    Initialise le système RAG et charge les modèles Ollama dans un thread
+    d'arrière-plan. Retourne immédiatement : le démarrage de l'application
+    n'attend ni les imports ML ni le chargement des modèles.
+    """
+    global _warmup_thread
+    if _warmup_thread is not None:
+        return _warmup_thread
+    
+    def _run_step(name, func):
+        step_start = time.perf_counter()
         try:
-            _rag_instance = EnhancedMUragSystem()
-            print("✅ Système RAG initialisé")
+            func()
+            _warmup_status['steps'][name] = {'status': 'ok', 'duration': round(time.perf_counter() - step_start, 3)}
         except Exception as e:
-            print(f"❌ Erreur d'initialisation du système RAG: {str(e)}")
-            raise
-    return _rag_instance
+            _warmup_status['steps'][name] = {'status': 'error', 'error': str(e)}
+            print(f"⚠️ Préchargement '{name}' échoué: {e}")
+    
+    def _warmup():
+        with app.app_context():
+            keep_alive = app.config.get('RAG_WARMUP_KEEP_ALIVE', '10m')
+            models = []
+            for key in ('DEFAULT_SUMMARIZATION_MODEL', 'DEFAULT_VERIFICATION_MODEL'):
+                model = app.config.get(key)
+                if model and model not in models:
+                    models.append(model)
+            
+            try:
+                _run_step('rag_system', get_rag_system)
+                if _rag_instance is not None:
+                    _run_step('embeddings', lambda: _rag_instance.embeddings.embed_query('warmup'))
+                for model in models:
+                    _run_step(f'model:{model}', lambda model=model: _warm_ollama_model(model, keep_alive))
+                failures = {name: step['error'] for name, step in _warmup_status['steps'].items()
+                            if step['status'] == 'error'}
+                if not failures:
+                    _warmup_status['state'] = 'done'
+                else:
+                    _warmup_status['state'] = 'failed' if len(failures) == len(_warmup_status['steps']) else 'partial'
+                    _warmup_status['error'] = '; '.join(f"{name}: {error}" for name, error in failures.items())
+            except Exception as e:
+                _warmup_status['state'] = 'error'
+                _warmup_status['error'] = str(e)
+            finally:
+                _warmup_status['duration'] = round(time.time() - _warmup_status['started_at'], 3)
+                print(f"🔥 Préchargement terminé en {_warmup_status['duration']}s")
+    
+    _warmup_status['state'] = 'running'
+    _warmup_status['started_at'] = time.time()
+    _warmup_thread = threading.Thread(target=_warmup, name='rag-warmup', daemon=True)
+    _warmup_thread.start()
+    return _warmup_thread
+
+def get_warmup_status():
+    """
+    Retourne l'état du préchargement en arrière-plan
+    """
+    return dict(_warmup_status, steps=dict(_warmup_status['steps']))
 
 def reset_rag_system():
     """
@@ -44,6 +127,8 @@ def check_service_health():
     """
     health_status = {}
     
+    health_status['warmup'] = get_warmup_status()
+    
     # Vérifier le système RAG
     try:
         rag = get_rag_system()
@@ -62,13 +147,15 @@ def check_service_health():
     
     # Vérifier Ollama (service externe)
     try:
-        import ollama
+        from .llm_client import get_llm_client, get_llm_metrics, get_scheduler_status
         # Test simple de connectivité
-        models = ollama.list()
+        models = get_llm_client().list_models()
         health_status['ollama'] = {
             'status': 'healthy',
             'details': {
-                'models_available': len(models.get('models', [])) if isinstance(models, dict) else 0
+                'models_available': len(models.get('models') or []),
+                'llm_metrics': get_llm_metrics(),
+                'scheduler': get_scheduler_status()
             }
         }
     except Exception as e:
@@ -116,6 +203,8 @@ __all__ = [
     'EnhancedMUragSystem',
     'get_rag_system',
     'reset_rag_system',
+    'start_background_warmup',
+    'get_warmup_status',
     'check_service_health',
     'initialize_all_services',
     'AVAILABLE_SERVICES'
@@ -0,0 +1,186 @@
+# backend/services/artifact_store.py
+"""
+Cache des artefacts d'un document, adressé par le contenu du PDF
+
+L'identifiant d'un document est le SHA-256 du PDF, calculé pendant la lecture
+de l'upload. Tout ce qui en est dérivé est rangé sous cet identifiant :
+texte extrait, figures, résumé (et traductions), slides, script et audio du
+podcast. Un PDF déjà vu (ex: le même article envoyé par toute une classe) ou
+la demande d'un artefact dérivé est servi depuis le disque.
+
+Arborescence : <racine>/<2 premiers caractères>/<sha256>/
+    text.txt, figures/001.png..., <nom>.json, <nom>.bin
+
+Les fichiers sont écrits dans un fichier temporaire puis renommés, et le
+dossier des figures est rempli à part puis mis en place d'un seul renommage :
+un lecteur concurrent voit un artefact complet ou rien. ``text.txt`` est écrit
+après les figures et marque la fin de l'extraction.
+"""
+
+import hashlib
+import io
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+
+from backend.utils.helpers import get_config_value
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+DOCUMENT_ID_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+
+
+def hash_upload(stream, chunk_size=UPLOAD_CHUNK_SIZE):
+    """
+    Lire un upload (FileStorage ou fichier) par blocs en calculant son SHA-256.
+    Retourne (document_id, BytesIO positionné au début).
+    """
+    digest = hashlib.sha256()
+    buffer = io.BytesIO()
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        digest.update(chunk)
+        buffer.write(chunk)
+    buffer.seek(0)
+    return digest.hexdigest(), buffer
+
+
+def is_document_id(value):
+    return bool(value) and bool(DOCUMENT_ID_PATTERN.match(str(value)))
+
+
+def artifact_name(*parts):
+    """Nom de fichier sûr pour un artefact paramétré (ex: 'podcast', 'fr', 'Interview')"""
+    raw = "_".join(str(part) for part in parts)
+    safe = re.sub(r'[^A-Za-z0-9_.-]+', '-', raw).strip('-')
+    # Paramètres libres (style, titre...) : suffixe d'empreinte pour éviter les collisions
+    return f"{safe[:80]}_{hashlib.sha1(raw.encode('utf-8')).hexdigest()[:8]}"
+
+
+class ArtifactStore:
+    """Artefacts d'un document sur disque, écrits de façon atomique"""
+
+    def __init__(self, root):
+        self.root = root
+        self._lock = threading.Lock()
+
+    def document_dir(self, document_id):
+        if not is_document_id(document_id):
+            raise ValueError(f"Identifiant de document invalide: {document_id}")
+        return os.path.join(self.root, document_id[:2], document_id)
+
+    def has_document(self, document_id):
+        return is_document_id(document_id) and os.path.isdir(self.document_dir(document_id))
+
+    def _path(self, document_id, filename):
+        return os.path.join(self.document_dir(document_id), filename)
+
+    def _write_atomic(self, path, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def get_bytes(self, document_id, name):
+        path = self._path(document_id, f"{name}.bin")
+        if not os.path.exists(path):
+            return None
+        with open(path, 'rb') as f:
+            return f.read()
+
+    def put_bytes(self, document_id, name, data):
+        self._write_atomic(self._path(document_id, f"{name}.bin"), data)
+
+    def get_json(self, document_id, name):
+        path = self._path(document_id, f"{name}.json")
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def put_json(self, document_id, name, value):
+        self._write_atomic(self._path(document_id, f"{name}.json"),
+                           json.dumps(value, ensure_ascii=False).encode('utf-8'))
+
+    def update_json(self, document_id, name, update):
+        """
+        Lire-modifier-écrire un artefact JSON sans perdre les mises à jour
+        concurrentes. ``update`` reçoit la valeur actuelle (ou None) ; s'il
+        retourne None, rien n'est écrit.
+        """
+        with self._lock:
+            value = update(self.get_json(document_id, name))
+            if value is not None:
+                self.put_json(document_id, name, value)
+            return value
+
+    def get_text(self, document_id):
+        path = self._path(document_id, "text.txt")
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read()
+
+    def put_text(self, document_id, text):
+        self._write_atomic(self._path(document_id, "text.txt"), text.encode('utf-8'))
+
+    def get_figures(self, document_id):
+        """Chemins des figures extraites, ou None si le document n'a pas encore été extrait"""
+        figures_dir = self._path(document_id, "figures")
+        if not os.path.isdir(figures_dir):
+            return None
+        return [os.path.join(figures_dir, name) for name in sorted(os.listdir(figures_dir))
+                if name.endswith('.png')]
+
+    def put_figures(self, document_id, figures):
+        """
+        Enregistrer les figures extraites (PNG en mémoire). Elles sont écrites
+        dans un dossier temporaire voisin, renommé en ``figures`` en une fois.
+        Un dossier ``figures`` déjà publié est complet et, le document étant
+        adressé par son contenu, identique : il est conservé tel quel (aucun
+        fichier n'est supprimé dans un dossier que d'autres requêtes lisent).
+        """
+        figures_dir = self._path(document_id, "figures")
+        if os.path.isdir(figures_dir):
+            return self.get_figures(document_id)
+
+        os.makedirs(os.path.dirname(figures_dir), exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(dir=os.path.dirname(figures_dir), prefix='.figures-', suffix='.tmp')
+        try:
+            for index, figure in enumerate(figures, 1):
+                with open(os.path.join(tmp_dir, f"{index:03d}.png"), 'wb') as f:
+                    f.write(figure)
+            os.replace(tmp_dir, figures_dir)
+        except Exception:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            # Dossier publié entre-temps par une requête concurrente : garder le sien
+            if not os.path.isdir(figures_dir):
+                raise
+        return self.get_figures(document_id)
+
+
+# Instance globale (singleton)
+_artifact_store = None
+_artifact_store_lock = threading.Lock()
+
+def get_artifact_store():
+    """
+    Retourne le cache d'artefacts partagé
+    """
+    global _artifact_store
+    if _artifact_store is None:
+        with _artifact_store_lock:
+            if _artifact_store is None:
+                _artifact_store = ArtifactStore(get_config_value('ARTIFACT_STORE_PATH'))
+    return _artifact_store
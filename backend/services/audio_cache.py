@@ -0,0 +1,132 @@
+# backend/services/audio_cache.py
+"""
+Cache disque de l'audio synthétisé (TTS)
+
+Clé : empreinte SHA-256 de (moteur, voix, débit, texte). Chaque entrée est un
+fichier ; la date de modification sert de date d'accès (rafraîchie à chaque
+lecture). Quand la taille totale dépasse la limite, les fichiers les moins
+récemment utilisés sont supprimés (LRU).
+
+Les introductions / conclusions de podcast et les résumés réécoutés ne sont
+ainsi synthétisés qu'une fois.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+from backend.utils.helpers import get_config_value
+
+# Après éviction, la taille totale redescend à cette fraction de la limite
+EVICTION_TARGET_RATIO = 0.9
+
+
+class AudioCache:
+    """Fichiers audio indexés par empreinte, avec éviction LRU bornée en taille"""
+
+    def __init__(self, root, max_bytes=512 * 1024 * 1024):
+        self.root = root
+        self.max_bytes = int(max_bytes)
+        self._lock = threading.Lock()
+        self._total = None  # taille totale, calculée au premier usage
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(text, voice, rate, backend_name):
+        payload = json.dumps([backend_name, voice, rate, text], ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.root, key[:2], f"{key}.audio")
+
+    def _entries(self):
+        for dirpath, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                if filename.endswith('.audio'):
+                    path = os.path.join(dirpath, filename)
+                    try:
+                        stat = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    yield path, stat.st_size, stat.st_mtime
+
+    def _total_size(self):
+        if self._total is None:
+            self._total = sum(size for _, size, _ in self._entries())
+        return self._total
+
+    def get(self, key):
+        path = self._path(key)
+        with self._lock:
+            try:
+                with open(path, 'rb') as f:
+                    data = f.read()
+                os.utime(path)  # accès récent : dernier évincé
+            except FileNotFoundError:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return data
+
+    def set(self, key, data):
+        if not data or len(data) > self.max_bytes:
+            return
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        with self._lock:
+            total = self._total_size()
+            if os.path.exists(path):
+                total -= os.path.getsize(path)
+            os.replace(tmp_path, path)
+            self._total = total + len(data)
+            self._evict()
+
+    def _evict(self):
+        """Supprimer les fichiers les moins récemment utilisés au-delà de la limite"""
+        if self._total <= self.max_bytes:
+            return
+        target = self.max_bytes * EVICTION_TARGET_RATIO
+        for path, size, _ in sorted(self._entries(), key=lambda entry: entry[2]):
+            if self._total <= target:
+                break
+            try:
+                os.remove(path)
+                self._total -= size
+            except FileNotFoundError:
+                continue
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size_bytes': self._total_size(),
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+
+# Instance globale (singleton)
+_audio_cache = None
+_audio_cache_lock = threading.Lock()
+
+def get_audio_cache():
+    """
+    Retourne le cache audio partagé, ou None s'il est désactivé
+    """
+    global _audio_cache
+    if not get_config_value('TTS_AUDIO_CACHE_ENABLED', True):
+        return None
+    if _audio_cache is None:
+        with _audio_cache_lock:
+            if _audio_cache is None:
+                _audio_cache = AudioCache(
+                    get_config_value('TTS_AUDIO_CACHE_PATH'),
+                    max_bytes=get_config_value('TTS_AUDIO_CACHE_MAX_MB', 512) * 1024 * 1024
+                )
+    return _audio_cache
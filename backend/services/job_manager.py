@@ -0,0 +1,204 @@
+# backend/services/job_manager.py
+"""
+Jobs asynchrones (résumé de PDF...) exécutés par un pool de workers local
+
+Soumettre un job retourne immédiatement son identifiant : la requête HTTP
+n'occupe plus un worker web pendant les minutes de traitement. Chaque job
+publie des événements d'avancement par étape (``{"stage", "event", ...}``),
+consultables par polling ou en flux (SSE), puis son résultat.
+
+Une soumission portant la même clé qu'un job en attente ou en cours (ex: le
+même PDF et les mêmes options) rejoint ce job au lieu d'en créer un nouveau.
+Les jobs terminés sont conservés ``ttl`` secondes ; l'expiration est vérifiée
+à chaque soumission et à chaque lecture d'état ou de résultat.
+"""
+
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from backend.utils.helpers import get_config_value
+
+# Événement -> statut de l'étape
+STAGE_STATUS = {
+    'started': 'running',
+    'done': 'done',
+    'cached': 'cached',
+    'skipped': 'skipped',
+}
+
+FINISHED_STATUSES = ('completed', 'error')
+
+
+class JobManager:
+    """Pool de workers, état des jobs et file d'événements par job"""
+
+    def __init__(self, max_workers=2, ttl=3600):
+        self.ttl = float(ttl)
+        self._executor = ThreadPoolExecutor(max_workers=max(1, int(max_workers)), thread_name_prefix='job')
+        self._cond = threading.Condition()
+        self._jobs = {}    # job_id -> job
+        self._active = {}  # clé de déduplication -> job_id
+
+    def submit(self, kind, key, func, stages=()):
+        """
+        Planifier ``func(progress)`` ; ``progress(event)`` publie un événement.
+        Retourne (état du job, True si la soumission a rejoint un job existant).
+        """
+        with self._cond:
+            self._prune()
+            if key is not None and key in self._active:
+                return self._snapshot(self._jobs[self._active[key]]), True
+
+            job = {
+                'id': uuid.uuid4().hex,
+                'kind': kind,
+                'key': key,
+                'status': 'queued',
+                'stages': {stage: {'status': 'pending'} for stage in stages},
+                'events': [],
+                'result': None,
+                'error': None,
+                'client_error': False,
+                'created_at': time.time(),
+                'started_at': None,
+                'finished_at': None,
+            }
+            self._jobs[job['id']] = job
+            if key is not None:
+                self._active[key] = job['id']
+            snapshot = self._snapshot(job)
+
+        self._executor.submit(self._run, job, func)
+        return snapshot, False
+
+    def _run(self, job, func):
+        with self._cond:
+            job['status'] = 'running'
+            job['started_at'] = time.time()
+            self._cond.notify_all()
+        try:
+            result = func(lambda event: self._record(job, event))
+            with self._cond:
+                job['result'] = result
+                job['status'] = 'completed'
+        except Exception as e:
+            print(f"⚠️ Job {job['kind']} {job['id'][:8]} échoué: {e}")
+            with self._cond:
+                job['error'] = str(e)
+                job['client_error'] = isinstance(e, ValueError)
+                job['status'] = 'error'
+                for stage in job['stages'].values():
+                    if stage['status'] == 'running':
+                        stage['status'] = 'error'
+        finally:
+            with self._cond:
+                job['finished_at'] = time.time()
+                if self._active.get(job['key']) == job['id']:
+                    del self._active[job['key']]
+                self._cond.notify_all()
+
+    def _record(self, job, event):
+        """Ajouter un événement et mettre à jour l'étape correspondante"""
+        now = time.time()
+        with self._cond:
+            stage_name = event.get('stage')
+            if stage_name:
+                stage = job['stages'].setdefault(stage_name, {'status': 'pending'})
+                status = STAGE_STATUS.get(event.get('event'))
+                if status == 'running':
+                    stage['started_at'] = now
+                elif status and stage.get('started_at'):
+                    stage['duration'] = round(now - stage['started_at'], 3)
+                if status:
+                    stage['status'] = status
+                elif stage['status'] == 'pending':
+                    stage['status'] = 'running'
+                if event.get('total'):
+                    stage['completed'] = event.get('completed', 0)
+                    stage['total'] = event['total']
+            job['events'].append(dict(event, id=len(job['events']) + 1, time=now))
+            self._cond.notify_all()
+
+    def _prune(self):
+        """Oublier les jobs terminés depuis plus de ``ttl`` secondes"""
+        limit = time.time() - self.ttl
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job['finished_at'] is not None and job['finished_at'] < limit]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def _snapshot(self, job):
+        done = sum(1 for stage in job['stages'].values() if stage['status'] in ('done', 'cached', 'skipped'))
+        return {
+            'job_id': job['id'],
+            'kind': job['kind'],
+            'status': job['status'],
+            'progress': round(done / len(job['stages']), 3) if job['stages'] else None,
+            'stages': {name: dict(stage) for name, stage in job['stages'].items()},
+            'error': job['error'],
+            'created_at': job['created_at'],
+            'started_at': job['started_at'],
+            'finished_at': job['finished_at'],
+        }
+
+    def get(self, job_id):
+        """État du job, ou None s'il est inconnu (ou expiré)"""
+        with self._cond:
+            self._prune()
+            job = self._jobs.get(job_id)
+            return self._snapshot(job) if job else None
+
+    def get_result(self, job_id):
+        """(état, résultat, erreur client ?) ; résultat None tant que le job n'est pas terminé"""
+        with self._cond:
+            self._prune()
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None, None, False
+            return self._snapshot(job), job['result'], job['client_error']
+
+    def wait_events(self, job_id, after=0, timeout=15.0):
+        """
+        Événements publiés après l'événement ``after`` (attente d'au plus
+        ``timeout`` secondes s'il n'y en a pas). Retourne (événements, terminé).
+        """
+        with self._cond:
+            self._prune()
+            job = self._jobs.get(job_id)
+            if job is None:
+                return [], True
+            self._cond.wait_for(
+                lambda: len(job['events']) > after or job['status'] in FINISHED_STATUSES,
+                timeout=timeout
+            )
+            events = [dict(event) for event in job['events'][after:]]
+            return events, job['status'] in FINISHED_STATUSES
+
+    def status(self):
+        with self._cond:
+            self._prune()
+            counts = {}
+            for job in self._jobs.values():
+                counts[job['status']] = counts.get(job['status'], 0) + 1
+            return {'jobs': counts, 'active_keys': len(self._active)}
+
+
+# Instance globale (singleton)
+_job_manager = None
+_job_manager_lock = threading.Lock()
+
+def get_job_manager():
+    """
+    Retourne le gestionnaire de jobs partagé (créé au premier appel)
+    """
+    global _job_manager
+    if _job_manager is None:
+        with _job_manager_lock:
+            if _job_manager is None:
+                _job_manager = JobManager(
+                    max_workers=get_config_value('SUMMARIZE_JOB_WORKERS', 2),
+                    ttl=get_config_value('SUMMARIZE_JOB_TTL', 3600)
+                )
+    return _job_manager
@@ -0,0 +1,501 @@
+# backend/services/llm_client.py
+"""
+Client LLM centralisé (Ollama)
+
+Tous les services passent par ce module au lieu d'appeler ``ollama.chat``
+directement :
+- une seule connexion HTTP réutilisée (pool httpx) vers OLLAMA_BASE_URL,
+- un ordonnanceur par modèle (voir llm_scheduler) qui limite les générations
+  simultanées (contre-pression au lieu d'un serveur Ollama saturé) et regroupe
+  les appels d'un même modèle pour éviter les rechargements,
+- un ``keep_alive`` choisi selon la file d'attente, et le préchargement des
+  modèles dont un traitement va avoir besoin,
+- une fenêtre de contexte (``num_ctx``) dimensionnée pour chaque appel à partir
+  de la taille du prompt et de ``num_predict``, arrondie à quelques paliers
+  (pour ne pas recharger le modèle) et plafonnée par modèle,
+- un délai maximal par appel, attente d'un créneau comprise : la requête HTTP
+  elle-même est interrompue à l'échéance (le créneau du modèle est libéré),
+- nouvelles tentatives avec backoff exponentiel sur les erreurs transitoires,
+- regroupement (single-flight) des requêtes identiques en cours : plusieurs
+  utilisateurs qui demandent le même résumé au même moment attendent une
+  seule génération et partagent son résultat,
+- métriques de latence et de tokens par modèle.
+"""
+
+import hashlib
+import json
+import random
+import threading
+import time
+from collections import deque
+
+from backend.utils.helpers import get_config_value
+from .llm_scheduler import ModelScheduler
+
+# Codes HTTP Ollama qui valent une nouvelle tentative (surcharge, modèle en chargement...)
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Nombre de latences conservées par modèle pour les percentiles
+LATENCY_WINDOW = 200
+
+# Estimation initiale de la taille d'un token (affinée par modèle avec prompt_eval_count)
+DEFAULT_CHARS_PER_TOKEN = 3.5
+# Tokens réservés par image envoyée à un modèle de vision
+IMAGE_TOKEN_ESTIMATE = 768
+# Marge pour le template de chat et les tokens spéciaux
+CONTEXT_MARGIN_TOKENS = 256
+
+
+class LLMError(Exception):
+    """Erreur lors d'un appel au LLM"""
+
+
+class LLMTimeoutError(LLMError):
+    """Délai dépassé (attente d'un créneau ou génération)"""
+
+
+class _InFlightCall:
+    """Requête en cours partagée par les appels identiques"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.response = None
+        self.error = None
+
+
+def _parse_model_limits(value):
+    """'llama3.2=4,DeepSeek-R1=1' -> {'llama3.2': 4, 'DeepSeek-R1': 1}"""
+    if isinstance(value, dict):
+        return {model: int(limit) for model, limit in value.items()}
+
+    limits = {}
+    for item in (value or '').split(','):
+        model, _, limit = item.partition('=')
+        if model.strip() and limit.strip():
+            limits[model.strip()] = int(limit)
+    return limits
+
+
+def _parse_int_list(value):
+    """'2048,4096' -> [2048, 4096]"""
+    if isinstance(value, (list, tuple)):
+        return sorted(int(v) for v in value)
+    return sorted(int(v) for v in (value or '').split(',') if v.strip())
+
+
+def _response_field(response, name):
+    """Lire un champ d'une réponse Ollama (dict ou modèle pydantic)"""
+    if isinstance(response, dict):
+        return response.get(name)
+    return getattr(response, name, None)
+
+
+class LLMClient:
+    """Client Ollama partagé avec limites de concurrence, délais et métriques"""
+
+    def __init__(self, base_url=None, timeout=300.0, connect_timeout=10.0, max_retries=2,
+                 retry_backoff=1.0, max_concurrency=2, model_concurrency=None, pool_size=10,
+                 single_flight=True, max_resident_models=1, max_batch=8, max_wait=30.0,
+                 keep_alive='10m', switch_keep_alive=0, adaptive_num_ctx=True,
+                 num_ctx_buckets=(2048, 4096, 8192, 16384, 32768), max_num_ctx=32768,
+                 model_max_num_ctx=None, default_num_predict=1024):
+        self.base_url = base_url
+        self.timeout = float(timeout)
+        self.connect_timeout = float(connect_timeout)
+        self.max_retries = int(max_retries)
+        self.retry_backoff = float(retry_backoff)
+        self.max_concurrency = int(max_concurrency)
+        self.model_concurrency = _parse_model_limits(model_concurrency)
+        self.pool_size = int(pool_size)
+        self.single_flight = single_flight
+        self.keep_alive = keep_alive
+        self.adaptive_num_ctx = adaptive_num_ctx
+        self.num_ctx_buckets = _parse_int_list(num_ctx_buckets)
+        self.max_num_ctx = int(max_num_ctx)
+        self.model_max_num_ctx = _parse_model_limits(model_max_num_ctx)
+        self.default_num_predict = int(default_num_predict)
+        self._chars_per_token = {}
+        self.switch_keep_alive = switch_keep_alive
+        self.scheduler = ModelScheduler(
+            max_resident=max_resident_models,
+            max_batch=max_batch,
+            max_wait=max_wait,
+            max_concurrency=self.max_concurrency,
+            model_concurrency=self.model_concurrency
+        )
+
+        self._client = None
+        self._client_lock = threading.Lock()
+        # Délai restant de l'appel en cours dans ce thread, appliqué à sa requête HTTP
+        self._request_timeout = threading.local()
+        self._stats = {}
+        self._stats_lock = threading.Lock()
+        self._in_flight = {}
+        self._in_flight_lock = threading.Lock()
+
+    def _get_client(self):
+        """Client HTTP Ollama unique (connexions réutilisées entre les threads)"""
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    import httpx
+                    import ollama
+                    # Les arguments supplémentaires sont transmis au client httpx
+                    self._client = ollama.Client(
+                        host=self.base_url,
+                        timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout),
+                        limits=httpx.Limits(
+                            max_connections=self.pool_size,
+                            max_keepalive_connections=self.pool_size
+                        ),
+                        event_hooks={'request': [self._apply_deadline]}
+                    )
+        return self._client
+
+    def _apply_deadline(self, request):
+        """
+        Hook httpx : la requête porte le délai restant de l'appel en cours
+        (``ollama.Client.chat`` n'accepte pas de délai par appel)
+        """
+        import httpx
+
+        timeout = getattr(self._request_timeout, 'value', None)
+        if timeout is not None:
+            request.extensions['timeout'] = httpx.Timeout(
+                timeout, connect=min(timeout, self.connect_timeout)
+            ).as_dict()
+
+    def chat(self, model, messages, options=None, timeout=None, coalesce=True, **kwargs):
+        """Équivalent de ``ollama.chat`` (réponse non streamée)"""
+        return self._coalesced_call('chat', model, timeout, coalesce, messages=messages, options=options, **kwargs)
+
+    def generate(self, model, prompt='', options=None, timeout=None, coalesce=True, **kwargs):
+        """Équivalent de ``ollama.generate`` (réponse non streamée)"""
+        return self._coalesced_call('generate', model, timeout, coalesce, prompt=prompt, options=options, **kwargs)
+
+    def list_models(self):
+        """Modèles disponibles sur le serveur Ollama"""
+        return self._get_client().list()
+
+    def prewarm(self, models):
+        """
+        Charger en arrière-plan les modèles dont un traitement va avoir besoin.
+        Le chargement passe par l'ordonnanceur : il attend son tour sans évincer
+        un modèle en cours d'utilisation. Les demandes identiques sont regroupées.
+        """
+        threads = []
+        for model in models:
+            if self.scheduler.is_resident(model):
+                continue
+            thread = threading.Thread(
+                target=self._prewarm_model, args=(model,), name=f'llm-prewarm-{model}', daemon=True
+            )
+            thread.start()
+            threads.append(thread)
+        return threads
+
+    def _prewarm_model(self, model):
+        try:
+            self.generate(model, prompt='', keep_alive=self.keep_alive)
+        except Exception as e:
+            print(f"⚠️ Préchargement du modèle {model} échoué: {e}")
+
+    @staticmethod
+    def _request_key(method, model, kwargs):
+        """Clé single-flight : (modèle, empreinte du prompt et des options)"""
+        payload = json.dumps(kwargs, sort_keys=True, default=str)
+        return method, model, hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _coalesced_call(self, method, model, timeout, coalesce, **kwargs):
+        """Un seul appel amont pour des requêtes identiques simultanées"""
+        if not (self.single_flight and coalesce):
+            return self._call(method, model, timeout, **kwargs)
+
+        key = self._request_key(method, model, kwargs)
+        with self._in_flight_lock:
+            call = self._in_flight.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = self._in_flight[key] = _InFlightCall()
+
+        if not is_leader:
+            with self._stats_lock:
+                self._model_stats(model)['coalesced'] += 1
+            if not call.done.wait(timeout=float(timeout or self.timeout)):
+                raise LLMTimeoutError(f"Délai dépassé en attendant une requête identique pour {model}")
+            if call.error is not None:
+                raise call.error
+            return call.response
+
+        try:
+            call.response = self._call(method, model, timeout, **kwargs)
+            return call.response
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._in_flight_lock:
+                self._in_flight.pop(key, None)
+            call.done.set()
+
+    @staticmethod
+    def _prompt_size(kwargs):
+        """Nombre de caractères et d'images envoyés au modèle"""
+        chars = len(kwargs.get('prompt') or '') + len(kwargs.get('system') or '')
+        images = len(kwargs.get('images') or [])
+        for message in kwargs.get('messages') or []:
+            chars += len(message.get('content') or '')
+            images += len(message.get('images') or [])
+        return chars, images
+
+    def _size_context(self, model, kwargs):
+        """
+        Fixer ``num_ctx`` = tokens estimés du prompt + ``num_predict``, arrondi au
+        palier supérieur et plafonné pour le modèle. Retourne (num_ctx, nb de caractères).
+        """
+        options = dict(kwargs.get('options') or {})
+        chars, images = self._prompt_size(kwargs)
+        if not self.adaptive_num_ctx or 'num_ctx' in options:
+            return options.get('num_ctx'), chars
+
+        chars_per_token = self._chars_per_token.get(model, DEFAULT_CHARS_PER_TOKEN)
+        num_predict = options.get('num_predict')
+        if num_predict is None or num_predict < 0:
+            num_predict = self.default_num_predict
+        needed = int(chars / chars_per_token) + images * IMAGE_TOKEN_ESTIMATE + num_predict + CONTEXT_MARGIN_TOKENS
+
+        cap = self.model_max_num_ctx.get(model, self.max_num_ctx)
+        num_ctx = next((bucket for bucket in self.num_ctx_buckets if bucket >= needed), cap)
+        num_ctx = min(num_ctx, cap)
+        if needed > cap:
+            print(f"⚠️ LLM {model}: prompt estimé à {needed} tokens, fenêtre plafonnée à {cap} (entrée tronquée)")
+
+        options['num_ctx'] = num_ctx
+        kwargs['options'] = options
+        return num_ctx, chars
+
+    def _calibrate(self, model, chars, num_ctx, response):
+        """Affiner l'estimation caractères/token du modèle avec le nombre de tokens mesuré"""
+        prompt_tokens = _response_field(response, 'prompt_eval_count') or 0
+        # Prompt trop court ou tronqué par la fenêtre : mesure inexploitable
+        if prompt_tokens <= 0 or chars < 200 or (num_ctx and prompt_tokens >= num_ctx - CONTEXT_MARGIN_TOKENS):
+            return
+        measured = min(6.0, max(1.5, chars / prompt_tokens))
+        with self._stats_lock:
+            previous = self._chars_per_token.get(model, DEFAULT_CHARS_PER_TOKEN)
+            self._chars_per_token[model] = 0.8 * previous + 0.2 * measured
+
+    def _call(self, method, model, timeout, **kwargs):
+        timeout = float(timeout or self.timeout)
+        deadline = time.monotonic() + timeout
+        num_ctx, prompt_chars = self._size_context(model, kwargs)
+
+        # Contre-pression : attendre le tour de ce modèle, dans la limite du délai
+        queued_at = time.monotonic()
+        if not self.scheduler.acquire(model, timeout):
+            self._record(model, queue_wait=time.monotonic() - queued_at, error='queue_timeout')
+            raise LLMTimeoutError(f"Aucun créneau libre pour le modèle {model} après {timeout:.0f}s")
+        queue_wait = time.monotonic() - queued_at
+
+        # Garder le modèle chargé tant que du travail l'attend ; le libérer tout de
+        # suite si un autre modèle attend d'être chargé
+        if kwargs.get('keep_alive') is None:
+            kwargs['keep_alive'] = (self.switch_keep_alive if self.scheduler.unload_after(model)
+                                    else self.keep_alive)
+
+        self._track_in_flight(model, 1)
+        try:
+            client = self._get_client()
+            attempt = 0
+            while True:
+                start = time.monotonic()
+                remaining = deadline - start
+                if remaining <= 0:
+                    self._record(model, queue_wait=queue_wait, retries=attempt, error='timeout')
+                    raise LLMTimeoutError(f"Délai de {timeout:.0f}s dépassé pour le modèle {model}")
+                # La requête HTTP ne dépasse pas l'échéance de l'appel
+                self._request_timeout.value = remaining
+                try:
+                    response = getattr(client, method)(model=model, **kwargs)
+                except Exception as e:
+                    latency = time.monotonic() - start
+                    delay = self.retry_backoff * (2 ** attempt) * random.uniform(0.5, 1.0)
+
+                    if (not self._is_retryable(e) or attempt >= self.max_retries
+                            or time.monotonic() + delay >= deadline):
+                        timed_out = self._is_timeout(e)
+                        self._record(model, queue_wait=queue_wait, latency=latency, retries=attempt,
+                                     error='timeout' if timed_out else type(e).__name__)
+                        if timed_out:
+                            raise LLMTimeoutError(f"Délai dépassé pour le modèle {model}: {e}") from e
+                        raise
+
+                    attempt += 1
+                    print(f"⚠️ LLM {model}: {e} - nouvelle tentative {attempt}/{self.max_retries} dans {delay:.1f}s")
+                    time.sleep(delay)
+                    continue
+
+                self._record(model, queue_wait=queue_wait, latency=time.monotonic() - start,
+                             retries=attempt, response=response, num_ctx=num_ctx)
+                self._calibrate(model, prompt_chars, num_ctx, response)
+                return response
+        finally:
+            self._request_timeout.value = None
+            self._track_in_flight(model, -1)
+            self.scheduler.release(model)
+
+    @staticmethod
+    def _is_timeout(error):
+        import httpx
+        return isinstance(error, (httpx.TimeoutException, TimeoutError))
+
+    @staticmethod
+    def _is_retryable(error):
+        """Erreurs transitoires : connexion refusée/coupée, surcharge serveur"""
+        import httpx
+        import ollama
+
+        if isinstance(error, ollama.ResponseError):
+            return error.status_code in RETRYABLE_STATUS_CODES
+        if isinstance(error, httpx.ConnectTimeout):
+            return True
+        if isinstance(error, httpx.TimeoutException):
+            # Une génération trop longue ne sera pas plus rapide au deuxième essai
+            return False
+        return isinstance(error, (ConnectionError, httpx.TransportError))
+
+    def _model_stats(self, model):
+        if model not in self._stats:
+            self._stats[model] = {
+                'calls': 0,
+                'errors': 0,
+                'timeouts': 0,
+                'retries': 0,
+                'coalesced': 0,
+                'in_flight': 0,
+                'prompt_tokens': 0,
+                'completion_tokens': 0,
+                'generation_seconds': 0.0,
+                'queue_wait_total': 0.0,
+                'latencies': deque(maxlen=LATENCY_WINDOW),
+                'last_num_ctx': None,
+                'last_error': None
+            }
+        return self._stats[model]
+
+    def _track_in_flight(self, model, delta):
+        with self._stats_lock:
+            self._model_stats(model)['in_flight'] += delta
+
+    def _record(self, model, queue_wait=0.0, latency=None, retries=0, response=None, error=None, num_ctx=None):
+        with self._stats_lock:
+            stats = self._model_stats(model)
+            stats['calls'] += 1
+            stats['retries'] += retries
+            stats['queue_wait_total'] += queue_wait
+
+            if error:
+                stats['errors'] += 1
+                stats['last_error'] = error
+                if error in ('timeout', 'queue_timeout'):
+                    stats['timeouts'] += 1
+                return
+
+            stats['latencies'].append(latency)
+            stats['last_num_ctx'] = num_ctx
+            stats['prompt_tokens'] += _response_field(response, 'prompt_eval_count') or 0
+            stats['completion_tokens'] += _response_field(response, 'eval_count') or 0
+            stats['generation_seconds'] += (_response_field(response, 'eval_duration') or 0) / 1e9
+
+    def get_metrics(self):
+        """Métriques par modèle : appels, erreurs, latences (fenêtre glissante), tokens"""
+        metrics = {}
+        with self._stats_lock:
+            for model, stats in self._stats.items():
+                latencies = sorted(stats['latencies'])
+
+                def percentile(p):
+                    if not latencies:
+                        return None
+                    return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))], 3)
+
+                metrics[model] = {
+                    'calls': stats['calls'],
+                    'errors': stats['errors'],
+                    'timeouts': stats['timeouts'],
+                    'retries': stats['retries'],
+                    'coalesced': stats['coalesced'],
+                    'in_flight': stats['in_flight'],
+                    'concurrency_limit': self.scheduler.concurrency_limit(model),
+                    'latency_p50': percentile(0.5),
+                    'latency_p95': percentile(0.95),
+                    'avg_queue_wait': round(stats['queue_wait_total'] / stats['calls'], 3) if stats['calls'] else 0.0,
+                    'prompt_tokens': stats['prompt_tokens'],
+                    'completion_tokens': stats['completion_tokens'],
+                    'last_num_ctx': stats['last_num_ctx'],
+                    'chars_per_token': round(self._chars_per_token.get(model, DEFAULT_CHARS_PER_TOKEN), 2),
+                    'tokens_per_second': round(stats['completion_tokens'] / stats['generation_seconds'], 1)
+                                         if stats['generation_seconds'] else None,
+                    'last_error': stats['last_error']
+                }
+        return metrics
+
+
+# Instance globale (singleton), configurée à partir de la config Flask ou de Config
+_llm_client = None
+_llm_client_lock = threading.Lock()
+
+def get_llm_client():
+    """
+    Retourne le client LLM partagé (créé au premier appel)
+    """
+    global _llm_client
+    if _llm_client is None:
+        with _llm_client_lock:
+            if _llm_client is None:
+                _llm_client = LLMClient(
+                    base_url=get_config_value('OLLAMA_BASE_URL'),
+                    timeout=get_config_value('OLLAMA_TIMEOUT', 300),
+                    connect_timeout=get_config_value('OLLAMA_CONNECT_TIMEOUT', 10),
+                    max_retries=get_config_value('OLLAMA_MAX_RETRIES', 2),
+                    retry_backoff=get_config_value('OLLAMA_RETRY_BACKOFF', 1.0),
+                    max_concurrency=get_config_value('OLLAMA_MAX_CONCURRENCY', 2),
+                    model_concurrency=get_config_value('OLLAMA_MODEL_CONCURRENCY'),
+                    pool_size=get_config_value('OLLAMA_POOL_SIZE', 10),
+                    single_flight=get_config_value('OLLAMA_SINGLE_FLIGHT', True),
+                    max_resident_models=get_config_value('OLLAMA_RESIDENT_MODELS', 1),
+                    max_batch=get_config_value('OLLAMA_SCHEDULER_MAX_BATCH', 8),
+                    max_wait=get_config_value('OLLAMA_SCHEDULER_MAX_WAIT', 30),
+                    keep_alive=get_config_value('OLLAMA_KEEP_ALIVE', '10m'),
+                    switch_keep_alive=get_config_value('OLLAMA_SWITCH_KEEP_ALIVE', 0),
+                    adaptive_num_ctx=get_config_value('OLLAMA_ADAPTIVE_NUM_CTX', True),
+                    num_ctx_buckets=get_config_value('OLLAMA_NUM_CTX_BUCKETS', '2048,4096,8192,16384,32768'),
+                    max_num_ctx=get_config_value('OLLAMA_MAX_NUM_CTX', 32768),
+                    model_max_num_ctx=get_config_value('OLLAMA_MODEL_MAX_NUM_CTX'),
+                    default_num_predict=get_config_value('OLLAMA_DEFAULT_NUM_PREDICT', 1024)
+                )
+    return _llm_client
+
+def chat(model, messages, options=None, timeout=None, coalesce=True, **kwargs):
+    """Raccourci : ``get_llm_client().chat(...)``"""
+    return get_llm_client().chat(model, messages, options=options, timeout=timeout, coalesce=coalesce, **kwargs)
+
+def generate(model, prompt='', options=None, timeout=None, coalesce=True, **kwargs):
+    """Raccourci : ``get_llm_client().generate(...)``"""
+    return get_llm_client().generate(model, prompt=prompt, options=options, timeout=timeout, coalesce=coalesce, **kwargs)
+
+def prewarm(models):
+    """Raccourci : ``get_llm_client().prewarm(...)``"""
+    return get_llm_client().prewarm(models)
+
+def get_scheduler_status():
+    """État de l'ordonnanceur (modèles résidents, files d'attente, changements de modèle)"""
+    if _llm_client is None:
+        return {}
+    return _llm_client.scheduler.status()
+
+def get_llm_metrics():
+    """Métriques du client LLM partagé (vide s'il n'a pas encore servi)"""
+    if _llm_client is None:
+        return {}
+    return _llm_client.get_metrics()
@@ -0,0 +1,148 @@
+# backend/services/llm_scheduler.py
+"""
+Ordonnanceur des appels LLM selon les modèles chargés dans Ollama
+
+Sur une seule machine Ollama, alterner llama3.2 / granite3.2-vision /
+DeepSeek-R1 / nous-hermes entre utilisateurs concurrents recharge sans cesse
+des modèles de plusieurs Go. L'ordonnanceur :
+- tient une file d'attente par modèle et une vue des modèles résidents
+  (au plus ``max_resident`` à la fois),
+- laisse passer en priorité les appels d'un modèle déjà chargé, par séries,
+- ne charge un autre modèle qu'une fois le modèle à évincer inactif, ou quand
+  la série en cours a atteint ``max_batch`` appels / ``max_wait`` secondes
+  d'attente pour les autres (équité),
+- respecte la limite de générations simultanées par modèle.
+"""
+
+import threading
+import time
+
+
+class ModelScheduler:
+    """Admission des appels LLM par modèle, en limitant les changements de modèle"""
+
+    def __init__(self, max_resident=1, max_batch=8, max_wait=30.0, max_concurrency=2, model_concurrency=None):
+        self.max_resident = max(1, int(max_resident))
+        self.max_batch = max(1, int(max_batch))
+        self.max_wait = float(max_wait)
+        self.max_concurrency = int(max_concurrency)
+        self.model_concurrency = dict(model_concurrency or {})
+
+        self._cond = threading.Condition()
+        self._resident = {}  # modèle -> dernier usage (time.monotonic)
+        self._running = {}
+        self._served = {}    # appels admis depuis le chargement du modèle
+        self._waiting = {}   # modèle -> dates d'entrée en file
+        self._draining = set()  # modèles déchargés à la fin de leurs générations en cours
+        self.model_switches = 0
+
+    def concurrency_limit(self, model):
+        return max(1, self.model_concurrency.get(model, self.max_concurrency))
+
+    def acquire(self, model, timeout):
+        """
+        Attendre le tour de ``model``. Retourne False si le délai est dépassé.
+        """
+        deadline = time.monotonic() + timeout
+        ticket = time.monotonic()
+        with self._cond:
+            self._waiting.setdefault(model, []).append(ticket)
+            try:
+                while not self._can_run(model):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return False
+                    # Réveil périodique : la règle d'équité dépend du temps écoulé
+                    self._cond.wait(timeout=min(remaining, 1.0))
+                self._admit(model)
+                return True
+            finally:
+                self._waiting[model].remove(ticket)
+                self._cond.notify_all()
+
+    def release(self, model):
+        with self._cond:
+            self._running[model] -= 1
+            self._resident[model] = time.monotonic()
+            self._cond.notify_all()
+
+    def is_resident(self, model):
+        with self._cond:
+            return model in self._resident
+
+    def unload_after(self, model):
+        """
+        True si plus aucun appel n'attend ``model`` alors qu'un autre modèle attend
+        d'être chargé : autant le décharger dès la fin de la génération. Le modèle
+        n'admet alors plus de nouvel appel avant d'avoir cédé sa place.
+        """
+        with self._cond:
+            if (not self._waiting.get(model)
+                    and len(self._resident) >= self.max_resident
+                    and self._oldest_nonresident_waiter() is not None):
+                self._draining.add(model)
+                return True
+            return False
+
+    def _can_run(self, model):
+        if self._running.get(model, 0) >= self.concurrency_limit(model):
+            return False
+        if model in self._resident:
+            if model in self._draining and self._oldest_nonresident_waiter() is None:
+                # Le modèle attendu a abandonné (délai dépassé) : reprendre la série
+                self._draining.discard(model)
+            return model not in self._draining and not self._should_yield(model)
+        # Un seul modèle non chargé à la fois : celui qui attend depuis le plus longtemps
+        if self._oldest_nonresident_waiter() != model:
+            return False
+        return len(self._resident) < self.max_resident or self._eviction_candidate() is not None
+
+    def _admit(self, model):
+        if model not in self._resident:
+            if len(self._resident) >= self.max_resident:
+                evicted = self._eviction_candidate()
+                del self._resident[evicted]
+                self._draining.discard(evicted)
+            self._served[model] = 0
+            self.model_switches += 1
+        self._resident[model] = time.monotonic()
+        self._running[model] = self._running.get(model, 0) + 1
+        self._served[model] += 1
+
+    def _oldest_nonresident_waiter(self):
+        oldest_model, oldest_ticket = None, None
+        for model, tickets in self._waiting.items():
+            if model in self._resident or not tickets:
+                continue
+            if oldest_ticket is None or tickets[0] < oldest_ticket:
+                oldest_model, oldest_ticket = model, tickets[0]
+        return oldest_model
+
+    def _should_yield(self, model):
+        """La série de ``model`` doit-elle s'arrêter pour laisser charger un autre modèle ?"""
+        if len(self._resident) < self.max_resident:
+            return False
+        other = self._oldest_nonresident_waiter()
+        if other is None:
+            return False
+        waited = time.monotonic() - self._waiting[other][0]
+        return self._served.get(model, 0) >= self.max_batch or waited >= self.max_wait
+
+    def _eviction_candidate(self):
+        """Modèle résident inactif (le moins récemment utilisé) pouvant être évincé"""
+        candidates = [
+            (last_used, model) for model, last_used in self._resident.items()
+            if self._running.get(model, 0) == 0
+            and (not self._waiting.get(model) or model in self._draining or self._should_yield(model))
+        ]
+        return min(candidates)[1] if candidates else None
+
+    def status(self):
+        with self._cond:
+            return {
+                'resident_models': list(self._resident),
+                'max_resident': self.max_resident,
+                'running': {model: count for model, count in self._running.items() if count},
+                'waiting': {model: len(tickets) for model, tickets in self._waiting.items() if tickets},
+                'model_switches': self.model_switches
+            }
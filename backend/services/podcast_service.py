@@ -10,13 +10,14 @@ Principales fonctions à utiliser :
 Les autres fonctions sont utilitaires (parsing, avatars, etc.).
 """
 
+import io
 import os
 import tempfile
 from langdetect import detect
 from .summarization_service import clean_think_blocks
-import ollama
+from backend.services import llm_client
 import re
-import edge_tts
+from backend.services.tts_service import get_tts_backend, synthesize_cached
 from pydub import AudioSegment
 from pydub.effects import normalize
 from PIL import Image, ImageDraw, ImageFilter, ImageFont, ImageEnhance
@@ -124,22 +125,28 @@ def select_best_voice_for_emotion(speaker, emotions, lang_code, default_voice_ma
 
 
 async def generate_emotional_audio_segment(text, emotions, voice, lang_code):
-    """Génère un segment audio SANS balises SSML problématiques"""
+    """
+    Génère l'audio d'un segment SANS balises SSML problématiques (bytes, via le cache audio).
+    Retourne None si la synthèse échoue.
+    """
+    # Utiliser directement le texte nettoyé
+    clean_text = re.sub(r'\([^)]*\)', '', text).strip()
     try:
-        # Utiliser directement le texte nettoyé
-        clean_text = re.sub(r'\([^)]*\)', '', text).strip()
-        
         print(f"🎤 Génération: {voice} -> {clean_text[:50]}...")
         
-        # Edge TTS sans balises SSML
-        communicate = edge_tts.Communicate(clean_text, voice)
-        return communicate
+        # Synthèse sans balises SSML
+        return await synthesize_cached(clean_text, voice)
         
     except Exception as e:
         print(f"❌ Erreur génération: {e}")
-        # Fallback simple
-        communicate = edge_tts.Communicate(text, voice)
-        return communicate
+        if clean_text == text:
+            return None
+        # Fallback simple : texte brut, une seule nouvelle tentative
+        try:
+            return await synthesize_cached(text, voice)
+        except Exception as retry_error:
+            print(f"❌ Échec de la nouvelle tentative: {retry_error}")
+            return None
 
 # === FONCTIONS PRINCIPALES ===
 
@@ -221,8 +228,7 @@ Generate the complete podcast script now, following the exact format above:
 """
     
     try:
-        import ollama
-        response = ollama.chat(
+        response = llm_client.chat(
             model="DeepSeek-R1",
             messages=[{"role": "user", "content": prompt}],
             options={
@@ -645,17 +651,14 @@ async def generate_complete_emotional_podcast(script_text, lang_code="auto", pro
                 print(f"🎤 Segment {i+1}: '{part['speaker']}' → {voice_type} ({voice})")
                 
                 # Générer l'audio émotionnel
-                communicate = await generate_emotional_audio_segment(
+                segment_audio = await generate_emotional_audio_segment(
                     part['text'], emotions, voice, lang_code
                 )
                 
-                segment_path = os.path.join(temp_dir, f"segment_{i:03d}.wav")
-                await communicate.save(segment_path)
-                
-                if not os.path.exists(segment_path):
+                if not segment_audio:
                     raise Exception(f"Échec de la création du segment {i}")
                 
-                segment = AudioSegment.from_file(segment_path)
+                segment = AudioSegment.from_file(io.BytesIO(segment_audio), format=get_tts_backend().extension)
                 segment = normalize(segment)
                 
                 # Pause réduite entre segments
@@ -1209,15 +1212,13 @@ async def generate_enhanced_podcast_audio_UPDATED(script_text, lang_code="auto",
                 # Utiliser le texte nettoyé des émotions
                 enhanced_text = enhance_text_for_speech(part['text'], i == 0, i == len(dialogue_parts) - 1)
                 
-                # Générer l'audio avec SSML pour les émotions
-                communicate = edge_tts.Communicate(enhanced_text, voice)
-                segment_path = os.path.join(temp_dir, f"segment_{i:03d}.wav")
-                await communicate.save(segment_path)
+                # Générer l'audio (via le cache audio : intro / conclusion souvent identiques)
+                segment_audio = await synthesize_cached(enhanced_text, voice)
                 
-                if not os.path.exists(segment_path):
+                if not segment_audio:
                     raise Exception(f"Échec de la création du segment {i}")
                 
-                segment = AudioSegment.from_file(segment_path)
+                segment = AudioSegment.from_file(io.BytesIO(segment_audio), format=get_tts_backend().extension)
                 segment = normalize(segment)
                 
                 # Réduire la pause entre les segments (800ms au lieu de 1500ms)
@@ -9,9 +9,14 @@ from matplotlib import pyplot as plt
 from matplotlib.patches import FancyBboxPatch
 from io import BytesIO
 from .summarization_service import clean_think_blocks
-import ollama
+from backend.services import llm_client
+from backend.services.result_cache import cached_llm_result
 
-def extract_key_points(summary_text, max_slides=8):
+# Versions des templates de prompt (invalident le cache de résultats quand elles changent)
+KEY_POINTS_PROMPT_VERSION = 1
+CHARTS_PROMPT_VERSION = 1
+
+def extract_key_points(summary_text, max_slides=8, use_cache=True):
     prompt = f"""
 You are a presentation designer expert.
 
@@ -38,20 +43,25 @@ Scientific summary:
 
 Generate the JSON now:
     """
-    try:
-        response = ollama.chat(
+    options = {"temperature": 0.3}
+    def generate():
+        response = llm_client.chat(
             model="DeepSeek-R1",
             messages=[{"role": "user", "content": prompt}],
-            options={"temperature": 0.3}
+            options=options
         )
         raw_response = response["message"]["content"]
         cleaned_response = clean_think_blocks(raw_response)
         json_match = re.search(r'\{.*\}', cleaned_response, re.DOTALL)
         if json_match:
             slides_data = json.loads(json_match.group())
-            return slides_data.get("slides", [])
-        else:
-            return []
+            # Aucune slide : extraction ratée, non mise en cache
+            return slides_data.get("slides") or None
+        # Réponse inexploitable : ne pas la mettre en cache
+        return None
+    try:
+        return cached_llm_result("extract_key_points", "DeepSeek-R1", KEY_POINTS_PROMPT_VERSION,
+                                 [summary_text, max_slides], options, generate, use_cache=use_cache) or []
     except Exception as e:
         print(f"Erreur extraction points clés: {e}")
         return []
@@ -119,7 +129,7 @@ class EnhancedPPTXGenerator:
             "medical": ["#dc2626", "#ea580c", "#d97706", "#65a30d"]
         }
     # ... (reprendre ici les méthodes analyze_content_for_charts, create_smart_chart, create_infographic_slide, download_contextual_images, create_enhanced_pptx_with_smart_content du code fourni) ...
-    def analyze_content_for_charts(self, summary_text):
+    def analyze_content_for_charts(self, summary_text, use_cache=True):
         """Analyse le contenu pour identifier les données visualisables"""
         prompt = f"""
         Analyze this scientific summary and identify data that could be visualized as charts.
@@ -146,11 +156,12 @@ class EnhancedPPTXGenerator:
         }}
         """
         
-        try:
-            response = ollama.chat(
+        options = {"temperature": 0.3}
+        def generate():
+            response = llm_client.chat(
                 model="DeepSeek-R1",
                 messages=[{"role": "user", "content": prompt}],
-                options={"temperature": 0.3}
+                options=options
             )
             
             result = clean_think_blocks(response["message"]["content"])
@@ -158,6 +169,13 @@ class EnhancedPPTXGenerator:
             
             if json_match:
                 return json.loads(json_match.group())
+            return None
+        
+        try:
+            charts = cached_llm_result("analyze_content_for_charts", "DeepSeek-R1", CHARTS_PROMPT_VERSION,
+                                       summary_text, options, generate, use_cache=use_cache)
+            if charts:
+                return charts
             
         except Exception as e:
             print(f"Erreur analyse contenu: {e}")
@@ -296,7 +314,7 @@ class EnhancedPPTXGenerator:
             Focus on scientific, technical, or visual concepts.
             """
             
-            response = ollama.chat(
+            response = llm_client.chat(
                 model="DeepSeek-R1",
                 messages=[{"role": "user", "content": keywords_prompt}]
             )
@@ -329,7 +347,7 @@ class EnhancedPPTXGenerator:
     
     def create_enhanced_pptx_with_smart_content(self, slides_data, summary_text, 
                                               title="Présentation Avancée", 
-                                              theme_config=None, include_charts=True):
+                                              theme_config=None, include_charts=True, use_cache=True):
         """Crée une présentation PPTX avec contenu intelligent"""
         
         prs = Presentation()
@@ -338,7 +356,7 @@ class EnhancedPPTXGenerator:
             theme_config = get_advanced_themes()["🧬 Scientifique Moderne"]
         
         # Analyser le contenu pour identifier les graphiques possibles
-        chart_analysis = self.analyze_content_for_charts(summary_text) if include_charts else {"charts": []}
+        chart_analysis = self.analyze_content_for_charts(summary_text, use_cache=use_cache) if include_charts else {"charts": []}
         
         # Couleurs du thème
         primary_color = RGBColor(*theme_config["primary"])
@@ -444,10 +462,11 @@ class EnhancedPPTXGenerator:
         
         return prs
     # Pour simplifier, on va intégrer la méthode principale d'entrée :
-def generate_advanced_presentation_with_visuals(summary_text, title="Présentation Scientifique", max_slides=8, theme_name="🧬 Scientifique Moderne", include_charts=True, include_images=True):
+def generate_advanced_presentation_with_visuals(summary_text, title="Présentation Scientifique", max_slides=8, theme_name="🧬 Scientifique Moderne", include_charts=True, include_images=True, use_cache=True, slides_data=None):
     try:
         generator = EnhancedPPTXGenerator()
-        slides_data = extract_key_points(summary_text, max_slides=max_slides)
+        if slides_data is None:
+            slides_data = extract_key_points(summary_text, max_slides=max_slides, use_cache=use_cache)
         if not slides_data:
             slides_data = [
                 {
@@ -463,7 +482,7 @@ def generate_advanced_presentation_with_visuals(summary_text, title="Présentati
         themes = get_advanced_themes()
         theme_config = themes.get(theme_name, themes["🧬 Scientifique Moderne"])
         prs = generator.create_enhanced_pptx_with_smart_content(
-            slides_data, summary_text, title, theme_config, include_charts
+            slides_data, summary_text, title, theme_config, include_charts, use_cache=use_cache
         )
         buffer = io.BytesIO()
         prs.save(buffer)
@@ -5,26 +5,25 @@ import re
 from pathlib import Path
 from typing import List, Dict, Any, Optional
 
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.document_loaders import PyPDFLoader
-from langchain_community.vectorstores import Chroma
-from langchain_ollama import OllamaEmbeddings
-from langchain.docstore.document import Document
-import ollama
+from backend.services import llm_client
 import requests
 import feedparser
 import datetime
-from sentence_transformers import util
-import torch
 
 from flask import current_app
 from backend.models.article import Article
 from backend.models.user import User
 
+# Les dépendances ML (langchain, chromadb, numpy...) sont importées à la demande
+# dans les méthodes qui les utilisent : importer ce module reste quasi instantané,
+# ce qui garde create_app() rapide.
+
 class EnhancedMUragSystem:
     """Système RAG adapté pour Flask utilisant tes données existantes"""
     
     def __init__(self, user_id: Optional[int] = None):
+        from langchain_ollama import OllamaEmbeddings
+        
         self.user_id = user_id
         
         # Chemins vers tes données existantes (définis dans config.py)
@@ -32,6 +31,8 @@ class EnhancedMUragSystem:
         self.chroma_path = current_app.config['RAG_CHROMA_PATH']
         self.lexical_index_path = current_app.config['RAG_LEXICAL_INDEX']
         self.conversation_memory_path = current_app.config['RAG_CONVERSATION_MEMORY']
+        self.vector_backend = current_app.config.get('RAG_VECTOR_BACKEND', 'chroma')
+        self.numpy_vector_path = current_app.config.get('RAG_NUMPY_VECTOR_PATH')
         
         # Créer les dossiers si nécessaire
         os.makedirs(self.pdf_path, exist_ok=True)
@@ -82,6 +83,11 @@ class EnhancedMUragSystem:
     
     def _load_vectorstore(self):
         """Charger le vectorstore existant ou en créer un nouveau"""
+        if self.vector_backend == 'numpy':
+            return self._load_numpy_vectorstore()
+        
+        from langchain_community.vectorstores import Chroma
+        
         try:
             if os.path.exists(self.chroma_path) and os.listdir(self.chroma_path):
                 print("📦 Chargement du vectorstore existant...")
@@ -109,21 +115,30 @@ class EnhancedMUragSystem:
             )
             return vectorstore
     
+    def _load_numpy_vectorstore(self):
+        """Charger le vectorstore plat NumPy (matrice mappée en mémoire)"""
+        from backend.services.vector_store import NumpyFlatVectorStore
+        
+        vectorstore = NumpyFlatVectorStore(
+            persist_directory=self.numpy_vector_path,
+            embedding_function=self.embeddings,
+            dtype=current_app.config.get('RAG_VECTOR_DTYPE', 'float32'),
+            rescore=current_app.config.get('RAG_VECTOR_RESCORE', False),
+            rescore_factor=current_app.config.get('RAG_VECTOR_RESCORE_FACTOR', 4)
+        )
+        print(f"✅ Vectorstore NumPy ({vectorstore.dtype}) chargé depuis {self.numpy_vector_path} ({len(vectorstore)} chunks)")
+        return vectorstore
+    
     def _create_verification_agent(self):
-        """Créer l'agent de vérification"""
-        try:
-            verification_model = current_app.config.get('DEFAULT_VERIFICATION_MODEL', 'DeepSeek-R1')
-            
-            # Test du modèle
-            test_response = ollama.chat(
-                model=verification_model,
-                messages=[{'role': 'user', 'content': 'Test'}]
-            )
-            print(f"✅ Agent de vérification initialisé: {verification_model}")
-            return verification_model
-        except Exception as e:
-            print(f"⚠️ Erreur agent de vérification: {e}")
-            return "DeepSeek-R1"  # Fallback
+        """Choisir le modèle de l'agent de vérification
+        
+        Aucun appel de test n'est fait ici : une génération complète juste pour
+        valider le nom du modèle bloquait l'initialisation. Le chargement du modèle
+        est fait en arrière-plan par start_background_warmup().
+        """
+        verification_model = current_app.config.get('DEFAULT_VERIFICATION_MODEL', 'DeepSeek-R1')
+        print(f"✅ Agent de vérification configuré: {verification_model}")
+        return verification_model
     
     def _load_conversation_memory(self):
         """Charger la mémoire de conversation pour l'utilisateur"""
@@ -154,6 +169,10 @@ class EnhancedMUragSystem:
     
     def add_document_from_article(self, article: Article) -> bool:
         """Ajouter un document au système RAG depuis un objet Article"""
+        from langchain.text_splitter import RecursiveCharacterTextSplitter
+        from langchain_community.document_loaders import PyPDFLoader
+        from langchain.docstore.document import Document
+        
         try:
             if not os.path.exists(article.file_path):
                 print(f"❌ Fichier introuvable: {article.file_path}")
@@ -233,6 +252,11 @@ class EnhancedMUragSystem:
     
     def _extract_images_from_pdf(self, pdf_path):
         """Extrait les images d'un fichier PDF"""
+        import base64
+        from io import BytesIO
+        import fitz  # PyMuPDF
+        from PIL import Image
+        
         images = []
         try:
             doc = fitz.open(pdf_path)
@@ -253,6 +277,7 @@ class EnhancedMUragSystem:
                         
                         # Extraire le texte de l'image si possible (OCR)
                         try:
+                            import pytesseract
                             image_text = pytesseract.image_to_string(image)
                         except:
                             image_text = ""
@@ -283,13 +308,29 @@ class EnhancedMUragSystem:
             return []
 
     def _extract_figures_tables_from_pdf(self, pdf_path):
-        """Extrait les figures et tableaux d'un fichier PDF"""
+        """
+        Extrait les figures et tableaux d'un fichier PDF.
+
+        Le texte d'une zone est lu dans la couche texte du PDF et les tableaux
+        via le détecteur de tableaux de PyMuPDF ; l'OCR (Tesseract) n'est lancé
+        que si la couche texte est vide (PDF scanné).
+        """
+        import base64
+        import fitz  # PyMuPDF
+        
         elements = []
         try:
             doc = fitz.open(pdf_path)
             for page_num in range(len(doc)):
                 page = doc.load_page(page_num)
                 
+                # Tableaux détectés par PyMuPDF (contenu structuré, sans OCR)
+                try:
+                    tables = list(page.find_tables().tables)
+                except Exception as e:
+                    print(f"⚠️ Détection de tableaux impossible sur la page {page_num+1}: {str(e)}")
+                    tables = []
+                
                 # Analyse du texte pour détecter des marqueurs de figure/tableau
                 text_blocks = page.get_text("blocks")
                 for block in text_blocks:
@@ -297,51 +338,95 @@ class EnhancedMUragSystem:
                     
                     # Détecter les légendes de figure ou de tableau
                     if re.search(r'(figure|fig\.|tableau|table)\s+\d+', block_text.lower()):
+                        element_type = "figure" if "fig" in block_text.lower() else "table"
                         # Extraire la zone autour du bloc qui pourrait contenir une figure/tableau
                         x0, y0, x1, y1 = block[0], block[1], block[2], block[3]
                         # Élargir légèrement la zone
                         margin = 20
                         figure_rect = fitz.Rect(x0-margin, y0-margin, x1+margin, y1+margin)
                         
-                        # Capturer cette zone comme une image
-                        pix = page.get_pixmap(clip=figure_rect)
-                        img_data = pix.tobytes()
-                        
-                        # Convertir en image PIL
                         try:
-                            image = Image.frombytes("RGB", [pix.width, pix.height], img_data)
+                            table = self._table_for_caption(tables, figure_rect) if element_type == "table" else None
+                            if table is not None:
+                                # Le tableau légendé est retiré : il n'est pas ajouté une seconde fois
+                                tables.remove(table)
+                                figure_rect = fitz.Rect(table.bbox) | figure_rect
+                                element_text = self._table_text(table)
+                            else:
+                                element_text = page.get_text(clip=figure_rect).strip()
                             
-                            # OCR sur la figure/tableau potentiel
-                            try:
-                                element_text = pytesseract.image_to_string(image)
-                            except:
-                                element_text = block_text  # Utiliser la légende si l'OCR échoue
+                            # Capturer cette zone comme une image
+                            pix = page.get_pixmap(clip=figure_rect)
+                            img_data = pix.tobytes("png")
                             
-                            # Convertir en base64
-                            buffered = BytesIO()
-                            image.save(buffered, format="PNG")
-                            img_base64 = base64.b64encode(buffered.getvalue()).decode()
+                            if not element_text:
+                                # Pas de couche texte (PDF scanné) : OCR sur la zone
+                                element_text = self._ocr_image(img_data) or block_text
                             
-                            element_entry = {
-                                "type": "figure" if "fig" in block_text.lower() else "table",
+                            elements.append({
+                                "type": element_type,
                                 "page_num": page_num + 1,
                                 "caption": block_text,
                                 "text_content": element_text,
-                                "image_data": img_base64,
+                                "image_data": base64.b64encode(img_data).decode(),
                                 "width": pix.width,
                                 "height": pix.height
-                            }
-                            
-                            elements.append(element_entry)
+                            })
                         except Exception as e:
                             print(f"⚠️ Erreur de traitement d'élément sur la page {page_num+1}: {str(e)}")
                             continue
+                
+                # Tableaux sans légende reconnue
+                for table in tables:
+                    try:
+                        pix = page.get_pixmap(clip=fitz.Rect(table.bbox))
+                        elements.append({
+                            "type": "table",
+                            "page_num": page_num + 1,
+                            "caption": "",
+                            "text_content": self._table_text(table),
+                            "image_data": base64.b64encode(pix.tobytes("png")).decode(),
+                            "width": pix.width,
+                            "height": pix.height
+                        })
+                    except Exception as e:
+                        print(f"⚠️ Erreur de traitement de tableau sur la page {page_num+1}: {str(e)}")
             
             return elements
         except Exception as e:
             print(f"⚠️ Erreur d'extraction de figures/tableaux du PDF: {str(e)}")
             return []
     
+    @staticmethod
+    def _table_for_caption(tables, caption_rect, max_gap=50):
+        """Tableau le plus proche verticalement d'une légende (au plus ``max_gap`` points)"""
+        best, best_gap = None, None
+        for table in tables:
+            x0, y0, x1, y1 = table.bbox
+            if x1 < caption_rect.x0 or x0 > caption_rect.x1:
+                continue
+            gap = max(0, y0 - caption_rect.y1, caption_rect.y0 - y1)
+            if gap <= max_gap and (best_gap is None or gap < best_gap):
+                best, best_gap = table, gap
+        return best
+    
+    @staticmethod
+    def _table_text(table):
+        """Contenu d'un tableau, une ligne par rangée et cellules séparées par « | »"""
+        rows = table.extract()
+        return "\n".join(" | ".join((cell or "").strip() for cell in row) for row in rows)
+    
+    @staticmethod
+    def _ocr_image(png_bytes):
+        """Texte d'une image par OCR, ou "" si Tesseract est indisponible"""
+        try:
+            from io import BytesIO
+            from PIL import Image
+            import pytesseract
+            return pytesseract.image_to_string(Image.open(BytesIO(png_bytes))).strip()
+        except Exception:
+            return ""
+    
     def _index_document_for_lexical_search(self, docs, filename, images=None, figures_tables=None):
         """Indexer un document pour la recherche lexicale"""
         # Copie exacte de ta fonction existante
@@ -376,113 +461,15 @@ class EnhancedMUragSystem:
             validation_threshold: Seuil de validation
         """
         try:
-            # Construire les filtres pour la recherche
-            search_filters = {}
-            if self.user_id:
-                search_filters["user_id"] = self.user_id
-            if article_id:
-                search_filters["article_id"] = article_id
-            
             # Récupérer le contexte
-            if search_filters:
-                # Recherche avec filtres (nécessite une implémentation custom)
-                docs = self._filtered_search(question, search_filters)
-            else:
-                docs = self.retriever.invoke(question)
-            
-            if not docs:
-                response_data = {
-                    "answer": "Aucune information pertinente trouvée dans les documents.",
-                    "verification_status": "no_context",
-                    "verification_details": None
-                }
-                self._add_to_conversation_memory(question, response_data["answer"])
-                return response_data if return_metadata else response_data["answer"]
-            
-            # Préparer le contexte multimodal
-            context_parts = []
-            for doc in docs:
-                context_parts.append(doc.page_content)
-                
-                if hasattr(doc, 'metadata'):
-                    if doc.metadata.get('type') == 'image':
-                        context_parts.append(f"[INFORMATION VISUELLE] {doc.metadata.get('text_content', '')}")
-                    elif doc.metadata.get('type') in ['figure', 'table']:
-                        context_parts.append(f"[{doc.metadata.get('type').upper()}] {doc.metadata.get('caption', '')} - {doc.metadata.get('text_content', '')}")
-            
-            context = "\n\n".join(context_parts)
-            
-            # Vérifications qualité (utilise tes fonctions existantes)
-            if return_metadata:
-                context_verification = self._verify_context_relevance(question, context)
-                if context_verification["score"] <= 0.5:
-                    # Recherche supplémentaire
-                    additional_docs = self.vectorstore.similarity_search(question, k=5)
-                    additional_context = "\n\n".join([doc.page_content for doc in additional_docs if doc not in docs])
-                    if additional_context:
-                        context += "\n\n" + additional_context
-                        context_verification = self._verify_context_relevance(question, context)
-            
-            # Construire le prompt avec mémoire
-            memory_context = self._build_memory_context()
-            full_context = f"{memory_context}\n=== DOCUMENT CONTEXT ===\n{context}\n=== END OF CONTEXT ==="
-            
-            prompt = self._build_prompt(question, full_context)
-            
-            # Générer la réponse
-            response = ollama.chat(
-                model=current_app.config.get('DEFAULT_SUMMARIZATION_MODEL', 'DeepSeek-R1'),
-                messages=[
-                    {'role': 'system', 'content': "Vous devez maintenir la continuité de la conversation."},
-                    {'role': 'user', 'content': prompt}
-                ]
-            )
-            
-            answer = self._clean_think_blocks(response['message']['content'])
-            
-            # Vérifications qualité si demandées
-            verification_result = None
-            final_answer = answer
-            status = "generated"
-            final_score = 0.5
-            
-            if return_metadata:
-                faithfulness_verification = self._verify_answer_faithfulness(context, answer)
-                relevance_verification = self._verify_answer_relevance(question, answer)
-                
-                verification_result = {
-                    "context_relevance": context_verification,
-                    "answer_faithfulness": faithfulness_verification,
-                    "answer_relevance": relevance_verification
-                }
-                
-                final_score = (
-                    context_verification["score"] * 0.2 +
-                    faithfulness_verification["score"] * 0.4 +
-                    relevance_verification["score"] * 0.4
-                )
-                
-                is_valid = final_score >= validation_threshold
-                status = "validated" if is_valid else "needs_improvement"
-                
-                if not is_valid:
-                    improved_answer = self._suggest_improved_answer(question, context, answer, verification_result)
-                    if improved_answer:
-                        final_answer = improved_answer
-                        status = "corrected"
+            docs = self._retrieve(question, self._search_filters(article_id))
+            response_data = self._answer_from_docs(question, docs, self._build_memory_context(),
+                                                   return_metadata, validation_threshold)
             
             # Ajouter à la mémoire
-            self._add_to_conversation_memory(question, final_answer)
-            
-            # Retourner résultat
-            result_dict = {
-                "answer": final_answer,
-                "verification_status": status,
-                "verification_score": final_score,
-                "verification_details": verification_result
-            }
+            self._add_to_conversation_memory(question, response_data["answer"])
             
-            return result_dict if return_metadata else final_answer
+            return response_data if return_metadata else response_data["answer"]
             
         except Exception as e:
             error_msg = f"❌ Erreur génération réponse: {str(e)}"
@@ -494,31 +481,265 @@ class EnhancedMUragSystem:
             }
             return error_result if return_metadata else error_result["answer"]
     
+    def _search_filters(self, article_id: Optional[int] = None) -> dict:
+        """Filtres de recherche : documents de l'utilisateur, article éventuel"""
+        search_filters = {}
+        if self.user_id:
+            search_filters["user_id"] = self.user_id
+        if article_id:
+            search_filters["article_id"] = article_id
+        return search_filters
+    
+    def _retrieve(self, question: str, filters: dict):
+        """Contexte d'une question : recherche filtrée, sinon MMR (retriever)"""
+        if filters:
+            # Recherche avec filtres (nécessite une implémentation custom)
+            return self._filtered_search(question, filters)
+        return self.retriever.invoke(question)
+    
+    def _retrieve_by_vector(self, embedding, filters: dict, k: int = 5):
+        """Même recherche que ``_retrieve`` à partir de l'embedding de la question"""
+        if filters:
+            if self.vector_backend == 'numpy':
+                return self.vectorstore.similarity_search_by_vector(embedding, k=k, filter=filters)
+            docs = self.vectorstore.similarity_search_by_vector(embedding, k=k*3)
+            return self._match_filters(docs, filters, k)
+        search_kwargs = dict(self.retriever.search_kwargs)
+        search_kwargs.pop('k', None)
+        return self.vectorstore.max_marginal_relevance_search_by_vector(embedding, k=k, **search_kwargs)
+    
+    def _answer_from_docs(self, question: str, docs, memory_context: str, return_metadata: bool = False,
+                          validation_threshold: float = 0.7, context: Optional[str] = None):
+        """
+        Réponse (et vérifications qualité si ``return_metadata``) à partir des
+        documents retrouvés ; la mémoire de conversation n'est pas modifiée.
+        ``context`` : contexte déjà formaté à partir de ``docs`` (optionnel).
+        """
+        if not docs:
+            return {
+                "answer": "Aucune information pertinente trouvée dans les documents.",
+                "verification_status": "no_context",
+                "verification_details": None
+            }
+        
+        # Préparer le contexte multimodal
+        if context is None:
+            context = "\n\n".join(self._format_context_doc(doc) for doc in docs)
+        
+        # Vérifications qualité (utilise tes fonctions existantes)
+        if return_metadata:
+            context_verification = self._verify_context_relevance(question, context)
+            if context_verification["score"] <= 0.5:
+                # Recherche supplémentaire
+                additional_docs = self.vectorstore.similarity_search(question, k=5)
+                additional_context = "\n\n".join([doc.page_content for doc in additional_docs if doc not in docs])
+                if additional_context:
+                    context += "\n\n" + additional_context
+                    context_verification = self._verify_context_relevance(question, context)
+        
+        # Construire le prompt avec mémoire
+        full_context = f"{memory_context}\n=== DOCUMENT CONTEXT ===\n{context}\n=== END OF CONTEXT ==="
+        
+        prompt = self._build_prompt(question, full_context)
+        
+        # Générer la réponse
+        answer = self._generate_answer(prompt, current_app.config.get('DEFAULT_SUMMARIZATION_MODEL', 'DeepSeek-R1'))
+        
+        # Vérifications qualité si demandées
+        verification_result = None
+        final_answer = answer
+        status = "generated"
+        final_score = 0.5
+        
+        if return_metadata:
+            faithfulness_verification = self._verify_answer_faithfulness(context, answer)
+            relevance_verification = self._verify_answer_relevance(question, answer)
+            
+            verification_result = {
+                "context_relevance": context_verification,
+                "answer_faithfulness": faithfulness_verification,
+                "answer_relevance": relevance_verification
+            }
+            
+            final_score = (
+                context_verification["score"] * 0.2 +
+                faithfulness_verification["score"] * 0.4 +
+                relevance_verification["score"] * 0.4
+            )
+            
+            is_valid = final_score >= validation_threshold
+            status = "validated" if is_valid else "needs_improvement"
+            
+            if not is_valid:
+                improved_answer = self._suggest_improved_answer(question, context, answer, verification_result)
+                if improved_answer:
+                    final_answer = improved_answer
+                    status = "corrected"
+        
+        return {
+            "answer": final_answer,
+            "verification_status": status,
+            "verification_score": final_score,
+            "verification_details": verification_result
+        }
+    
+    def ask_batch(self, questions: List[str], article_id: Optional[int] = None, max_concurrency: Optional[int] = None,
+                  return_metadata: bool = False, validation_threshold: float = 0.7):
+        """
+        Poser une liste de questions (ex: la checklist des suggestions) en un seul passage
+        
+        Chaque question suit le même chemin que ``ask`` (recherche filtrée ou
+        MMR, vérifications si ``return_metadata``) : les réponses sont celles
+        que donnerait ``/ask``. Ce qui est mis en commun : un seul appel
+        d'embedding pour toutes les questions, une seule recherche matricielle
+        sur le backend NumPy (voir ``_batched_search``), le formatage des chunks
+        partagés, l'historique de conversation (celui d'avant le lot, sauvegardé
+        une fois), et les générations en parallèle avec une concurrence bornée.
+        
+        Args:
+            questions: Les questions
+            article_id: ID d'article spécifique (optionnel)
+            max_concurrency: Nombre maximal de questions traitées simultanément
+            return_metadata: Vérifications qualité et détails, comme pour ``ask``
+            validation_threshold: Seuil de validation
+        """
+        from concurrent.futures import ThreadPoolExecutor
+        
+        if not questions:
+            return []
+        
+        max_concurrency = max_concurrency or current_app.config.get('RAG_BATCH_MAX_CONCURRENCY', 4)
+        workers = max(1, min(max_concurrency, len(questions)))
+        search_filters = self._search_filters(article_id)
+        
+        try:
+            # Un seul appel d'embedding pour tout le lot (même vecteur que embed_query)
+            query_embeddings = self.embeddings.embed_documents(questions)
+            docs_per_question = self._batched_search(query_embeddings, search_filters, workers=workers)
+        except Exception as e:
+            error_msg = f"❌ Erreur recherche groupée: {str(e)}"
+            print(error_msg)
+            return [{"question": q, "answer": error_msg, "verification_status": "error", "sources": 0} for q in questions]
+        
+        # Contexte dédupliqué : un chunk partagé par plusieurs questions n'est formaté qu'une fois
+        formatted_chunks = {}
+        contexts = []
+        for docs in docs_per_question:
+            parts = []
+            for doc in docs:
+                key = (doc.metadata.get('source'), doc.metadata.get('page'), doc.page_content)
+                if key not in formatted_chunks:
+                    formatted_chunks[key] = self._format_context_doc(doc)
+                parts.append(formatted_chunks[key])
+            contexts.append("\n\n".join(parts))
+        
+        # L'historique est le même pour toutes les questions du lot
+        memory_context = self._build_memory_context()
+        app = current_app._get_current_object()
+        
+        def _answer(question, docs, context):
+            with app.app_context():
+                try:
+                    return self._answer_from_docs(question, docs, memory_context, return_metadata,
+                                                  validation_threshold, context=context)
+                except Exception as e:
+                    return {
+                        "answer": f"❌ Erreur génération réponse: {str(e)}",
+                        "verification_status": "error",
+                        "verification_details": None
+                    }
+        
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            answers = list(executor.map(_answer, questions, docs_per_question, contexts))
+        
+        # Une seule mise à jour (et sauvegarde) de la mémoire pour tout le lot
+        self._add_exchanges_to_conversation_memory([
+            (question, result["answer"]) for question, result in zip(questions, answers)
+            if result["verification_status"] != "error"
+        ])
+        
+        print(f"📋 Lot de {len(questions)} questions traité ({len(formatted_chunks)} chunks de contexte distincts)")
+        return [
+            dict(result, question=question, sources=len(docs))
+            for question, result, docs in zip(questions, answers, docs_per_question)
+        ]
+    
+    def _batched_search(self, query_embeddings, filters: dict, k: int = 5, workers: int = 1):
+        """
+        Même recherche que ``_retrieve_by_vector`` pour plusieurs requêtes.
+        
+        Backend NumPy : un seul produit matriciel pour tout le lot (recherche
+        filtrée, ou MMR avec les réglages du retriever). Chroma n'expose pas de
+        recherche multi-requêtes : repli sur une recherche par question, en
+        parallèle sur ``workers`` threads.
+        """
+        if self.vector_backend == 'numpy':
+            if filters:
+                return self.vectorstore.similarity_search_by_vectors(query_embeddings, k=k, filter=filters)
+            search_kwargs = dict(self.retriever.search_kwargs)
+            search_kwargs.pop('k', None)
+            return self.vectorstore.max_marginal_relevance_search_by_vectors(query_embeddings, k=k, **search_kwargs)
+        
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(lambda embedding: self._retrieve_by_vector(embedding, filters, k),
+                                     query_embeddings))
+    
+    def _format_context_doc(self, doc) -> str:
+        """Formater un chunk (texte, image, figure ou tableau) pour le contexte"""
+        context_parts = [doc.page_content]
+        
+        if hasattr(doc, 'metadata'):
+            if doc.metadata.get('type') == 'image':
+                context_parts.append(f"[INFORMATION VISUELLE] {doc.metadata.get('text_content', '')}")
+            elif doc.metadata.get('type') in ['figure', 'table']:
+                context_parts.append(f"[{doc.metadata.get('type').upper()}] {doc.metadata.get('caption', '')} - {doc.metadata.get('text_content', '')}")
+        
+        return "\n\n".join(context_parts)
+    
+    def _generate_answer(self, prompt: str, model: str) -> str:
+        """Générer une réponse à partir du prompt complet"""
+        response = llm_client.chat(
+            model=model,
+            messages=[
+                {'role': 'system', 'content': "Vous devez maintenir la continuité de la conversation."},
+                {'role': 'user', 'content': prompt}
+            ]
+        )
+        return self._clean_think_blocks(response['message']['content'])
+    
     def _filtered_search(self, question: str, filters: dict, k: int = 5):
         """Recherche avec filtres sur les métadonnées"""
+        if self.vector_backend == 'numpy':
+            # Filtrage natif par masque sur toute la matrice
+            return self.vectorstore.similarity_search(question, k=k, filter=filters)
+        
         try:
             # Pour l'instant, recherche simple puis filtrage
             # Tu peux améliorer avec des filtres Chroma natifs
             all_docs = self.vectorstore.similarity_search(question, k=k*3)
-            
-            filtered_docs = []
-            for doc in all_docs:
-                if hasattr(doc, 'metadata'):
-                    match = True
-                    for key, value in filters.items():
-                        if doc.metadata.get(key) != value:
-                            match = False
-                            break
-                    if match:
-                        filtered_docs.append(doc)
-                        if len(filtered_docs) >= k:
-                            break
-            
-            return filtered_docs[:k]
+            return self._match_filters(all_docs, filters, k)
         except Exception as e:
             print(f"⚠️ Erreur recherche filtrée: {e}")
             return self.vectorstore.similarity_search(question, k=k)
     
+    def _match_filters(self, docs, filters: dict, k: int):
+        """Garder les k premiers documents dont les métadonnées respectent les filtres"""
+        filtered_docs = []
+        for doc in docs:
+            if hasattr(doc, 'metadata'):
+                match = True
+                for key, value in filters.items():
+                    if doc.metadata.get(key) != value:
+                        match = False
+                        break
+                if match:
+                    filtered_docs.append(doc)
+                    if len(filtered_docs) >= k:
+                        break
+        
+        return filtered_docs[:k]
+    
     def _build_memory_context(self):
         """Construire le contexte de mémoire conversationnelle"""
         if not self.conversation_memory:
@@ -550,11 +771,19 @@ Respond concisely and clearly, as if speaking naturally to the user."""
     
     def _add_to_conversation_memory(self, question: str, answer: str):
         """Ajouter un échange à la mémoire conversationnelle"""
-        self.conversation_memory.append({
-            "question": question,
-            "answer": answer,
-            "timestamp": time.time()
-        })
+        self._add_exchanges_to_conversation_memory([(question, answer)])
+    
+    def _add_exchanges_to_conversation_memory(self, exchanges):
+        """Ajouter plusieurs échanges (question, réponse) avec une seule sauvegarde"""
+        if not exchanges:
+            return
+        
+        for question, answer in exchanges:
+            self.conversation_memory.append({
+                "question": question,
+                "answer": answer,
+                "timestamp": time.time()
+            })
         
         # Limiter la mémoire (garder les 50 derniers échanges)
         if len(self.conversation_memory) > 50:
@@ -580,7 +809,7 @@ Respond concisely and clearly, as if speaking naturally to the user."""
             Format: [SCORE: X.X] Explanation...
             """
             
-            response = ollama.chat(
+            response = llm_client.chat(
                 model=self.verification_model,
                 messages=[{'role': 'user', 'content': prompt}]
             )
@@ -620,7 +849,7 @@ Respond concisely and clearly, as if speaking naturally to the user."""
             Format: [SCORE: X.X] Explanation...
             """
             
-            response = ollama.chat(
+            response = llm_client.chat(
                 model=self.verification_model,
                 messages=[{'role': 'user', 'content': prompt}]
             )
@@ -660,7 +889,7 @@ Respond concisely and clearly, as if speaking naturally to the user."""
             Format: [SCORE: X.X] Explanation...
             """
             
-            response = ollama.chat(
+            response = llm_client.chat(
                 model=self.verification_model,
                 messages=[{'role': 'user', 'content': prompt}]
             )
@@ -717,7 +946,7 @@ Respond concisely and clearly, as if speaking naturally to the user."""
             Write a corrected answer below (without mentioning the corrections or issues):
             """
             
-            response = ollama.chat(
+            response = llm_client.chat(
                 model=current_app.config.get('DEFAULT_SUMMARIZATION_MODEL', 'DeepSeek-R1'),
                 messages=[{'role': 'user', 'content': prompt}]
             )
@@ -818,7 +1047,7 @@ Respond concisely and clearly, as if speaking naturally to the user."""
             # Extraire mots-clés
             prompt = f"""Extract 5 academic keywords from this text for ArXiv search. Return only keywords separated by commas: {text[:500]}"""
             
-            response = ollama.chat(
+            response = llm_client.chat(
                 model=current_app.config.get('DEFAULT_SUMMARIZATION_MODEL', 'DeepSeek-R1'),
                 messages=[{'role': 'user', 'content': prompt}]
             )
@@ -867,6 +1096,8 @@ Respond concisely and clearly, as if speaking naturally to the user."""
     
     def _rerank_results(self, results: list, query_text: str):
         """Réordonner les résultats par pertinence"""
+        import numpy as np
+        
         try:
             SOURCE_WEIGHTS = {'local': 1.0, 'arxiv': 0.6}
             
@@ -900,10 +1131,12 @@ Respond concisely and clearly, as if speaking naturally to the user."""
                 try:
                     content = result.get('snippet', '')
                     if content:
-                        content_embedding = self.embeddings.embed_query(content)
-                        tensor1 = torch.tensor([query_embedding])
-                        tensor2 = torch.tensor([content_embedding])
-                        similarity = float(util.pytorch_cos_sim(tensor1, tensor2)[0][0])
+                        content_embedding = np.asarray(self.embeddings.embed_query(content), dtype=np.float32)
+                        query_vector = np.asarray(query_embedding, dtype=np.float32)
+                        similarity = float(
+                            query_vector @ content_embedding
+                            / (np.linalg.norm(query_vector) * np.linalg.norm(content_embedding))
+                        )
                         semantic_score = similarity * 2.0
                     else:
                         semantic_score = 0.0
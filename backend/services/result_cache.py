@@ -0,0 +1,198 @@
+# backend/services/result_cache.py
+"""
+Cache disque des résultats LLM déterministes (résumés, traductions, slides...)
+
+Clé : (étape, modèle, version du template de prompt, empreinte des entrées,
+options de génération). Les valeurs sont stockées en JSON dans une base
+SQLite ; quand la taille totale dépasse la limite, les entrées les moins
+récemment utilisées sont évincées (LRU).
+
+Changer un prompt = incrémenter sa version : les anciennes entrées ne sont
+plus jamais relues et finissent évincées. Un résultat absent ou vide (None,
+"", [], {}) traduit un échec de génération ou d'analyse : il n'est jamais
+mis en cache.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from backend.utils.helpers import get_config_value
+
+# Après éviction, la taille totale redescend à cette fraction de la limite
+EVICTION_TARGET_RATIO = 0.9
+
+
+def is_cacheable(value):
+    """Résultat à mémoriser : ni None ni chaîne / liste / dictionnaire vide"""
+    return value is not None and not (isinstance(value, (str, list, dict)) and not value)
+
+
+class ResultCache:
+    """Cache clé/valeur JSON sur disque avec éviction LRU bornée en taille"""
+
+    def __init__(self, path, max_bytes=256 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = int(max_bytes)
+        self._lock = threading.Lock()
+        self._conn = None
+        self.hits = 0
+        self.misses = 0
+
+    def _connection(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS results ('
+                'key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, '
+                'created_at REAL NOT NULL, last_access REAL NOT NULL)'
+            )
+            self._conn.execute('CREATE INDEX IF NOT EXISTS idx_results_last_access ON results(last_access)')
+            self._conn.commit()
+        return self._conn
+
+    @staticmethod
+    def make_key(step, model, template_version, inputs, options=None):
+        """Empreinte SHA-256 de (étape, modèle, version du prompt, entrées, options)"""
+        payload = json.dumps(
+            [step, model, template_version, inputs, options or {}],
+            sort_keys=True, ensure_ascii=False, default=str
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """Retourne (trouvé, valeur) et rafraîchit la date d'accès"""
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute('SELECT value FROM results WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return False, None
+            conn.execute('UPDATE results SET last_access = ? WHERE key = ?', (time.time(), key))
+            conn.commit()
+            self.hits += 1
+        return True, json.loads(row[0])
+
+    def set(self, key, value):
+        data = json.dumps(value, ensure_ascii=False)
+        size = len(data.encode('utf-8'))
+        if size > self.max_bytes:
+            return
+
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                'INSERT OR REPLACE INTO results (key, value, size, created_at, last_access) VALUES (?, ?, ?, ?, ?)',
+                (key, data, size, now, now)
+            )
+            self._evict(conn)
+            conn.commit()
+
+    def _evict(self, conn):
+        """Supprimer les entrées les moins récemment utilisées au-delà de la limite"""
+        total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM results').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        target = self.max_bytes * EVICTION_TARGET_RATIO
+        evicted = []
+        for key, size in conn.execute('SELECT key, size FROM results ORDER BY last_access ASC'):
+            if total <= target:
+                break
+            evicted.append((key,))
+            total -= size
+        conn.executemany('DELETE FROM results WHERE key = ?', evicted)
+
+    def get_or_compute(self, key, compute, bypass=False):
+        """
+        Valeur en cache ou calculée puis mémorisée.
+
+        ``bypass`` ignore l'entrée existante mais mémorise le nouveau résultat
+        (rafraîchissement). Un résultat vide ou ``None`` n'est jamais mis en cache.
+        """
+        if not bypass:
+            found, value = self.get(key)
+            if found:
+                return value
+
+        value = compute()
+        if is_cacheable(value):
+            self.set(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            conn = self._connection()
+            conn.execute('DELETE FROM results')
+            conn.commit()
+
+    def stats(self):
+        with self._lock:
+            count, total = self._connection().execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results'
+            ).fetchone()
+        return {
+            'entries': count,
+            'size_bytes': total,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses
+        }
+
+
+# Instance globale (singleton)
+_result_cache = None
+_result_cache_lock = threading.Lock()
+
+def get_result_cache():
+    """
+    Retourne le cache de résultats partagé (créé au premier appel)
+    """
+    global _result_cache
+    if _result_cache is None:
+        with _result_cache_lock:
+            if _result_cache is None:
+                _result_cache = ResultCache(
+                    get_config_value('LLM_RESULT_CACHE_PATH'),
+                    max_bytes=get_config_value('LLM_RESULT_CACHE_MAX_MB', 256) * 1024 * 1024
+                )
+    return _result_cache
+
+def cached_llm_result(step, model, template_version, inputs, options, compute, use_cache=True):
+    """
+    Résultat d'une étape LLM déterministe, relu depuis le cache disque si possible.
+
+    Args:
+        step: Nom de l'étape (ex: 'summarize_text')
+        model: Modèle Ollama utilisé
+        template_version: Version du template de prompt
+        inputs: Entrées de l'étape (sérialisables en JSON)
+        options: Options de génération
+        compute: Fonction sans argument qui appelle le LLM
+        use_cache: False pour forcer un nouveau calcul (le résultat est tout de même mémorisé)
+    """
+    if not get_config_value('LLM_RESULT_CACHE_ENABLED', True):
+        return compute()
+
+    cache = get_result_cache()
+    key = cache.make_key(step, model, template_version, inputs, options)
+    return cache.get_or_compute(key, compute, bypass=not use_cache)
+
+def lookup_llm_result(step, model, template_version, inputs, options=None):
+    """Retourne (trouvé, valeur) sans calculer, pour les étapes qui regroupent plusieurs entrées par appel"""
+    if not get_config_value('LLM_RESULT_CACHE_ENABLED', True):
+        return False, None
+    cache = get_result_cache()
+    return cache.get(cache.make_key(step, model, template_version, inputs, options))
+
+def store_llm_result(step, model, template_version, inputs, options, value):
+    if not is_cacheable(value) or not get_config_value('LLM_RESULT_CACHE_ENABLED', True):
+        return
+    cache = get_result_cache()
+    cache.set(cache.make_key(step, model, template_version, inputs, options), value)
@@ -1,17 +1,18 @@
-import os
 import re
 import io
-import shutil
 import base64
 import hashlib
 import logging
-from PIL import Image
+import time
+from PIL import Image, ImageDraw, ImageFont
 import fitz  # PyMuPDF
 import cv2
-from concurrent.futures import ThreadPoolExecutor
-import ollama
-import tempfile
-import edge_tts
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from backend.services import llm_client
+from backend.services.result_cache import cached_llm_result, lookup_llm_result, store_llm_result
+from backend.services.text_compression import PAGE_BREAK, SECTION_HEADING_PATTERN, compress_text
+from backend.utils.helpers import get_config_value
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
@@ -20,6 +21,40 @@ from reportlab.lib.units import cm
 
 logging.basicConfig(level=logging.INFO)
 
+# Versions des templates de prompt (à incrémenter à chaque modification d'un prompt
+# pour invalider les résultats mis en cache)
+SUMMARIZE_TEXT_PROMPT_VERSION = 1
+SUMMARIZE_CHUNK_PROMPT_VERSION = 1
+REDUCE_SUMMARIES_PROMPT_VERSION = 1
+DESCRIBE_IMAGE_PROMPT_VERSION = 1
+DESCRIBE_MONTAGE_PROMPT_VERSION = 1
+
+# Empreinte perceptuelle des figures : dHash 16x16 (256 bits) ; au plus
+# DHASH_DUPLICATE_DISTANCE bits différents = même figure
+DHASH_SIZE = 16
+DHASH_DUPLICATE_DISTANCE = 12
+
+# Résolution des figures recadrées ; les seuils de la détection OpenCV sont
+# exprimés à cette résolution
+FIGURE_RENDER_DPI = 300
+
+# Triage des pages avant la détection OpenCV : une page sans tracés vectoriels,
+# sans image ni légende est du texte et n'est pas rendue
+FIGURE_CAPTION_PATTERN = re.compile(r'(figure|fig\.|tableau|table)\s+\d+', re.IGNORECASE)
+FIGURE_TRIAGE_MIN_DRAWINGS = 10     # en dessous : filets, soulignements, encadrés de texte
+FIGURE_TRIAGE_DENSE_DRAWINGS = 500  # au-delà : courbes / nuages de points aux traits fins
+FIGURE_DETECTION_DPI_LOW = 100      # images intégrées légendées (contours nets)
+FIGURE_DETECTION_DPI = 150          # figures vectorielles
+FIGURE_DETECTION_DPI_DENSE = 200
+
+# Options de génération du modèle de vision
+VISION_OPTIONS = {
+    "temperature": 0.2,
+    "top_p": 0.9,
+}
+FINAL_SUMMARY_PROMPT_VERSION = 1
+TRANSLATE_PROMPT_VERSION = 1
+
 def clean_think_blocks(text: str) -> str:
     text = re.sub(r'<think>.*?</think>', '', text, flags=re.DOTALL)
     text = re.sub(r'<reasoning>.*?</reasoning>', '', text, flags=re.DOTALL)
@@ -28,22 +63,82 @@ def clean_think_blocks(text: str) -> str:
 def hash_image(image_bytes):
     return hashlib.md5(image_bytes).hexdigest()
 
-def extract_from_pdf(pdf_file, use_opencv=True):
-    temp_dir = "temp_images"
-    if os.path.exists(temp_dir):
-        shutil.rmtree(temp_dir)
-    os.makedirs(temp_dir, exist_ok=True)
+def pixmap_array(pix):
+    """Vue NumPy (sans copie) sur les pixels d'un pixmap ; valable tant que ``pix`` existe"""
+    rows = np.frombuffer(pix.samples_mv, dtype=np.uint8).reshape(pix.height, pix.stride)
+    return rows[:, :pix.width * pix.n].reshape(pix.height, pix.width, pix.n)
+
+def figure_detection_dpi(page, page_text):
+    """
+    Triage d'une page à partir de ses métadonnées PyMuPDF (tracés vectoriels,
+    images, légendes) : DPI de détection des figures, ou None pour ne pas la rendre.
+    """
+    drawings = len(page.get_cdrawings())
+    if drawings < FIGURE_TRIAGE_MIN_DRAWINGS:
+        # Les images intégrées sont déjà extraites telles quelles : le rendu ne sert
+        # qu'à récupérer une figure composée (images + annotations) légendée
+        if page.get_image_info() and FIGURE_CAPTION_PATTERN.search(page_text):
+            return FIGURE_DETECTION_DPI_LOW
+        return None
+    if drawings >= FIGURE_TRIAGE_DENSE_DRAWINGS:
+        return FIGURE_DETECTION_DPI_DENSE
+    return FIGURE_DETECTION_DPI
+
+def detect_figure_regions(page, dpi=FIGURE_DETECTION_DPI):
+    """
+    Zones de figures d'une page (coordonnées PDF), détectées par contours sur
+    un rendu en niveaux de gris lu directement dans le pixmap.
+    """
+    zoom = dpi / 72
+    scale = dpi / FIGURE_RENDER_DPI
+    pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), colorspace=fitz.csGRAY, alpha=False)
+    gray = pixmap_array(pix)[:, :, 0]
+    blur = cv2.GaussianBlur(gray, (5, 5), 0)
+    edges = cv2.Canny(blur, 50, 150)
+    contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    regions = []
+    for contour in contours:
+        area = cv2.contourArea(contour)
+        if area > 10000 * scale * scale:
+            x, y, w, h = cv2.boundingRect(contour)
+            if 0.2 < w/h < 5 and w > 100 * scale and h > 100 * scale:
+                regions.append(fitz.Rect(x, y, x + w, y + h) / zoom)
+    return regions
+
+def _png_bytes(image_bytes, extension):
+    """Figure intégrée en PNG (les PNG sont gardés tels quels)"""
+    if extension == "png":
+        return image_bytes
+    buffer = io.BytesIO()
+    with Image.open(io.BytesIO(image_bytes)) as pil_image:
+        pil_image.save(buffer, "PNG")
+    return buffer.getvalue()
+
+def extract_from_pdf(pdf_file, use_opencv=True, extract_images=True):
+    """
+    Extraire le texte et les figures d'un PDF, entièrement en mémoire.
 
+    Retourne (texte, figures) : les pages du texte sont séparées par PAGE_BREAK
+    (saut de page) et chaque figure est un PNG en ``bytes`` : aucun
+    fichier temporaire, donc aucun état partagé entre requêtes concurrentes.
+    L'appelant décide de la durée de vie des figures (ex: les confier au
+    cache d'artefacts).
+    """
     pdf_bytes = pdf_file.read()
     doc = fitz.open(stream=pdf_bytes, filetype="pdf")
 
     text = ""
-    image_paths = []
+    figures = []
     image_hashes = set()
 
+    rendered_pages = 0
+
     for page_num in range(len(doc)):
         page = doc.load_page(page_num)
-        text += page.get_text()
+        page_text = page.get_text()
+        text += (PAGE_BREAK if page_num else "") + page_text
+        if not extract_images:
+            continue
         image_list = page.get_images(full=True)
         for img_index, img in enumerate(image_list):
             xref = img[0]
@@ -53,53 +148,199 @@ def extract_from_pdf(pdf_file, use_opencv=True):
                 img_hash = hash_image(image_bytes)
                 if img_hash not in image_hashes:
                     image_hashes.add(img_hash)
-                    pil_image = Image.open(io.BytesIO(image_bytes))
-                    if pil_image.width > 100 and pil_image.height > 100:
-                        image_filename = f"{temp_dir}/page{page_num+1}_img{img_index+1}.png"
-                        pil_image.save(image_filename, "PNG")
-                        image_paths.append(image_filename)
+                    if base_image["width"] > 100 and base_image["height"] > 100:
+                        figures.append(_png_bytes(image_bytes, base_image["ext"]))
             except Exception as e:
                 logging.warning(f"[Page {page_num+1}] Erreur conversion image: {e}")
         if use_opencv:
             try:
-                pix = page.get_pixmap(matrix=fitz.Matrix(300/72, 300/72))
-                page_img_path = f"{temp_dir}/page{page_num+1}_full.png"
-                pix.save(page_img_path)
-                img = cv2.imread(page_img_path)
-                if img is None:
+                dpi = figure_detection_dpi(page, page_text)
+                if dpi is None:
                     continue
-                gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-                blur = cv2.GaussianBlur(gray, (5, 5), 0)
-                edges = cv2.Canny(blur, 50, 150)
-                contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-                for i, contour in enumerate(contours):
-                    area = cv2.contourArea(contour)
-                    if area > 10000:
-                        x, y, w, h = cv2.boundingRect(contour)
-                        if 0.2 < w/h < 5 and w > 100 and h > 100:
-                            roi = img[y:y+h, x:x+w]
-                            _, buffer = cv2.imencode('.png', roi)
-                            img_hash = hashlib.md5(buffer).hexdigest()
-                            if img_hash not in image_hashes:
-                                image_hashes.add(img_hash)
-                                figure_path = f"{temp_dir}/page{page_num+1}_figure{i+1}.png"
-                                cv2.imwrite(figure_path, roi)
-                                image_paths.append(figure_path)
-                os.remove(page_img_path)
+                rendered_pages += 1
+                zoom = fitz.Matrix(FIGURE_RENDER_DPI / 72, FIGURE_RENDER_DPI / 72)
+                for region in detect_figure_regions(page, dpi):
+                    # Seules les zones retenues sont rendues en couleur et encodées en PNG
+                    png = page.get_pixmap(matrix=zoom, clip=region, alpha=False).tobytes("png")
+                    img_hash = hashlib.md5(png).hexdigest()
+                    if img_hash not in image_hashes:
+                        image_hashes.add(img_hash)
+                        figures.append(png)
             except Exception as e:
                 logging.error(f"[Page {page_num+1}] Erreur OpenCV: {e}")
+    if extract_images and use_opencv:
+        logging.info(f"Détection de figures: {rendered_pages}/{len(doc)} pages rendues")
     pdf_file.seek(0)
-    return text, image_paths, temp_dir
+    return text, figures
 
-def read_image_binary(image_path):
-    with open(image_path, "rb") as img_file:
-        binary_data = img_file.read()
-        return base64.b64encode(binary_data).decode('utf-8')
+def open_figure(figure):
+    """Ouvrir une figure, qu'elle soit un chemin (cache d'artefacts) ou un PNG en mémoire"""
+    if isinstance(figure, (bytes, bytearray)):
+        return Image.open(io.BytesIO(figure))
+    return Image.open(figure)
 
-def describe_image(image_path, image_number):
-    try:
-        image_binary = read_image_binary(image_path)
-        prompt = f"""
+def image_dhash(image, hash_size=DHASH_SIZE):
+    """
+    Empreinte perceptuelle (dHash) : signe des différences entre pixels voisins
+    de l'image réduite en niveaux de gris. Stable au redimensionnement et à la
+    recompression, elle rapproche les recadrages quasi identiques d'une figure.
+    """
+    small = image.convert("L").resize((hash_size + 1, hash_size), Image.LANCZOS)
+    pixels = list(small.getdata())
+    bits = 0
+    for row in range(hash_size):
+        for col in range(hash_size):
+            left = pixels[row * (hash_size + 1) + col]
+            right = pixels[row * (hash_size + 1) + col + 1]
+            bits = (bits << 1) | (left > right)
+    return f"{bits:0{hash_size * hash_size // 4}x}"
+
+def dhash_distance(hash_a, hash_b):
+    return bin(int(hash_a, 16) ^ int(hash_b, 16)).count("1")
+
+def collapse_near_duplicate_images(image_paths, max_distance=DHASH_DUPLICATE_DISTANCE):
+    """
+    Regrouper les images quasi identiques (ex: même figure extraite par la passe
+    images intégrées et par la passe OpenCV) et ne garder que la plus grande de
+    chaque groupe. Retourne [(figure, dhash)] dans l'ordre d'origine.
+    """
+    kept = []  # [figure, dhash, nombre de pixels]
+    for index, image_path in enumerate(image_paths, 1):
+        try:
+            with open_figure(image_path) as image:
+                fingerprint = image_dhash(image)
+                pixel_count = image.width * image.height
+        except Exception as e:
+            logging.warning(f"Empreinte impossible pour la figure {index}: {e}")
+            kept.append([image_path, None, 0])
+            continue
+
+        duplicate = next((entry for entry in kept
+                          if entry[1] and dhash_distance(entry[1], fingerprint) <= max_distance), None)
+        if duplicate is None:
+            kept.append([image_path, fingerprint, pixel_count])
+        elif pixel_count > duplicate[2]:
+            duplicate[0], duplicate[1], duplicate[2] = image_path, fingerprint, pixel_count
+
+    if len(kept) < len(image_paths):
+        logging.info(f"Images quasi identiques regroupées: {len(image_paths)} -> {len(kept)}")
+    return [(image_path, fingerprint) for image_path, fingerprint, _ in kept]
+
+def _load_rgb(image_path):
+    """Image RGB sur fond blanc (les PNG transparents deviennent lisibles)"""
+    with open_figure(image_path) as image:
+        image.load()
+        if image.mode in ("RGBA", "LA", "P"):
+            image = image.convert("RGBA")
+            background = Image.new("RGB", image.size, "white")
+            background.paste(image, mask=image.split()[-1])
+            return background
+        return image.convert("RGB")
+
+def _encode_vision_image(image):
+    """PNG pour les figures au trait (peu de couleurs), JPEG sinon, en base64"""
+    buffer = io.BytesIO()
+    if image.getcolors(256) is not None:
+        image.save(buffer, format="PNG", optimize=True)
+    else:
+        image.save(buffer, format="JPEG", quality=90)
+    return base64.b64encode(buffer.getvalue()).decode('utf-8')
+
+def prepare_vision_image(image_path, max_side=None):
+    """
+    Réduire l'image à la résolution d'entrée du modèle de vision avant l'envoi :
+    au-delà, le modèle la redimensionne de toute façon, après un transfert et un
+    décodage inutiles (un recadrage à 300 DPI fait souvent plusieurs mégapixels).
+    """
+    max_side = max_side or get_config_value('LLM_VISION_MAX_SIDE', 768)
+    image = _load_rgb(image_path)
+    image.thumbnail((max_side, max_side), Image.LANCZOS)
+    return _encode_vision_image(image)
+
+def build_figure_montage(image_paths, max_side=None):
+    """
+    Assembler plusieurs petites figures en une planche 2 colonnes, chacune
+    surmontée de son étiquette "Figure k".
+    """
+    max_side = max_side or get_config_value('LLM_VISION_MAX_SIDE', 768)
+    columns = 1 if len(image_paths) == 1 else 2
+    rows = (len(image_paths) + columns - 1) // columns
+    label_height = max(20, max_side // 24)
+    cell = min(max_side // columns, max_side // rows - label_height)
+    font = ImageFont.load_default(size=label_height - 6)
+
+    montage = Image.new("RGB", (columns * cell, rows * (cell + label_height)), "white")
+    draw = ImageDraw.Draw(montage)
+    for k, image_path in enumerate(image_paths):
+        left = (k % columns) * cell
+        top = (k // columns) * (cell + label_height)
+        image = _load_rgb(image_path)
+        image.thumbnail((cell - 8, cell - 8), Image.LANCZOS)
+        montage.paste(image, (left + (cell - image.width) // 2, top + label_height + (cell - image.height) // 2))
+        draw.text((left + 4, top + 2), f"Figure {k + 1}", fill="black", font=font)
+        draw.rectangle([left, top, left + cell - 1, top + cell + label_height - 1], outline="gray")
+    return _encode_vision_image(montage)
+
+def split_montage_response(text, figure_count):
+    """Découper la réponse "Figure 1: ... Figure 2: ..." en une description par figure"""
+    parts = re.split(r'(?im)^[\s#*]*figure\s+(\d+)\s*[:.)\-]?[*\s]*', text)
+    descriptions = {}
+    for number, description in zip(parts[1::2], parts[2::2]):
+        number = int(number)
+        if 1 <= number <= figure_count and description.strip():
+            descriptions[number] = description.strip()
+    return descriptions if len(descriptions) == figure_count else None
+
+def is_small_figure(image_path, max_side=None):
+    """Figure assez petite pour une case de planche sans perte de lisibilité"""
+    max_side = max_side or get_config_value('LLM_VISION_MAX_SIDE', 768)
+    with open_figure(image_path) as image:
+        return max(image.size) <= max_side * 0.75
+
+def describe_montage(figures, use_cache=True, timeout=None):
+    """
+    Décrire plusieurs petites figures en un seul appel de vision.
+    ``figures`` = [(chemin, dhash)] ; retourne {dhash: description} ou None si
+    la réponse ne peut pas être découpée par figure.
+    """
+    model = get_config_value('DEFAULT_VISION_MODEL', 'granite3.2-vision')
+    options = dict(VISION_OPTIONS)
+    prompt = f"""
+    You are an expert in interpreting scientific figures from academic papers.
+    This image is a montage of {len(figures)} separate figures from a scientific paper, each labeled "Figure k" above it.
+    Describe each figure separately, only based on its visible elements (titles, labels, arrows, axes, tables, layout, visible terms).
+    Do NOT invent terminology or data not visible. Max 150 words per figure.
+    Answer with exactly one section per figure, each starting on its own line with "Figure k:".
+    """
+    response = llm_client.chat(
+        model=model,
+        messages=[{
+            "role": "user",
+            "content": prompt,
+            "images": [build_figure_montage([path for path, _ in figures])]
+        }],
+        options=options,
+        timeout=timeout
+    )
+    descriptions = split_montage_response(response["message"]["content"], len(figures))
+    if descriptions is None:
+        return None
+
+    results = {}
+    for k, (_, fingerprint) in enumerate(figures, 1):
+        results[fingerprint] = descriptions[k]
+        store_llm_result("describe_image_montage", model, DESCRIBE_MONTAGE_PROMPT_VERSION,
+                         fingerprint, options, descriptions[k])
+    return results
+
+def _cached_montage_description(fingerprint):
+    model = get_config_value('DEFAULT_VISION_MODEL', 'granite3.2-vision')
+    return lookup_llm_result("describe_image_montage", model, DESCRIBE_MONTAGE_PROMPT_VERSION,
+                             fingerprint, VISION_OPTIONS)
+
+def _describe_image(image_path, fingerprint=None, use_cache=True, timeout=None):
+    """Description d'une figure par le modèle de vision (lève une exception en cas d'échec)"""
+    prompt = f"""
         You are an expert in interpreting scientific figures from academic papers.
         You are shown a standalone image from a scientific paper. Describe the **visual content and structure** of the figure, and if possible, **infer its role or type** (e.g., pipeline diagram, comparison table, algorithm illustration), only based on visual elements (titles, labels, arrows, layout, visible terms).
         Guidelines:
@@ -109,40 +350,176 @@ def describe_image(image_path, image_number):
         4. Keep your description concise and professional (max 150 words).
         Now describe the image.
         """
-        response = ollama.chat(
-            model="granite3.2-vision",
+    model = get_config_value('DEFAULT_VISION_MODEL', 'granite3.2-vision')
+    options = dict(VISION_OPTIONS)
+    def generate():
+        response = llm_client.chat(
+            model=model,
             messages=[{
                 "role": "user",
                 "content": prompt,
-                "images": [image_binary]
+                "images": [prepare_vision_image(image_path)]
             }],
-            options={
-                "temperature": 0.2,
-                "top_p": 0.9,
-            }
+            options=options,
+            timeout=timeout
         )
         return response["message"]["content"]
+    # Clé = empreinte perceptuelle : la même figure (ou un logo récurrent) n'est décrite qu'une fois
+    if fingerprint is None:
+        with open_figure(image_path) as image:
+            fingerprint = image_dhash(image)
+    return cached_llm_result("describe_image", model, DESCRIBE_IMAGE_PROMPT_VERSION,
+                             fingerprint, options, generate, use_cache=use_cache)
+
+def describe_image(image_path, image_number, fingerprint=None, use_cache=True, timeout=None):
+    try:
+        return _describe_image(image_path, fingerprint, use_cache, timeout)
     except Exception as e:
         return f"Impossible de décrire l'image {image_number}: {str(e)}"
 
-def process_images_in_parallel(image_paths, max_workers=3):
+def _describe_montage_or_each(figures, use_cache=True, timeout=None):
+    """
+    Planche de figures, ou description figure par figure si la réponse est
+    inexploitable. Retourne ({numéro: description}, {numéro: erreur}).
+    ``timeout`` couvre la tâche entière, repli figure par figure compris.
+    """
+    deadline = time.monotonic() + timeout if timeout else None
+    try:
+        descriptions = describe_montage([(path, fingerprint) for _, path, fingerprint in figures], use_cache, timeout)
+    except Exception as e:
+        logging.warning(f"Planche de {len(figures)} figures échouée: {e}")
+        descriptions = None
+    if descriptions is not None:
+        return {number: descriptions[fingerprint] for number, _, fingerprint in figures}, {}
+
+    results, errors = {}, {}
+    for number, path, fingerprint in figures:
+        remaining = deadline - time.monotonic() if deadline else None
+        if remaining is not None and remaining <= 0:
+            errors[number] = "délai dépassé"
+            continue
+        try:
+            results[number] = _describe_image(path, fingerprint, use_cache, remaining)
+        except Exception as e:
+            errors[number] = str(e)
+    return results, errors
+
+def _describe_single(number, image_path, fingerprint, use_cache, timeout):
+    try:
+        return {number: _describe_image(image_path, fingerprint, use_cache, timeout)}, {}
+    except Exception as e:
+        return {}, {number: str(e)}
+
+def process_images_in_parallel(image_paths, max_workers=None, use_cache=True, progress_callback=None, image_timeout=None):
+    """
+    Décrire les figures en parallèle et retourner {numéro: description}.
+
+    - Le nombre de workers suit la limite de concurrence du client LLM partagé
+      pour le modèle de vision (``max_workers`` pour la forcer).
+    - Les résultats sont collectés dans l'ordre d'achèvement ; une figure en
+      échec ou trop lente (``image_timeout``) est simplement omise du résumé.
+      Le délai est transmis à l'appel de vision : sa requête HTTP est
+      interrompue à l'échéance, ce qui libère le créneau du modèle de vision.
+    - ``progress_callback(event)`` reçoit un dict à chaque étape
+      (started / image_done / image_failed / image_timeout / done).
+    """
+    image_timeout = image_timeout or get_config_value('LLM_VISION_IMAGE_TIMEOUT', 120)
     image_descriptions = {}
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        future_to_image = {
-            executor.submit(describe_image, image_path, i+1): (image_path, i+1)
-            for i, image_path in enumerate(image_paths)
-        }
-        for future in future_to_image:
-            image_path, image_number = future_to_image[future]
+    unique_images = collapse_near_duplicate_images(image_paths)
+
+    # Option : regrouper les petites figures par planches (un appel de vision par planche)
+    tasks = [(_describe_single, (number, image_path, fingerprint), [number])
+             for number, (image_path, fingerprint) in enumerate(unique_images, 1)]
+    if get_config_value('LLM_VISION_MONTAGE', False):
+        montage_size = get_config_value('LLM_VISION_MONTAGE_SIZE', 4)
+        small, tasks = [], []
+        for number, (image_path, fingerprint) in enumerate(unique_images, 1):
+            found, description = _cached_montage_description(fingerprint) if (use_cache and fingerprint) else (False, None)
+            if found:
+                image_descriptions[number] = description
+            elif fingerprint and is_small_figure(image_path):
+                small.append((number, image_path, fingerprint))
+            else:
+                tasks.append((_describe_single, (number, image_path, fingerprint), [number]))
+        tasks += [(_describe_montage_or_each, (group,), [number for number, _, _ in group])
+                  for group in (small[i:i + montage_size] for i in range(0, len(small), montage_size))]
+
+    total = len(unique_images)
+    completed = len(image_descriptions)
+
+    def notify(event, **details):
+        if progress_callback:
             try:
-                description = future.result()
-                image_descriptions[image_number] = description
+                progress_callback(dict(details, stage="image_descriptions", event=event,
+                                       completed=completed, total=total))
             except Exception as e:
-                print(f"Erreur lors du traitement de l'image {image_number}: {e}")
+                logging.warning(f"Callback de progression en erreur: {e}")
+
+    notify("started", duplicates_removed=len(image_paths) - total)
+    if not tasks:
+        notify("done", described=len(image_descriptions))
+        return image_descriptions
+
+    # Budget de concurrence partagé avec le reste du trafic LLM
+    if max_workers is None:
+        vision_model = get_config_value('DEFAULT_VISION_MODEL', 'granite3.2-vision')
+        max_workers = llm_client.get_llm_client().scheduler.concurrency_limit(vision_model)
+    max_workers = max(1, min(max_workers, len(tasks)))
+
+    # Délai par figure compté depuis son démarrage effectif ; le délai global couvre
+    # les vagues successives de workers. L'appel LLM s'arrête de lui-même à
+    # l'échéance ; la collecte cesse aussi d'attendre une tâche en retard (ex:
+    # préparation de l'image) pour ne pas retarder le résumé.
+    waves = (len(tasks) + max_workers - 1) // max_workers
+    overall_deadline = time.monotonic() + image_timeout * waves + 5
+    started_at = {}
+
+    def run_task(index, func, args):
+        started_at[index] = time.monotonic()
+        return func(*args, use_cache=use_cache, timeout=image_timeout)
+
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    future_to_image = {
+        executor.submit(run_task, index, func, args): (index, numbers)
+        for index, (func, args, numbers) in enumerate(tasks)
+    }
+    pending = set(future_to_image)
+    try:
+        while pending:
+            done, pending = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+            for future in done:
+                _, image_numbers = future_to_image[future]
+                try:
+                    results, errors = future.result()
+                except Exception as e:
+                    results, errors = {}, {number: str(e) for number in image_numbers}
+                image_descriptions.update(results)
+                completed += len(image_numbers)
+                for number in results:
+                    notify("image_done", image=number)
+                for number, error in errors.items():
+                    print(f"Erreur lors du traitement de l'image {number}: {error}")
+                    notify("image_failed", image=number, error=error)
+
+            now = time.monotonic()
+            for future in list(pending):
+                index, image_numbers = future_to_image[future]
+                task_start = started_at.get(index)
+                if now > overall_deadline or (task_start is not None and now - task_start > image_timeout):
+                    pending.discard(future)
+                    future.cancel()
+                    completed += len(image_numbers)
+                    for number in image_numbers:
+                        print(f"Délai dépassé pour l'image {number}, ignorée")
+                        notify("image_timeout", image=number)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    notify("done", described=len(image_descriptions))
     return image_descriptions
 
-def summarize_text(text):
-    prompt = f"""
+def _summary_prompt(text, source_label="Article text"):
+    return f"""
     You are an advanced language model specialized in detailed and insightful summarization.
     Your task is to read the text below and generate a comprehensive and structured summary.
     - The summary should be written in the same language as the input (French or English).
@@ -151,27 +528,149 @@ def summarize_text(text):
     - Emphasize the key points, context, motivations, and conclusions.
     - If applicable, structure the summary in sections or paragraphs (e.g., Introduction, Main Ideas, Conclusion).
     - Avoid overly general or vague phrasing. Be as specific as possible.
-    Article text:
+    {source_label}:
     {text}
     """
-    try:
-        response = ollama.chat(
+
+def _chunk_prompt(chunk, part_number, part_count):
+    return f"""
+    You are summarizing part {part_number} of {part_count} of a longer scientific article.
+    - Write the summary in the same language as the input (French or English).
+    - Keep every specific fact, number, method detail, result and limitation from this part.
+    - Do not introduce or conclude the whole article: only cover what this part contains.
+    Part {part_number}/{part_count}:
+    {chunk}
+    """
+
+def _reduce_prompt(partial_summaries):
+    return f"""
+    Below are summaries of consecutive parts of the same scientific article.
+    Merge them into one detailed summary, in the same language as the input.
+    - Keep the original order of the content and all specific facts, numbers and results.
+    - Remove repetitions between parts.
+    Summaries:
+    {partial_summaries}
+    """
+
+def _llm_summary(step, template_version, prompt, inputs, num_predict, use_cache):
+    """Appel llama3.2 pour une étape de résumé, avec cache de résultats"""
+    options = {
+        "temperature": 0.2,
+        "top_p": 0.9,
+        "num_predict": num_predict
+    }
+    def generate():
+        response = llm_client.chat(
             model="llama3.2",
             messages=[{
                 "role": "user",
                 "content": prompt
             }],
-            options={
-                "temperature": 0.2,
-                "top_p": 0.9,
-                "num_predict": 2048
-            }
+            options=options
         )
         return response["message"]["content"]
+    return cached_llm_result(step, "llama3.2", template_version, inputs, options, generate, use_cache=use_cache)
+
+def _pack_pieces(pieces, max_chars):
+    """Regrouper des morceaux consécutifs en blocs d'au plus max_chars"""
+    chunks, current = [], ""
+    for piece in pieces:
+        if current and len(current) + len(piece) > max_chars:
+            chunks.append(current)
+            current = ""
+        current += piece
+    if current:
+        chunks.append(current)
+    return [chunk for chunk in chunks if chunk.strip()]
+
+def split_text_for_summary(text, max_chars):
+    """
+    Découper le texte en blocs d'au plus max_chars, en coupant de préférence
+    aux titres de section, sinon aux fins de ligne.
+    """
+    starts = [0] + [m.start() for m in SECTION_HEADING_PATTERN.finditer(text) if m.start() > 0] + [len(text)]
+    pieces = []
+    for start, end in zip(starts, starts[1:]):
+        section = text[start:end]
+        if len(section) <= max_chars:
+            pieces.append(section)
+            continue
+        for line in section.splitlines(keepends=True):
+            pieces.extend(line[i:i + max_chars] for i in range(0, len(line), max_chars))
+    return _pack_pieces(pieces, max_chars)
+
+def _map_reduce_summary(text, max_chars, use_cache, timings):
+    """Résumés des blocs en parallèle, puis fusion hiérarchique jusqu'au résumé final"""
+    stage_start = time.perf_counter()
+    chunks = split_text_for_summary(text, max_chars)
+    timings["split"] = round(time.perf_counter() - stage_start, 3)
+    timings["chunks"] = len(chunks)
+
+    # Autant de résumés simultanés que le client LLM en admet pour le modèle
+    workers = llm_client.get_llm_client().scheduler.concurrency_limit("llama3.2")
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        stage_start = time.perf_counter()
+        partials = list(executor.map(
+            lambda item: _llm_summary("summarize_chunk", SUMMARIZE_CHUNK_PROMPT_VERSION,
+                                      _chunk_prompt(item[1], item[0], len(chunks)),
+                                      [item[1], item[0], len(chunks)], 1024, use_cache),
+            enumerate(chunks, 1)
+        ))
+        timings["map"] = round(time.perf_counter() - stage_start, 3)
+
+        stage_start = time.perf_counter()
+        levels = 0
+        while len(partials) > 1 and sum(len(p) for p in partials) > max_chars:
+            groups = _pack_pieces([p + "\n\n" for p in partials], max_chars)
+            if len(groups) == len(partials):
+                # Résumés partiels trop longs pour être regroupés : fusion deux à deux
+                groups = ["\n\n".join(partials[i:i + 2]) for i in range(0, len(partials), 2)]
+            partials = list(executor.map(
+                lambda group: _llm_summary("reduce_summaries", REDUCE_SUMMARIES_PROMPT_VERSION,
+                                           _reduce_prompt(group), group, 1024, use_cache),
+                groups
+            ))
+            levels += 1
+
+    combined = "\n\n".join(partials)
+    summary = _llm_summary("summarize_text_reduce", SUMMARIZE_TEXT_PROMPT_VERSION,
+                           _summary_prompt(combined, "Summaries of the consecutive parts of the article"),
+                           combined, 2048, use_cache)
+    timings["reduce"] = round(time.perf_counter() - stage_start, 3)
+    timings["reduce_levels"] = levels + 1
+    logging.info(f"Résumé map-reduce: {len(chunks)} blocs, {levels + 1} niveaux de fusion, "
+                 f"map {timings['map']}s, reduce {timings['reduce']}s")
+    return summary
+
+def summarize_text(text, use_cache=True, timings=None, compression_ratio=None):
+    """
+    Résumé structuré du texte de l'article. Le texte est d'abord nettoyé et
+    réduit à ses phrases les plus centrales (``compression_ratio`` : part des
+    tokens conservée, défaut ``LLM_SUMMARY_COMPRESSION_RATIO``). Un texte encore
+    long est découpé en blocs résumés en parallèle puis fusionnés (map-reduce).
+    ``timings`` (dict optionnel) reçoit la durée de chaque étape.
+    """
+    timings = timings if timings is not None else {}
+    max_chars = get_config_value('LLM_SUMMARY_CHUNK_CHARS', 12000)
+    if compression_ratio is None:
+        compression_ratio = get_config_value('LLM_SUMMARY_COMPRESSION_RATIO', 0.5)
+    try:
+        stage_start = time.perf_counter()
+        text, stats = compress_text(text, compression_ratio,
+                                    get_config_value('LLM_SUMMARY_MIN_INPUT_TOKENS', 3000))
+        timings["compression"] = dict(stats, duration=round(time.perf_counter() - stage_start, 3))
+        print(f"✂️ Pré-compression: {stats['original_tokens']} -> {stats['compressed_tokens']} tokens estimés")
+        if len(text) <= max_chars:
+            stage_start = time.perf_counter()
+            summary = _llm_summary("summarize_text", SUMMARIZE_TEXT_PROMPT_VERSION,
+                                   _summary_prompt(text), text, 2048, use_cache)
+            timings["summarize"] = round(time.perf_counter() - stage_start, 3)
+            return summary
+        return _map_reduce_summary(text, max_chars, use_cache, timings)
     except Exception as e:
         return f"Erreur lors de la génération du résumé du texte: {str(e)}"
 
-def create_final_summary(text_summary, image_descriptions):
+def create_final_summary(text_summary, image_descriptions, use_cache=True):
     image_descriptions_formatted = ""
     for img_num, description in sorted(image_descriptions.items()):
         image_descriptions_formatted += f"{description.strip()}\n\n"
@@ -196,78 +695,153 @@ def create_final_summary(text_summary, image_descriptions):
     {image_descriptions_formatted}
     Now generate the final scientific summary, integrating all information into a single coherent document.
     """
-    try:
-        response = ollama.chat(
+    options = {
+        "temperature": 0.2,
+        "top_p": 0.9,
+        "num_predict": 3072
+    }
+    def generate():
+        response = llm_client.chat(
             model="DeepSeek-R1",
             messages=[{
                 "role": "user",
                 "content": prompt
             }],
-            options={
-                "temperature": 0.2,
-                "top_p": 0.9,
-                "num_predict": 3072
-            }
+            options=options
         )
         raw_answer = response['message']['content']
-        cleaned_answer = clean_think_blocks(raw_answer)
-        return cleaned_answer
+        return clean_think_blocks(raw_answer)
+    try:
+        inputs = [text_summary, image_descriptions_formatted]
+        return cached_llm_result("create_final_summary", "DeepSeek-R1", FINAL_SUMMARY_PROMPT_VERSION,
+                                 inputs, options, generate, use_cache=use_cache)
     except Exception as e:
         return f"Erreur lors de la génération du résumé final: {str(e)}"
 
-def summarize_document_with_vision(text, image_paths):
-    text_summary = summarize_text(text)
-    image_descriptions = process_images_in_parallel(image_paths)
-    final_summary = create_final_summary(text_summary, image_descriptions)
+def _timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, round(time.perf_counter() - start, 3)
+
+def summarize_document_with_vision(text, image_paths, use_cache=True, timings=None, progress_callback=None,
+                                   compression_ratio=None):
+    """
+    Résumé du texte et description des figures en parallèle (étapes indépendantes),
+    puis résumé final dès que les deux sont prêts. ``timings`` (dict optionnel)
+    reçoit la durée de chaque étape ; ``progress_callback`` reçoit le début et la
+    fin de chaque étape, et la progression de la description des figures.
+    ``compression_ratio`` est transmis à ``summarize_text``.
+    """
+    timings = timings if timings is not None else {}
+    start = time.perf_counter()
+    text_timings = {}
+
+    def notify(stage, event):
+        if progress_callback:
+            try:
+                progress_callback({"stage": stage, "event": event})
+            except Exception as e:
+                logging.warning(f"Callback de progression en erreur: {e}")
+
+    def text_summary_step():
+        notify("text_summary", "started")
+        result = summarize_text(text, use_cache=use_cache, timings=text_timings,
+                                compression_ratio=compression_ratio)
+        notify("text_summary", "done")
+        return result
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        text_future = executor.submit(_timed, text_summary_step)
+        images_future = executor.submit(_timed, process_images_in_parallel, image_paths,
+                                        use_cache=use_cache, progress_callback=progress_callback)
+        text_summary, timings["text_summary"] = text_future.result()
+        image_descriptions, timings["image_descriptions"] = images_future.result()
+    timings["text_summary_stages"] = text_timings
+    timings["images"] = len(image_paths)
+    notify("final_summary", "started")
+    final_summary, timings["final_summary"] = _timed(
+        create_final_summary, text_summary, image_descriptions, use_cache=use_cache
+    )
+    notify("final_summary", "done")
+    timings["total"] = round(time.perf_counter() - start, 3)
     return final_summary
 
-def translate_text(text, target_lang_code):
-    language_name = {
-        "fr": "French",
-        "en": "English",
-        "de": "German",
-        "es": "Spanish",
-        "it": "Italian"
-    }.get(target_lang_code, "English")
+TRANSLATION_MODEL = "DeepSeek-R1"
+
+TRANSLATION_LANGUAGES = {
+    "fr": "French",
+    "en": "English",
+    "de": "German",
+    "es": "Spanish",
+    "it": "Italian"
+}
+
+def split_text_for_translation(text, max_chars):
+    """
+    Regrouper les paragraphes consécutifs en blocs d'au plus max_chars ; un
+    paragraphe trop long est coupé entre deux phrases.
+    """
+    pieces = []
+    for paragraph in re.split(r'\n\s*\n', text.strip()):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if len(paragraph) <= max_chars:
+            pieces.append(paragraph + "\n\n")
+            continue
+        sentences = re.split(r'(?<=[.!?])\s+', paragraph)
+        pieces.extend(sentence + " " for sentence in sentences[:-1])
+        pieces.append(sentences[-1] + "\n\n")
+    return [chunk.strip() for chunk in _pack_pieces(pieces, max_chars)]
+
+def _translate_chunk(chunk, target_lang_code, use_cache=True):
+    language_name = TRANSLATION_LANGUAGES.get(target_lang_code, "English")
     prompt = f"""
 You are a professional translator.
 Please translate the following text into {language_name}.
 Only return the translated version. Do not add explanations.
 
 Text to translate:
-{text}
+{chunk}
     """.strip()
-    try:
-        response = ollama.chat(
-            model="DeepSeek-R1",
+    def generate():
+        response = llm_client.chat(
+            model=TRANSLATION_MODEL,
             messages=[{"role": "user", "content": prompt}]
         )
         result = response["message"]["content"].strip()
-        cleaned_answer = clean_think_blocks(result)
-        return cleaned_answer
+        return clean_think_blocks(result)
+    # Clé = (empreinte du bloc source, langue cible, modèle)
+    return cached_llm_result("translate_chunk", TRANSLATION_MODEL, TRANSLATE_PROMPT_VERSION,
+                             [chunk, target_lang_code], None, generate, use_cache=use_cache)
+
+def translate_text(text, target_lang_code, use_cache=True):
+    """
+    Traduire le texte bloc de paragraphes par bloc, en parallèle dans la limite
+    de générations simultanées du modèle, puis réassembler dans l'ordre.
+    """
+    language_name = TRANSLATION_LANGUAGES.get(target_lang_code, "English")
+    def generate():
+        chunks = split_text_for_translation(text, get_config_value('LLM_TRANSLATE_CHUNK_CHARS', 2000))
+        if len(chunks) <= 1:
+            return _translate_chunk(text.strip(), target_lang_code, use_cache)
+        workers = llm_client.get_llm_client().scheduler.concurrency_limit(TRANSLATION_MODEL)
+        with ThreadPoolExecutor(max_workers=min(workers, len(chunks))) as executor:
+            translations = list(executor.map(
+                lambda chunk: _translate_chunk(chunk, target_lang_code, use_cache), chunks
+            ))
+        return "\n\n".join(translations)
+    try:
+        return cached_llm_result("translate_text", TRANSLATION_MODEL, TRANSLATE_PROMPT_VERSION,
+                                 [text, language_name], None, generate, use_cache=use_cache)
     except Exception as e:
         return f"❌ Une erreur est survenue lors de la traduction : {e}"
 
 async def generate_audio(summary_text, lang_code):
-    voice_map = {
-        "fr": "fr-FR-DeniseNeural",
-        "en": "en-US-JennyNeural",
-        "de": "de-DE-KatjaNeural",
-        "es": "es-ES-ElviraNeural",
-        "it": "it-IT-ElsaNeural"
-    }
-    voice = voice_map.get(lang_code, "en-US-JennyNeural")
-    communicate = edge_tts.Communicate(summary_text, voice)
-
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as tmp:
-        path = tmp.name
-
-    await communicate.save(path)
-
-    with open(path, "rb") as f:
-        mp3_bytes = f.read()
-
-    return io.BytesIO(mp3_bytes)
+    """Audio complet du résumé en mémoire (voir stream_speech pour le streaming)"""
+    from backend.services.tts_service import synthesize_cached, voice_for_language
+    audio_bytes = await synthesize_cached(summary_text, voice_for_language(lang_code))
+    return io.BytesIO(audio_bytes)
 
 def create_pdf(summary_text, lang_code):
     buffer = io.BytesIO()
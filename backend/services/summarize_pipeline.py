@@ -0,0 +1,147 @@
+# backend/services/summarize_pipeline.py
+"""
+Pipeline de résumé d'un PDF : extraction, résumé du texte et description des
+figures, résumé final, traduction
+
+Partagé par la route synchrone ``/summarize`` et par les jobs asynchrones
+(``job_manager``). Chaque étape signale son avancement à ``progress`` sous
+forme d'événements ``{"stage": ..., "event": ...}``.
+"""
+
+import logging
+import time
+
+# Les services (PyMuPDF, OpenCV, langdetect...) sont importés à la demande
+
+SUMMARY_STAGES = ("extraction", "text_summary", "image_descriptions", "final_summary", "translation")
+
+
+class DocumentError(ValueError):
+    """Le document ne peut pas être résumé (ex: aucun texte extractible)"""
+
+
+def is_error_text(text):
+    """Les services renvoient leurs erreurs sous forme de texte : ne jamais les mettre en cache"""
+    return not text or text.startswith(('Erreur', '❌'))
+
+
+def _notify(progress, stage, event, **details):
+    if progress:
+        try:
+            progress(dict(details, stage=stage, event=event))
+        except Exception as e:
+            logging.warning(f"Callback de progression en erreur: {e}")
+
+
+def summarize_document(app, document_id, pdf_stream, lang='fr', use_cache=True, fanout=False,
+                       article_id=None, timings=None, progress=None, compression_ratio=None):
+    """
+    Résumer le PDF ``document_id`` (contenu dans ``pdf_stream``) et le traduire
+    dans ``lang``. Les artefacts déjà calculés sont relus depuis le cache du
+    document. Nécessite un contexte d'application ; ``app`` sert au job de
+    traduction multilingue (``fanout``). Lève DocumentError si le PDF n'a pas
+    de texte extractible. ``compression_ratio`` : part des tokens du texte
+    conservée avant le résumé (défaut ``LLM_SUMMARY_COMPRESSION_RATIO``) ; un
+    résumé en cache calculé avec un autre taux n'est pas réutilisé.
+    """
+    from langdetect import detect
+    from backend.services.artifact_store import get_artifact_store
+    from backend.services.summarization_service import (
+        extract_from_pdf, summarize_document_with_vision, translate_text, TRANSLATION_MODEL
+    )
+    from backend.services.translation_jobs import start_translation_fanout, store_translation
+    from backend.utils.helpers import get_config_value
+
+    store = get_artifact_store()
+    timings = timings if timings is not None else {}
+    if compression_ratio is None:
+        compression_ratio = get_config_value('LLM_SUMMARY_COMPRESSION_RATIO', 0.5)
+
+    summary_artifact = store.get_json(document_id, 'summary') if use_cache else None
+    if summary_artifact and summary_artifact.get('compression_ratio', compression_ratio) != compression_ratio:
+        summary_artifact = None
+    if summary_artifact:
+        # Article déjà résumé : servi depuis le cache d'artefacts
+        summary = summary_artifact['summary']
+        detected_lang = summary_artifact['lang']
+        timings['from_cache'] = True
+        for stage in SUMMARY_STAGES[:-1]:
+            _notify(progress, stage, "cached")
+    else:
+        # Charger le premier modèle du pipeline pendant l'extraction du PDF
+        from backend.services import llm_client
+        llm_client.prewarm(["llama3.2"])
+
+        text = store.get_text(document_id) if use_cache else None
+        image_paths = store.get_figures(document_id) if text is not None else None
+        if text is None or image_paths is None:
+            # Extraction texte + images
+            _notify(progress, "extraction", "started")
+            start = time.perf_counter()
+            text, image_paths = extract_from_pdf(pdf_stream)
+            timings['extraction'] = round(time.perf_counter() - start, 3)
+            if not text.strip():
+                raise DocumentError("Impossible d'extraire le texte du PDF.")
+            # Le texte en dernier : il marque une extraction complète
+            store.put_figures(document_id, image_paths)
+            store.put_text(document_id, text)
+            _notify(progress, "extraction", "done", figures=len(image_paths))
+        else:
+            _notify(progress, "extraction", "cached")
+
+        # Génération du résumé avancé
+        summary = summarize_document_with_vision(text, image_paths, use_cache=use_cache,
+                                                 timings=timings, progress_callback=progress,
+                                                 compression_ratio=compression_ratio)
+
+        # Détection de la langue du résumé généré
+        try:
+            detected_lang = detect(summary)
+        except Exception:
+            detected_lang = 'en'
+
+        summary_artifact = {'summary': summary, 'lang': detected_lang, 'translations': {},
+                            'compression_ratio': compression_ratio}
+        if not is_error_text(summary):
+            store.put_json(document_id, 'summary', summary_artifact)
+
+    # Traduction si nécessaire
+    translated_summary = summary
+    if lang and lang != detected_lang:
+        translated_summary = summary_artifact['translations'].get(lang) if use_cache else None
+        if translated_summary is None:
+            _notify(progress, "translation", "started", target_lang=lang)
+            start = time.perf_counter()
+            translated_summary = translate_text(summary, lang, use_cache=use_cache)
+            timings['translation'] = round(time.perf_counter() - start, 3)
+            if not is_error_text(summary) and not is_error_text(translated_summary):
+                summary_artifact['translations'][lang] = translated_summary
+                store_translation(document_id, lang, translated_summary, detected_lang,
+                                  TRANSLATION_MODEL, article_id)
+            _notify(progress, "translation", "done", target_lang=lang)
+        else:
+            _notify(progress, "translation", "cached", target_lang=lang)
+    else:
+        _notify(progress, "translation", "skipped")
+
+    fanout_job = None
+    if fanout and not is_error_text(summary):
+        languages = [code for code in get_config_value('SUPPORTED_LANGUAGES', {})
+                     if code not in (detected_lang, lang)
+                     and not (use_cache and code in summary_artifact['translations'])]
+        if languages:
+            fanout_job = start_translation_fanout(
+                app, document_id, summary, detected_lang,
+                languages, article_id=article_id, use_cache=use_cache
+            )
+
+    return {
+        'document_id': document_id,
+        'summary': summary,
+        'lang': detected_lang,
+        'translated_summary': translated_summary,
+        'target_lang': lang,
+        'translations': sorted(summary_artifact['translations']),
+        'fanout': fanout_job,
+        'timings': timings
+    }
@@ -0,0 +1,281 @@
+# backend/services/text_compression.py
+"""
+Pré-compression extractive du texte d'un article avant le résumé par le LLM
+
+Le texte brut de ``page.get_text()`` contient en-têtes / pieds de page répétés,
+numéros de page et bibliographie : autant de tokens de prompt inutiles. Étapes :
+1. nettoyage : lignes répétées en haut / bas de page, numéros de page, lignes
+   arXiv / DOI / copyright, section des références (annexes conservées) ;
+2. score des phrases par TextRank sur la similarité cosinus TF-IDF (NumPy,
+   matrice creuse) ;
+3. sélection des meilleures phrases jusqu'au budget de tokens, remises dans
+   l'ordre du texte sous leurs titres de section inchangés.
+"""
+
+import math
+import re
+from collections import Counter
+
+import numpy as np
+
+# Estimation grossière (même ordre de grandeur que le client LLM)
+CHARS_PER_TOKEN = 3.5
+
+# Séparateur de pages du texte extrait (saut de page, comme pdftotext)
+PAGE_BREAK = "\f"
+
+# Une ligne courte présente au moins autant de fois est un en-tête / pied de page
+BOILERPLATE_MIN_REPEATS = 3
+BOILERPLATE_MAX_LINE_CHARS = 120
+# Lignes non vides examinées en haut et en bas de chaque page (en-têtes répétés)
+PAGE_EDGE_LINES = 3
+
+# Lignes d'édition, retirées où qu'elles soient
+BOILERPLATE_LINE_PATTERN = re.compile(
+    r'^\s*(?:page\s+\d+(?:\s+(?:of|sur|/)\s+\d+)?'
+    r'|arxiv:\S+.*|doi:\s*\S+|https?://\S+|\S+@\S+\.\w+'
+    r'|(?:©|\(c\)|copyright).*|preprint\b.*|under review\b.*)\s*$',
+    re.IGNORECASE
+)
+# Numéros de page ("12", "xii", "3 / 10") : retirés seulement en première ou
+# dernière ligne d'une page, un nombre seul ailleurs étant souvent une valeur
+# de tableau
+PAGE_NUMBER_PATTERN = re.compile(r'^\s*(?:\d{1,4}|[ivxlc]{1,7}|\d+\s*/\s*\d+)\s*$', re.IGNORECASE)
+# Titres de section d'un article ("2.1 Related Work", "Methods", "CONCLUSION"...),
+# conservés tels quels par la compression et points de découpe du résumé map-reduce.
+# Un titre numéroté est une ligne courte, avec majuscule et sans ponctuation de phrase
+SECTION_HEADING_PATTERN = re.compile(
+    r'^[ \t]*(?:\d+(?:\.\d+)*\.?[ \t]+(?-i:[A-Z])[^\n.!?]{2,60}'
+    r'|(?:abstract|introduction|related work|background|method(?:s|ology)?|materials and methods'
+    r'|experiments?|evaluation|results|discussion|conclusions?|acknowledge?ments?|references)[ \t]*:?)[ \t]*$',
+    re.IGNORECASE | re.MULTILINE
+)
+REFERENCES_HEADING_PATTERN = re.compile(
+    r'^[ \t]*(?:\d+\.?[ \t]+)?(?:references|bibliography|références|bibliographie|works cited)[ \t]*:?[ \t]*$',
+    re.IGNORECASE | re.MULTILINE
+)
+APPENDIX_HEADING_PATTERN = re.compile(
+    r'^[ \t]*(?:[A-Z]\.?[ \t]+)?(?:appendix|appendices|annexe|supplementary material)\b[^\n]{0,80}$',
+    re.IGNORECASE | re.MULTILINE
+)
+SENTENCE_SPLIT_PATTERN = re.compile(r'(?<=[.!?])\s+(?=[A-Z0-9(\[])')
+WORD_PATTERN = re.compile(r'[^\W\d_]{3,}', re.UNICODE)
+LETTER_PATTERN = re.compile(r'[^\W\d_]', re.UNICODE)
+
+TEXTRANK_DAMPING = 0.85
+TEXTRANK_ITERATIONS = 50
+# Les premières phrases (résumé de l'article, introduction) sont favorisées
+LEAD_SENTENCES = 5
+LEAD_BONUS = 1.5
+
+
+def estimate_tokens(text):
+    return int(len(text) / CHARS_PER_TOKEN)
+
+
+def _page_edges(lines, depth):
+    """
+    Indices des ``depth`` premières et dernières lignes non vides de chaque
+    page (pages séparées par PAGE_BREAK)
+    """
+    edges, page = set(), []
+    for index, line in enumerate(lines + [PAGE_BREAK]):
+        if PAGE_BREAK in line:
+            edges.update(page[:depth] + page[-depth:])
+            page = []
+        elif line.strip():
+            page.append(index)
+    return edges
+
+
+def strip_boilerplate(text):
+    """
+    Retirer en-têtes / pieds de page répétés, numéros de page et lignes d'édition.
+
+    Une ligne répétée doit contenir des lettres (sinon c'est une valeur de
+    tableau). Si le texte porte ses sauts de page (PAGE_BREAK), seules les
+    lignes en haut ou en bas de page comptent comme en-têtes et les numéros de
+    page sont reconnus ; sinon les nombres seuls sont tous conservés.
+    """
+    # split et non splitlines, qui coupe aussi sur le saut de page
+    lines = text.replace(PAGE_BREAK, "\n" + PAGE_BREAK + "\n").split("\n")
+    paginated = PAGE_BREAK in text
+    edges = _page_edges(lines, PAGE_EDGE_LINES) if paginated else None
+    page_ends = _page_edges(lines, 1) if paginated else set()
+
+    def candidate(index, line):
+        stripped = line.strip()
+        if not stripped or len(stripped) > BOILERPLATE_MAX_LINE_CHARS:
+            return False
+        # Une ligne sans lettres répétée est une valeur de tableau, pas un en-tête
+        return (not paginated or index in edges) and bool(LETTER_PATTERN.search(stripped))
+
+    counts = Counter(line.strip() for index, line in enumerate(lines) if candidate(index, line))
+    repeated = {line for line, count in counts.items() if count >= BOILERPLATE_MIN_REPEATS}
+    kept = []
+    for index, line in enumerate(lines):
+        if PAGE_BREAK in line or BOILERPLATE_LINE_PATTERN.match(line):
+            continue
+        if candidate(index, line) and line.strip() in repeated:
+            continue
+        if index in page_ends and PAGE_NUMBER_PATTERN.match(line):
+            continue
+        kept.append(line)
+    return "\n".join(kept)
+
+
+def strip_references(text):
+    """
+    Couper la section des références (dernier titre "References" de la seconde
+    moitié du texte) ; une annexe qui la suit est conservée.
+    """
+    headings = [m for m in REFERENCES_HEADING_PATTERN.finditer(text) if m.start() > len(text) // 2]
+    if not headings:
+        return text
+    start = headings[-1].start()
+    appendix = APPENDIX_HEADING_PATTERN.search(text, headings[-1].end())
+    return text[:start] + (text[appendix.start():] if appendix else "")
+
+
+def split_sections(text):
+    """[(ligne de titre ou None, corps)] : découpage aux titres de section"""
+    matches = list(SECTION_HEADING_PATTERN.finditer(text))
+    sections = [(None, text[:matches[0].start()] if matches else text)]
+    for match, following in zip(matches, matches[1:] + [None]):
+        sections.append((match.group(), text[match.end():following.start() if following else len(text)]))
+    return sections
+
+
+def split_sentences(text):
+    """
+    Phrases du texte avec le numéro de leur paragraphe [(paragraphe, phrase)],
+    les retours à la ligne de mise en page étant recollés.
+    """
+    sentences = []
+    for number, paragraph in enumerate(re.split(r'\n\s*\n', text)):
+        # Mots coupés en fin de ligne ("infor-\nmation") puis lignes recollées
+        paragraph = re.sub(r'(\w)-\n(\w)', r'\1\2', paragraph)
+        paragraph = re.sub(r'\s*\n\s*', ' ', paragraph).strip()
+        if paragraph:
+            sentences.extend((number, s.strip()) for s in SENTENCE_SPLIT_PATTERN.split(paragraph) if s.strip())
+    return sentences
+
+
+def _tfidf_matrix(sentences):
+    """
+    Matrice TF-IDF (phrases x termes) creuse, normalisée L2, au format
+    coordonnées : (lignes, colonnes, valeurs, nombre de termes)
+    """
+    tokenized = [Counter(WORD_PATTERN.findall(sentence.lower())) for sentence in sentences]
+    document_frequency = Counter(term for counts in tokenized for term in counts)
+    vocabulary = {term: index for index, term in enumerate(document_frequency)}
+    idf = {term: math.log(len(sentences) / frequency) + 1.0 for term, frequency in document_frequency.items()}
+    rows, columns, values = [], [], []
+    for row, counts in enumerate(tokenized):
+        for term, count in counts.items():
+            rows.append(row)
+            columns.append(vocabulary[term])
+            values.append((1.0 + math.log(count)) * idf[term])
+    rows = np.asarray(rows, dtype=np.int64)
+    columns = np.asarray(columns, dtype=np.int64)
+    values = np.asarray(values, dtype=np.float64)
+    norms = np.sqrt(np.bincount(rows, weights=values ** 2, minlength=len(sentences)))
+    values /= np.maximum(norms[rows], 1e-9)
+    return rows, columns, values, len(vocabulary)
+
+
+def textrank_scores(sentences):
+    """
+    Score TextRank de chaque phrase (graphe pondéré par la similarité cosinus
+    TF-IDF). La matrice de similarité S = M·Mᵀ n'est jamais construite : chaque
+    itération calcule S·x = M·(Mᵀ·x) sur la matrice creuse, en mémoire
+    proportionnelle au nombre de mots et non au carré du nombre de phrases.
+    """
+    count = len(sentences)
+    if count < 3:
+        return np.ones(count, dtype=np.float32)
+    rows, columns, values, terms = _tfidf_matrix(sentences)
+
+    def similarity_dot(x):
+        # S·x sans la diagonale (similarité d'une phrase avec elle-même)
+        projected = np.bincount(columns, weights=values * x[rows], minlength=terms)
+        return np.bincount(rows, weights=values * projected[columns], minlength=count) - self_similarity * x
+
+    self_similarity = np.bincount(rows, weights=values ** 2, minlength=count)
+    row_sums = similarity_dot(np.ones(count))
+    linked = row_sums > 1e-9
+    inverse_sums = np.divide(1.0, row_sums, out=np.zeros(count), where=linked)
+    scores = np.full(count, 1.0 / count)
+    for _ in range(TEXTRANK_ITERATIONS):
+        # Une phrase sans lien répartit son score uniformément
+        spread = scores[~linked].sum() / count
+        updated = (1 - TEXTRANK_DAMPING) / count + TEXTRANK_DAMPING * (similarity_dot(scores * inverse_sums) + spread)
+        if np.abs(updated - scores).sum() < 1e-6:
+            scores = updated
+            break
+        scores = updated
+    scores[:LEAD_SENTENCES] *= LEAD_BONUS
+    return scores
+
+
+def compress_text(text, compression_ratio=0.5, min_tokens=3000):
+    """
+    Texte nettoyé puis réduit aux phrases les plus centrales. Les titres de
+    section sont recopiés tels quels (le résumé map-reduce découpe le texte à
+    ces titres) ; dans chaque section, les phrases retenues restent dans leur
+    ordre, une par ligne, paragraphes séparés par une ligne vide.
+
+    Args:
+        text: Texte brut de l'article
+        compression_ratio: Part des tokens (du texte nettoyé) à conserver ; 1.0 = nettoyage seul
+        min_tokens: Budget minimal : un texte nettoyé plus court est conservé en entier
+
+    Returns:
+        (texte compressé, statistiques)
+    """
+    original_tokens = estimate_tokens(text)
+    cleaned = strip_references(strip_boilerplate(text))
+    cleaned_tokens = estimate_tokens(cleaned)
+    budget = max(int(min_tokens), int(cleaned_tokens * compression_ratio))
+    stats = {
+        'original_tokens': original_tokens,
+        'cleaned_tokens': cleaned_tokens,
+        'budget_tokens': budget,
+    }
+
+    if compression_ratio >= 1.0 or cleaned_tokens <= budget:
+        stats['compressed_tokens'] = cleaned_tokens
+        return cleaned, stats
+
+    sections = split_sections(cleaned)
+    numbered = [(section, paragraph, sentence)
+                for section, (_, body) in enumerate(sections)
+                for paragraph, sentence in split_sentences(body)]
+    sentences = [sentence for _, _, sentence in numbered]
+    scores = textrank_scores(sentences)
+    # Les titres sont conservés d'office
+    used = sum(estimate_tokens(heading) + 1 for heading, _ in sections if heading)
+    selected = set()
+    for index in np.argsort(-scores, kind='stable'):
+        tokens = estimate_tokens(sentences[index]) + 1
+        if used + tokens > budget:
+            continue
+        selected.add(int(index))
+        used += tokens
+
+    # Phrases retenues dans l'ordre du texte, titres et paragraphes conservés
+    kept = [{} for _ in sections]
+    for index in sorted(selected):
+        section, paragraph, sentence = numbered[index]
+        kept[section].setdefault(paragraph, []).append(sentence)
+    blocks = []
+    for (heading, _), paragraphs in zip(sections, kept):
+        body = "\n\n".join("\n".join(paragraph) for paragraph in paragraphs.values())
+        block = "\n".join(part for part in (heading, body) if part)
+        if block:
+            blocks.append(block)
+    compressed = "\n\n".join(blocks)
+    stats['sentences'] = len(sentences)
+    stats['kept_sentences'] = len(selected)
+    stats['compressed_tokens'] = estimate_tokens(compressed)
+    return compressed, stats
@@ -0,0 +1,176 @@
+# backend/services/translation_jobs.py
+"""
+Traduction d'un résumé dans toutes les langues configurées, en tâche de fond
+
+Le résumé source est traduit une seule fois par langue ; chaque traduction
+est enregistrée dans le cache d'artefacts du document et dans la table
+``article_translation``, si bien qu'un changement de langue ultérieur est
+immédiat. Un seul job par document : une seconde demande rejoint le job en cours.
+Comme pour les jobs de résumé, l'état d'un job terminé est conservé
+``SUMMARIZE_JOB_TTL`` secondes.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy.exc import IntegrityError
+
+from backend.utils.helpers import get_config_value
+
+# document_id -> état du job
+_fanout_jobs = {}
+_fanout_lock = threading.Lock()
+
+
+def _prune_fanout_jobs():
+    """Oublier les jobs terminés depuis plus de SUMMARIZE_JOB_TTL secondes (verrou détenu)"""
+    limit = time.time() - get_config_value('SUMMARIZE_JOB_TTL', 3600)
+    expired = [document_id for document_id, job in _fanout_jobs.items()
+               if job.get('finished_at') is not None and job['finished_at'] < limit]
+    for document_id in expired:
+        del _fanout_jobs[document_id]
+
+
+def save_translation(document_id, language, summary, source_language=None, model=None, article_id=None):
+    """
+    Enregistrer (ou remplacer) la traduction d'un résumé et la lier à l'article
+    ``article_id`` (sans retirer les liens des autres articles du même document) ;
+    nécessite un contexte d'application
+    """
+    from backend.models.database import db
+    from backend.models.article import Article, ArticleTranslation
+
+    for _ in range(2):
+        translation = ArticleTranslation.query.filter_by(document_id=document_id, language=language).first()
+        if translation is None:
+            translation = ArticleTranslation(document_id=document_id, language=language)
+            db.session.add(translation)
+        translation.summary = summary
+        translation.source_language = source_language
+        translation.model = model
+        if article_id:
+            article = Article.query.get(article_id)
+            if article is not None and article not in translation.articles:
+                translation.articles.append(article)
+        try:
+            db.session.commit()
+            return translation
+        except IntegrityError:
+            # Même langue enregistrée en parallèle par une autre requête : la mettre à jour
+            db.session.rollback()
+    return None
+
+
+def store_translation(document_id, language, summary, source_language=None, model=None, article_id=None):
+    """Ajouter la traduction à l'artefact 'summary' du document et l'enregistrer en base"""
+    from backend.services.artifact_store import get_artifact_store
+
+    def with_translation(artifact):
+        if artifact is None:
+            return None
+        artifact.setdefault('translations', {})[language] = summary
+        return artifact
+
+    get_artifact_store().update_json(document_id, 'summary', with_translation)
+    save_translation(document_id, language, summary, source_language, model, article_id)
+
+
+def get_translation_fanout(document_id):
+    """État du job de traduction d'un document (copie), ou None"""
+    with _fanout_lock:
+        _prune_fanout_jobs()
+        job = _fanout_jobs.get(document_id)
+        return _snapshot(job) if job else None
+
+
+def _snapshot(job):
+    return {
+        'status': job['status'],
+        'languages': list(job['languages']),
+        'completed': list(job['completed']),
+        'errors': dict(job['errors']),
+        'duration': job.get('duration')
+    }
+
+
+def start_translation_fanout(app, document_id, summary, source_language, languages,
+                             article_id=None, use_cache=True):
+    """
+    Lancer la traduction de ``summary`` dans ``languages`` en arrière-plan.
+    Retourne l'état du job (celui déjà en cours pour ce document le cas échéant).
+    """
+    with _fanout_lock:
+        _prune_fanout_jobs()
+        job = _fanout_jobs.get(document_id)
+        if job and job['status'] in ('queued', 'running'):
+            return _snapshot(job)
+        job = {
+            'status': 'queued',
+            'languages': list(languages),
+            'completed': [],
+            'errors': {},
+            'finished_at': None
+        }
+        _fanout_jobs[document_id] = job
+
+    thread = threading.Thread(
+        target=_run_fanout,
+        args=(app, document_id, job, summary, source_language, article_id, use_cache),
+        name=f'translation-fanout-{document_id[:8]}',
+        daemon=True
+    )
+    thread.start()
+    return get_translation_fanout(document_id)
+
+
+def _run_fanout(app, document_id, job, summary, source_language, article_id, use_cache):
+    try:
+        _translate_all(app, document_id, job, summary, source_language, article_id, use_cache)
+    except Exception as e:
+        print(f"⚠️ Job de traduction {document_id[:8]} échoué: {e}")
+        with _fanout_lock:
+            job['errors']['*'] = str(e)
+    finally:
+        with _fanout_lock:
+            job['status'] = 'completed' if not job['errors'] else 'error'
+            job['finished_at'] = time.time()
+
+
+def _translate_all(app, document_id, job, summary, source_language, article_id, use_cache):
+    from backend.services import llm_client
+    from backend.services.summarization_service import translate_text, TRANSLATION_MODEL
+
+    start = time.perf_counter()
+    with app.app_context():
+        with _fanout_lock:
+            job['status'] = 'running'
+        # Toutes les langues passent par le même modèle : ses appels arrivent
+        # ensemble et forment une seule série pour l'ordonnanceur (pas de
+        # rechargement entre deux langues)
+        llm_client.prewarm([TRANSLATION_MODEL])
+
+        def translate(language):
+            translated = translate_text(summary, language, use_cache=use_cache)
+            if not translated or translated.startswith('❌'):
+                raise RuntimeError(translated or 'traduction vide')
+            return translated
+
+        workers = llm_client.get_llm_client().scheduler.concurrency_limit(TRANSLATION_MODEL)
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(job['languages'])))) as executor:
+            futures = [executor.submit(translate, language) for language in job['languages']]
+            for language, future in zip(job['languages'], futures):
+                try:
+                    store_translation(document_id, language, future.result(), source_language,
+                                      TRANSLATION_MODEL, article_id)
+                    with _fanout_lock:
+                        job['completed'].append(language)
+                except Exception as e:
+                    print(f"⚠️ Traduction '{language}' échouée pour {document_id[:8]}: {e}")
+                    with _fanout_lock:
+                        job['errors'][language] = str(e)
+
+        with _fanout_lock:
+            job['duration'] = round(time.perf_counter() - start, 3)
+    print(f"🌍 Traductions {document_id[:8]}: {len(job['completed'])}/{len(job['languages'])} "
+          f"en {job['duration']}s")
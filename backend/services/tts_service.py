@@ -0,0 +1,201 @@
+# backend/services/tts_service.py
+"""
+Synthèse vocale (TTS) à moteur interchangeable
+
+Les moteurs produisent l'audio par blocs (``stream``) : la réponse HTTP peut
+commencer dès le premier bloc, sans fichier temporaire. Moteur choisi par
+``TTS_BACKEND`` :
+- ``edge`` : edge-tts (service Microsoft, MP3),
+- ``local`` : moteur de remplacement hors ligne (silence WAV de durée
+  proportionnelle au texte), pour les tests et le développement.
+
+L'audio produit est mémorisé dans le cache audio (clé : texte, voix, débit,
+moteur) : une synthèse déjà faite devient une lecture de fichier.
+"""
+
+import asyncio
+import io
+import queue
+import struct
+import threading
+
+from backend.utils.helpers import get_config_value
+
+DEFAULT_VOICES = {
+    "fr": "fr-FR-DeniseNeural",
+    "en": "en-US-JennyNeural",
+    "de": "de-DE-KatjaNeural",
+    "es": "es-ES-ElviraNeural",
+    "it": "it-IT-ElsaNeural"
+}
+
+DEFAULT_RATE = "+0%"
+
+
+def voice_for_language(lang_code):
+    return DEFAULT_VOICES.get(lang_code, DEFAULT_VOICES["en"])
+
+
+class TTSBackend:
+    """Moteur TTS : ``stream`` produit l'audio par blocs de bytes"""
+
+    name = None
+    mimetype = "audio/mpeg"
+    extension = "mp3"
+
+    def stream(self, text, voice, rate=DEFAULT_RATE):
+        """Générateur asynchrone des blocs audio"""
+        raise NotImplementedError
+
+    async def synthesize(self, text, voice, rate=DEFAULT_RATE):
+        """Audio complet en mémoire"""
+        buffer = io.BytesIO()
+        async for chunk in self.stream(text, voice, rate):
+            buffer.write(chunk)
+        return buffer.getvalue()
+
+
+class EdgeTTSBackend(TTSBackend):
+    """edge-tts : les blocs MP3 sont relayés dès leur réception"""
+
+    name = "edge"
+
+    async def stream(self, text, voice, rate=DEFAULT_RATE):
+        import edge_tts
+        communicate = edge_tts.Communicate(text, voice, rate=rate)
+        async for chunk in communicate.stream():
+            if chunk["type"] == "audio":
+                yield chunk["data"]
+
+
+class LocalTTSBackend(TTSBackend):
+    """Moteur de remplacement hors ligne : silence WAV (60 ms par caractère, 30 s max)"""
+
+    name = "local"
+    mimetype = "audio/wav"
+    extension = "wav"
+
+    SAMPLE_RATE = 16000
+    CHUNK_SAMPLES = 8000
+
+    async def stream(self, text, voice, rate=DEFAULT_RATE):
+        samples = int(self.SAMPLE_RATE * min(30.0, 0.06 * max(1, len(text))))
+        data_size = samples * 2
+        # En-tête WAV PCM 16 bits mono
+        yield (b"RIFF" + struct.pack("<I", 36 + data_size) + b"WAVEfmt "
+               + struct.pack("<IHHIIHH", 16, 1, 1, self.SAMPLE_RATE, self.SAMPLE_RATE * 2, 2, 16)
+               + b"data" + struct.pack("<I", data_size))
+        for start in range(0, samples, self.CHUNK_SAMPLES):
+            yield bytes(2 * min(self.CHUNK_SAMPLES, samples - start))
+            await asyncio.sleep(0)
+
+
+TTS_BACKENDS = {
+    EdgeTTSBackend.name: EdgeTTSBackend,
+    LocalTTSBackend.name: LocalTTSBackend,
+}
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def register_tts_backend(name, backend_class):
+    """Déclarer un moteur supplémentaire, sélectionnable via ``TTS_BACKEND``"""
+    TTS_BACKENDS[name] = backend_class
+
+
+def get_tts_backend(name=None):
+    """
+    Retourne le moteur TTS configuré (instance partagée)
+    """
+    name = name or get_config_value('TTS_BACKEND', 'edge')
+    if name not in TTS_BACKENDS:
+        raise ValueError(f"Moteur TTS inconnu: {name} (disponibles: {', '.join(TTS_BACKENDS)})")
+    with _backends_lock:
+        if name not in _backends:
+            _backends[name] = TTS_BACKENDS[name]()
+        return _backends[name]
+
+
+def _cache_key(cache, text, voice, rate, backend):
+    return cache.make_key(text, voice, rate, backend.name)
+
+
+async def synthesize_cached(text, voice, rate=DEFAULT_RATE, backend=None, use_cache=True):
+    """Audio complet, relu depuis le cache audio si ce texte a déjà été synthétisé"""
+    from backend.services.audio_cache import get_audio_cache
+    backend = backend or get_tts_backend()
+    cache = get_audio_cache()
+    if cache is None:
+        return await backend.synthesize(text, voice, rate)
+
+    key = _cache_key(cache, text, voice, rate, backend)
+    audio = cache.get(key) if use_cache else None
+    if audio is None:
+        audio = await backend.synthesize(text, voice, rate)
+        cache.set(key, audio)
+    return audio
+
+
+_STREAM_END = object()
+
+
+def stream_speech(text, voice, rate=DEFAULT_RATE, backend=None, use_cache=True):
+    """
+    Générateur synchrone des blocs audio, pour une réponse Flask en streaming.
+
+    Le moteur asynchrone tourne dans sa propre boucle d'événements sur un
+    thread ; les blocs passent par une file bornée. Si le client se déconnecte
+    (générateur fermé), la synthèse s'arrête au bloc suivant. Un audio en
+    cache est renvoyé d'un bloc ; un audio synthétisé jusqu'au bout est mis
+    en cache.
+    """
+    from backend.services.audio_cache import get_audio_cache
+    backend = backend or get_tts_backend()
+    cache = get_audio_cache()
+    key = _cache_key(cache, text, voice, rate, backend) if cache else None
+    if key and use_cache:
+        audio = cache.get(key)
+        if audio is not None:
+            yield audio
+            return
+
+    chunks = queue.Queue(maxsize=32)
+    stop = threading.Event()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                chunks.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    async def pump():
+        async for chunk in backend.stream(text, voice, rate):
+            if not put(chunk):
+                return
+
+    def run():
+        try:
+            asyncio.run(pump())
+            put(_STREAM_END)
+        except Exception as e:
+            put(e)
+
+    threading.Thread(target=run, name='tts-stream', daemon=True).start()
+    received = []
+    try:
+        while True:
+            item = chunks.get()
+            if item is _STREAM_END:
+                break
+            if isinstance(item, Exception):
+                raise item
+            received.append(item)
+            yield item
+    finally:
+        stop.set()
+    if key:
+        cache.set(key, b"".join(received))
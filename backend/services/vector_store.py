@@ -0,0 +1,476 @@
+"""
+Vectorstore plat NumPy pour le système RAG.
+
+Alternative à Chroma pour les corpus de taille modeste : les embeddings sont
+stockés dans une matrice float mappée en mémoire (np.memmap), les ids, textes et
+métadonnées dans une table annexe (pickle). La recherche est exacte : un seul
+produit matrice-vecteur (BLAS) suivi d'un top-k, les filtres de métadonnées sont
+appliqués sous forme de masques. Pas de serveur ni de SQLite, et plusieurs
+workers peuvent partager le même fichier mappé : les ajouts sont sérialisés
+entre processus par un verrou de fichier (flock), chaque ajout repartant de
+l'index le plus récent.
+
+Stockage compact optionnel (dtype='float16' ou 'int8') : seule la matrice
+compacte est écrite (2 à 4x moins d'octets sur disque et lus par recherche).
+Avec rescore=True, les meilleurs candidats sont en plus re-scorés exactement en
+float32 : les vecteurs float32 sont alors conservés dans un fichier séparé, lu
+uniquement pour ces candidats, ce qui augmente l'espace disque au lieu de le
+réduire. Le mode de stockage est fixé à la création ; rouvrir un vectorstore
+avec un autre mode lève une erreur.
+"""
+
+import os
+import pickle
+import threading
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+try:
+    import fcntl
+except ImportError:  # Windows : pas de verrou entre processus, un seul worker
+    fcntl = None
+
+VECTORS_FILENAME = "vectors.f32"
+INDEX_FILENAME = "index.pkl"
+
+# Matrices compactes : type NumPy et nom de fichier
+COMPACT_DTYPES = {
+    "float16": (np.float16, "vectors.f16"),
+    "int8": (np.int8, "vectors.i8"),
+}
+SCALES_FILENAME = "scales.f32"
+LOCK_FILENAME = "store.lock"
+
+# Nombre de lignes converties en float32 à la fois lors du balayage compact
+SCAN_BLOCK_ROWS = 2048
+
+
+@contextmanager
+def _file_lock(path: str, shared: bool = False):
+    """Verrou entre processus (exclusif pour écrire, partagé pour relire)"""
+    with open(path, "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def _storage_mode(dtype: str, rescore: bool) -> Tuple[str, bool]:
+    """Mode de stockage effectif : le re-scoring n'a de sens qu'en mode compact"""
+    return dtype, bool(rescore) and dtype in COMPACT_DTYPES
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    """Normalise les vecteurs (L2) pour que le produit scalaire soit un cosinus"""
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def _quantize_int8(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Quantification scalaire symétrique par vecteur : v ≈ q * scale"""
+    scales = np.abs(vectors).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    quantized = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+    return quantized, scales.astype(np.float32)
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices des k meilleurs scores, triés par score décroissant"""
+    k = min(k, scores.shape[0])
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    candidates = np.argpartition(-scores, k - 1)[:k]
+    return candidates[np.argsort(-scores[candidates])]
+
+
+class NumpyFlatVectorStore(VectorStore):
+    """Vectorstore exact sur une matrice NumPy mappée en mémoire"""
+
+    def __init__(self, persist_directory: str, embedding_function: Embeddings,
+                 initial_capacity: int = 1024, dtype: str = "float32",
+                 rescore: bool = False, rescore_factor: int = 4):
+        if dtype != "float32" and dtype not in COMPACT_DTYPES:
+            raise ValueError(f"dtype non supporté: {dtype} (float32, float16 ou int8)")
+
+        self.persist_directory = persist_directory
+        self.embedding_function = embedding_function
+        self.initial_capacity = initial_capacity
+        self.dtype = dtype
+        self.rescore = rescore
+        self.rescore_factor = rescore_factor
+
+        self._vectors_path = os.path.join(persist_directory, VECTORS_FILENAME)
+        self._index_path = os.path.join(persist_directory, INDEX_FILENAME)
+        self._scales_path = os.path.join(persist_directory, SCALES_FILENAME)
+        self._lock_path = os.path.join(persist_directory, LOCK_FILENAME)
+        self._lock = threading.RLock()
+
+        self._dim = None
+        self._capacity = 0
+        self._ids: List[str] = []
+        self._texts: List[str] = []
+        self._metadatas: List[Dict[str, Any]] = []
+        self._matrix = None   # float32 exact (absent en mode compact sans rescore)
+        self._compact = None  # float16 / int8 pour le balayage des candidats
+        self._scales = None   # échelles int8 par vecteur
+        self._index_mtime = None
+        self._metadata_columns: Dict[str, np.ndarray] = {}
+
+        os.makedirs(persist_directory, exist_ok=True)
+        with _file_lock(self._lock_path, shared=True):
+            self._load()
+
+    # ------------------------------------------------------------------
+    # Stockage
+    # ------------------------------------------------------------------
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self.embedding_function
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    @property
+    def _is_compact(self) -> bool:
+        return self.dtype in COMPACT_DTYPES
+
+    @property
+    def _keeps_exact(self) -> bool:
+        return not self._is_compact or self.rescore
+
+    def _memmaps(self):
+        """(chemin, type, largeur) des fichiers mappés pour le mode de stockage courant"""
+        files = []
+        if self._keeps_exact:
+            files.append((self._vectors_path, np.float32, self._dim))
+        if self._is_compact:
+            compact_dtype, filename = COMPACT_DTYPES[self.dtype]
+            files.append((os.path.join(self.persist_directory, filename), compact_dtype, self._dim))
+            if self.dtype == "int8":
+                files.append((self._scales_path, np.float32, None))
+        return files
+
+    def _open_memmap(self, path, dtype, width, mode):
+        shape = (self._capacity, width) if width else (self._capacity,)
+        return np.memmap(path, dtype=dtype, mode=mode, shape=shape)
+
+    def _map_files(self):
+        """Mapper en lecture les matrices du mode de stockage courant"""
+        mapped = [self._open_memmap(path, dtype, width, "r") for path, dtype, width in self._memmaps()]
+        self._matrix = mapped.pop(0) if self._keeps_exact else None
+        self._compact = mapped.pop(0) if self._is_compact else None
+        self._scales = mapped.pop(0) if self.dtype == "int8" else None
+
+    def _load(self):
+        """Charger la table annexe et mapper les matrices des embeddings"""
+        if not os.path.exists(self._index_path):
+            return
+        with open(self._index_path, "rb") as f:
+            index = pickle.load(f)
+        stored_mode = _storage_mode(index.get("dtype", "float32"), index.get("rescore", False))
+        if stored_mode != _storage_mode(self.dtype, self.rescore):
+            raise ValueError(
+                f"Vectorstore {self.persist_directory} stocké en {stored_mode[0]} (rescore={stored_mode[1]}), "
+                f"configuration {self.dtype} (rescore={self.rescore}) : reconstruire le vectorstore "
+                f"ou reprendre le mode d'origine"
+            )
+        self._dim = index["dim"]
+        self._capacity = index["capacity"]
+        self._ids = index["ids"]
+        self._texts = index["texts"]
+        self._metadatas = index["metadatas"]
+        self._metadata_columns = {}
+        self._index_mtime = os.path.getmtime(self._index_path)
+        self._map_files()
+
+    def _refresh_if_changed(self):
+        """Recharger l'index si un autre worker l'a modifié"""
+        try:
+            mtime = os.path.getmtime(self._index_path)
+        except OSError:
+            return
+        if mtime != self._index_mtime:
+            with self._lock, _file_lock(self._lock_path, shared=True):
+                self._load()
+
+    def _ensure_capacity(self, dim: int, needed: int):
+        """Agrandir les fichiers mappés si nécessaire"""
+        if self._dim is None:
+            self._dim = dim
+        elif dim != self._dim:
+            raise ValueError(f"Dimension d'embedding incohérente: {dim} au lieu de {self._dim}")
+
+        if needed <= self._capacity:
+            return
+        new_capacity = max(self.initial_capacity, self._capacity * 2, needed)
+        for path, dtype, width in self._memmaps():
+            with open(path, "ab") as f:
+                f.truncate(new_capacity * (width or 1) * np.dtype(dtype).itemsize)
+        self._capacity = new_capacity
+
+    def _write_index(self):
+        """Écrire la table annexe de façon atomique"""
+        tmp_path = f"{self._index_path}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump({
+                "dim": self._dim,
+                "capacity": self._capacity,
+                "dtype": self.dtype,
+                "rescore": self.rescore,
+                "ids": self._ids,
+                "texts": self._texts,
+                "metadatas": self._metadatas,
+            }, f)
+        os.replace(tmp_path, self._index_path)
+        self._index_mtime = os.path.getmtime(self._index_path)
+
+    def persist(self):
+        """Compatibilité avec l'API Chroma : les écritures sont déjà persistées"""
+        with self._lock, _file_lock(self._lock_path):
+            if self._dim is not None:
+                self._write_index()
+
+    def storage_stats(self) -> Dict[str, Any]:
+        """Octets par chunk lus lors du balayage et occupés sur disque"""
+        scan_bytes = self._dim * (np.dtype(COMPACT_DTYPES[self.dtype][0]).itemsize if self._is_compact else 4) if self._dim else 0
+        if self.dtype == "int8":
+            scan_bytes += 4
+        disk_bytes = sum((width or 1) * np.dtype(dtype).itemsize for _, dtype, width in self._memmaps()) if self._dim else 0
+        return {
+            "dtype": self.dtype,
+            "rescore": self.rescore,
+            "chunks": len(self._ids),
+            "scan_bytes_per_chunk": scan_bytes,
+            "disk_bytes_per_chunk": disk_bytes,
+        }
+
+    # ------------------------------------------------------------------
+    # Ajout
+    # ------------------------------------------------------------------
+
+    def add_embeddings(self, texts: List[str], embeddings, metadatas: Optional[List[dict]] = None,
+                       ids: Optional[List[str]] = None) -> List[str]:
+        """Ajouter des textes dont les embeddings sont déjà calculés"""
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        if vectors.ndim != 2 or len(vectors) != len(texts):
+            raise ValueError("Les embeddings doivent former une matrice (n_textes, dimension)")
+        if not len(texts):
+            return []
+
+        metadatas = metadatas or [{} for _ in texts]
+        ids = ids or [uuid.uuid4().hex for _ in texts]
+
+        # Un seul écrivain à la fois, tous processus confondus ; l'index est relu
+        # sous le verrou pour ajouter après les lignes écrites par les autres workers
+        with self._lock, _file_lock(self._lock_path):
+            self._load()
+            start = len(self._ids)
+            self._ensure_capacity(vectors.shape[1], start + len(texts))
+
+            rows = slice(start, start + len(texts))
+            normalized = _normalize(vectors)
+            if self._keeps_exact:
+                self._write_rows(self._vectors_path, np.float32, self._dim, rows, normalized)
+            if self.dtype == "float16":
+                self._write_rows(os.path.join(self.persist_directory, COMPACT_DTYPES["float16"][1]),
+                                 np.float16, self._dim, rows, normalized.astype(np.float16))
+            elif self.dtype == "int8":
+                quantized, scales = _quantize_int8(normalized)
+                self._write_rows(os.path.join(self.persist_directory, COMPACT_DTYPES["int8"][1]),
+                                 np.int8, self._dim, rows, quantized)
+                self._write_rows(self._scales_path, np.float32, None, rows, scales)
+
+            self._ids.extend(ids)
+            self._texts.extend(texts)
+            self._metadatas.extend(dict(m or {}) for m in metadatas)
+            self._metadata_columns = {}
+            self._write_index()
+            self._map_files()
+        return ids
+
+    def _write_rows(self, path, dtype, width, rows, values):
+        writer = self._open_memmap(path, dtype, width, "r+")
+        writer[rows] = values
+        writer.flush()
+        del writer
+
+    def add_texts(self, texts: Iterable[str], metadatas: Optional[List[dict]] = None,
+                  ids: Optional[List[str]] = None, **kwargs: Any) -> List[str]:
+        texts = list(texts)
+        embeddings = self.embedding_function.embed_documents(texts)
+        return self.add_embeddings(texts, embeddings, metadatas=metadatas, ids=ids)
+
+    @classmethod
+    def from_texts(cls, texts: List[str], embedding: Embeddings, metadatas: Optional[List[dict]] = None,
+                   persist_directory: Optional[str] = None, **kwargs: Any) -> "NumpyFlatVectorStore":
+        if persist_directory is None:
+            raise ValueError("persist_directory est requis pour NumpyFlatVectorStore")
+        # Options de stockage (dtype, rescore...) transmises au constructeur
+        options = {key: kwargs[key] for key in ("initial_capacity", "dtype", "rescore", "rescore_factor")
+                   if key in kwargs}
+        store = cls(persist_directory=persist_directory, embedding_function=embedding, **options)
+        store.add_texts(texts, metadatas=metadatas)
+        return store
+
+    # ------------------------------------------------------------------
+    # Recherche
+    # ------------------------------------------------------------------
+
+    def _metadata_column(self, key: str) -> np.ndarray:
+        """Colonne de métadonnées (mise en cache) pour construire les masques de filtre"""
+        column = self._metadata_columns.get(key)
+        if column is None:
+            column = np.empty(len(self._metadatas), dtype=object)
+            column[:] = [metadata.get(key) for metadata in self._metadatas]
+            self._metadata_columns[key] = column
+        return column
+
+    def _filter_mask(self, filter: Optional[dict]) -> Optional[np.ndarray]:
+        """Masque booléen des lignes qui respectent toutes les égalités du filtre"""
+        if not filter:
+            return None
+        mask = np.ones(len(self._ids), dtype=bool)
+        for key, value in filter.items():
+            mask &= self._metadata_column(key) == value
+        return mask
+
+    def _scores(self, query_vectors: np.ndarray) -> np.ndarray:
+        """Scores cosinus (n_requêtes, n_documents) via un produit matriciel"""
+        count = len(self._ids)
+        if not self._is_compact:
+            return query_vectors @ self._matrix[:count].T
+
+        # Balayage de la matrice compacte par blocs convertis en float32
+        scores = np.empty((len(query_vectors), count), dtype=np.float32)
+        for start in range(0, count, SCAN_BLOCK_ROWS):
+            end = min(start + SCAN_BLOCK_ROWS, count)
+            block = np.asarray(self._compact[start:end], dtype=np.float32)
+            scores[:, start:end] = query_vectors @ block.T
+        if self._scales is not None:
+            scores *= self._scales[:count]
+        return scores
+
+    def _vectors(self, indices) -> np.ndarray:
+        """Vecteurs float32 (exacts si disponibles, sinon déquantifiés) des lignes données"""
+        indices = np.asarray(indices)
+        if self._matrix is not None:
+            return np.asarray(self._matrix[indices], dtype=np.float32)
+        vectors = np.asarray(self._compact[indices], dtype=np.float32)
+        if self._scales is not None:
+            vectors *= self._scales[indices][:, None]
+        return vectors
+
+    def _rank(self, query: np.ndarray, scores: np.ndarray, k: int, mask: Optional[np.ndarray]) -> List[Tuple[int, float]]:
+        """Top-k d'une requête, avec re-scoring exact des candidats en mode compact"""
+        if mask is not None:
+            scores = np.where(mask, scores, -np.inf)
+        if self._is_compact and self.rescore:
+            candidates = _top_k(scores, k * self.rescore_factor)
+            candidates = candidates[np.isfinite(scores[candidates])]
+            exact = self._vectors(candidates) @ query
+            order = np.argsort(-exact)[:k]
+            return [(int(candidates[i]), float(exact[i])) for i in order]
+        indices = _top_k(scores, k)
+        return [(int(i), float(scores[i])) for i in indices if np.isfinite(scores[i])]
+
+    def _search_by_vector_with_index(self, embedding, k: int, filter: Optional[dict] = None) -> List[Tuple[int, float]]:
+        self._refresh_if_changed()
+        if not self._ids:
+            return []
+        query = _normalize(np.asarray(embedding, dtype=np.float32).reshape(1, -1))
+        scores = self._scores(query)[0]
+        return self._rank(query[0], scores, k, self._filter_mask(filter))
+
+    def similarity_search_by_vectors(self, embeddings, k: int = 4, filter: Optional[dict] = None) -> List[List[Document]]:
+        """Recherche groupée : un seul produit matriciel pour toutes les requêtes"""
+        self._refresh_if_changed()
+        if not self._ids or not len(embeddings):
+            return [[] for _ in embeddings]
+        queries = _normalize(np.asarray(embeddings, dtype=np.float32))
+        scores = self._scores(queries)
+        mask = self._filter_mask(filter)
+        return [
+            [self._to_document(i) for i, _ in self._rank(queries[row], scores[row], k, mask)]
+            for row in range(len(queries))
+        ]
+
+    def _to_document(self, index: int) -> Document:
+        return Document(page_content=self._texts[index], metadata=dict(self._metadatas[index]))
+
+    def similarity_search_by_vector_with_score(self, embedding: List[float], k: int = 4,
+                                               filter: Optional[dict] = None, **kwargs: Any) -> List[Tuple[Document, float]]:
+        return [(self._to_document(i), score) for i, score in self._search_by_vector_with_index(embedding, k, filter)]
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4,
+                                    filter: Optional[dict] = None, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_by_vector_with_score(embedding, k, filter)]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, filter: Optional[dict] = None,
+                                     **kwargs: Any) -> List[Tuple[Document, float]]:
+        embedding = self.embedding_function.embed_query(query)
+        return self.similarity_search_by_vector_with_score(embedding, k, filter)
+
+    def similarity_search(self, query: str, k: int = 4, filter: Optional[dict] = None,
+                          **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, filter)]
+
+    def _select_relevance_score_fn(self):
+        # Scores cosinus dans [-1, 1] ramenés dans [0, 1]
+        return lambda score: (score + 1.0) / 2.0
+
+    def max_marginal_relevance_search_by_vector(self, embedding: List[float], k: int = 4, fetch_k: int = 20,
+                                                lambda_mult: float = 0.5, filter: Optional[dict] = None,
+                                                **kwargs: Any) -> List[Document]:
+        candidates = self._search_by_vector_with_index(embedding, fetch_k, filter)
+        return self._mmr_select(candidates, k, lambda_mult)
+
+    def max_marginal_relevance_search_by_vectors(self, embeddings, k: int = 4, fetch_k: int = 20,
+                                                 lambda_mult: float = 0.5,
+                                                 filter: Optional[dict] = None) -> List[List[Document]]:
+        """MMR groupée : candidats de toutes les requêtes en un seul produit matriciel"""
+        self._refresh_if_changed()
+        if not self._ids or not len(embeddings):
+            return [[] for _ in embeddings]
+        queries = _normalize(np.asarray(embeddings, dtype=np.float32))
+        scores = self._scores(queries)
+        mask = self._filter_mask(filter)
+        return [
+            self._mmr_select(self._rank(queries[row], scores[row], fetch_k, mask), k, lambda_mult)
+            for row in range(len(queries))
+        ]
+
+    def _mmr_select(self, candidates: List[Tuple[int, float]], k: int, lambda_mult: float) -> List[Document]:
+        """Sélection MMR parmi des candidats (ligne, score) triés par pertinence"""
+        if not candidates:
+            return []
+
+        indices = [i for i, _ in candidates]
+        relevance = np.array([score for _, score in candidates], dtype=np.float32)
+        candidate_vectors = self._vectors(indices)
+        redundancy = candidate_vectors @ candidate_vectors.T
+
+        selected = [0]
+        while len(selected) < min(k, len(indices)):
+            max_redundancy = redundancy[:, selected].max(axis=1)
+            mmr_scores = lambda_mult * relevance - (1 - lambda_mult) * max_redundancy
+            mmr_scores[selected] = -np.inf
+            selected.append(int(np.argmax(mmr_scores)))
+
+        return [self._to_document(indices[i]) for i in selected]
+
+    def max_marginal_relevance_search(self, query: str, k: int = 4, fetch_k: int = 20,
+                                      lambda_mult: float = 0.5, filter: Optional[dict] = None,
+                                      **kwargs: Any) -> List[Document]:
+        embedding = self.embedding_function.embed_query(query)
+        return self.max_marginal_relevance_search_by_vector(embedding, k, fetch_k, lambda_mult, filter)
@@ -3,7 +3,7 @@ import os
 import secrets
 import hashlib
 from datetime import datetime
-from flask import request, current_app
+from flask import request, current_app, has_app_context
 from werkzeug.utils import secure_filename
 from PIL import Image
 import uuid
@@ -23,6 +23,16 @@ def generate_article_slug(title):
     slug = slug.strip('-')
     return slug
 
+def get_config_value(key, default=None):
+    """Lit un paramètre dans la config Flask, puis dans config.Config hors contexte d'application"""
+    if has_app_context() and key in current_app.config:
+        return current_app.config[key]
+    try:
+        from config import Config
+        return getattr(Config, key, default)
+    except ImportError:
+        return default
+
 def get_client_ip():
     """Récupère l'adresse IP du client"""
     if request.environ.get('HTTP_X_FORWARDED_FOR') is None:
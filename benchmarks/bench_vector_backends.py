@@ -0,0 +1,161 @@
+# benchmarks/bench_vector_backends.py
+"""
+Comparaison rappel / latence entre Chroma et le vectorstore plat NumPy.
+
+Les deux backends sont alimentés avec exactement les mêmes embeddings :
+- soit ceux d'un Chroma existant (--chroma-path, ex: data/chroma2),
+- soit des vecteurs synthétiques regroupés en clusters (par défaut).
+
+La vérité terrain est une recherche exacte en float64. Le rappel@k de chaque
+backend est mesuré par rapport à elle.
+
+Usage :
+    python benchmarks/bench_vector_backends.py --n 20000 --dim 768 --queries 200 --k 5
+    python benchmarks/bench_vector_backends.py --chroma-path data/chroma2
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+import numpy as np
+
+# Ajouter le répertoire du projet au path Python
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.services.vector_store import NumpyFlatVectorStore
+
+CHROMA_MAX_BATCH = 5000
+
+
+def synthetic_dataset(n, dim, n_clusters=50, seed=0):
+    """Vecteurs regroupés en clusters, proches de la structure des embeddings réels"""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(n_clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, n_clusters, size=n)
+    vectors = centers[labels] + 0.5 * rng.normal(size=(n, dim)).astype(np.float32)
+    metadatas = [{"article_id": int(label % 10)} for label in labels]
+    return vectors, metadatas
+
+
+def load_chroma_dataset(chroma_path, collection_name="langchain"):
+    """Relire les embeddings déjà stockés dans un Chroma persistant"""
+    import chromadb
+    client = chromadb.PersistentClient(path=chroma_path)
+    data = client.get_collection(collection_name).get(include=["embeddings", "metadatas"])
+    vectors = np.asarray(data["embeddings"], dtype=np.float32)
+    metadatas = [m or {} for m in data["metadatas"]]
+    return vectors, metadatas
+
+
+def make_queries(vectors, n_queries, seed=1):
+    """Requêtes = vecteurs du corpus légèrement bruités"""
+    rng = np.random.default_rng(seed)
+    picks = rng.choice(len(vectors), size=min(n_queries, len(vectors)), replace=False)
+    noise = 0.1 * rng.normal(size=(len(picks), vectors.shape[1])).astype(np.float32)
+    return vectors[picks] + noise
+
+
+def exact_top_k(vectors, queries, k):
+    """Vérité terrain : cosinus exact en float64"""
+    v = vectors.astype(np.float64)
+    v /= np.linalg.norm(v, axis=1, keepdims=True)
+    q = queries.astype(np.float64)
+    q /= np.linalg.norm(q, axis=1, keepdims=True)
+    scores = q @ v.T
+    return np.argsort(-scores, axis=1)[:, :k]
+
+
+def recall_at_k(results, truth):
+    hits = sum(len(set(r) & set(t)) for r, t in zip(results, truth))
+    return hits / float(truth.size)
+
+
+def latency_summary(latencies):
+    latencies = np.asarray(latencies) * 1000
+    return {
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+        "mean_ms": float(latencies.mean()),
+    }
+
+
+def bench_numpy(vectors, metadatas, queries, k, workdir):
+    ids = [str(i) for i in range(len(vectors))]
+    texts = [f"chunk {i}" for i in range(len(vectors))]
+
+    start = time.perf_counter()
+    store = NumpyFlatVectorStore(persist_directory=os.path.join(workdir, "numpy"), embedding_function=None)
+    store.add_embeddings(texts, vectors, metadatas=metadatas, ids=ids)
+    build_time = time.perf_counter() - start
+
+    results, latencies = [], []
+    for query in queries:
+        start = time.perf_counter()
+        hits = store._search_by_vector_with_index(query, k)
+        latencies.append(time.perf_counter() - start)
+        results.append([i for i, _ in hits])
+    return results, latencies, build_time
+
+
+def bench_chroma(vectors, metadatas, queries, k, workdir):
+    import chromadb
+    client = chromadb.PersistentClient(path=os.path.join(workdir, "chroma"))
+    collection = client.create_collection("bench", metadata={"hnsw:space": "cosine"})
+
+    start = time.perf_counter()
+    for offset in range(0, len(vectors), CHROMA_MAX_BATCH):
+        batch = slice(offset, offset + CHROMA_MAX_BATCH)
+        collection.add(
+            ids=[str(i) for i in range(offset, min(offset + CHROMA_MAX_BATCH, len(vectors)))],
+            embeddings=vectors[batch].tolist(),
+            metadatas=[m or {"_": 0} for m in metadatas[batch]],
+        )
+    build_time = time.perf_counter() - start
+
+    results, latencies = [], []
+    for query in queries:
+        start = time.perf_counter()
+        hits = collection.query(query_embeddings=[query.tolist()], n_results=k)
+        latencies.append(time.perf_counter() - start)
+        results.append([int(i) for i in hits["ids"][0]])
+    return results, latencies, build_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Chroma vs vectorstore NumPy")
+    parser.add_argument("--chroma-path", help="Chroma persistant existant à relire (sinon données synthétiques)")
+    parser.add_argument("--n", type=int, default=20000, help="Nombre de chunks synthétiques")
+    parser.add_argument("--dim", type=int, default=768, help="Dimension des embeddings synthétiques")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--skip-chroma", action="store_true", help="Ne mesurer que le backend NumPy")
+    args = parser.parse_args()
+
+    if args.chroma_path:
+        vectors, metadatas = load_chroma_dataset(args.chroma_path)
+    else:
+        vectors, metadatas = synthetic_dataset(args.n, args.dim)
+    queries = make_queries(vectors, args.queries)
+    truth = exact_top_k(vectors, queries, args.k)
+
+    print(f"📦 Corpus: {len(vectors)} chunks, dimension {vectors.shape[1]}, {len(queries)} requêtes, k={args.k}")
+
+    backends = [("numpy", bench_numpy)]
+    if not args.skip_chroma:
+        backends.append(("chroma", bench_chroma))
+
+    with tempfile.TemporaryDirectory() as workdir:
+        for name, bench in backends:
+            results, latencies, build_time = bench(vectors, metadatas, queries, args.k, workdir)
+            stats = latency_summary(latencies)
+            print(
+                f"  {name:<8} rappel@{args.k}={recall_at_k(results, truth):.4f}  "
+                f"p50={stats['p50_ms']:.2f} ms  p95={stats['p95_ms']:.2f} ms  "
+                f"moyenne={stats['mean_ms']:.2f} ms  construction={build_time:.1f} s"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# benchmarks/bench_vector_quantization.py
+"""
+Coût en rappel du stockage compact (float16 / int8) du vectorstore NumPy.
+
+Pour chaque mode de stockage, mesure le rappel@k par rapport à une recherche
+exacte, la latence par requête et les octets par chunk (balayés et sur disque).
+
+Usage :
+    python benchmarks/bench_vector_quantization.py --n 20000 --dim 768 --k 5
+    python benchmarks/bench_vector_quantization.py --chroma-path data/chroma2
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+# Ajouter le répertoire du projet au path Python
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.services.vector_store import NumpyFlatVectorStore
+from bench_vector_backends import (
+    synthetic_dataset, load_chroma_dataset, make_queries,
+    exact_top_k, recall_at_k, latency_summary
+)
+
+MODES = [
+    ("float32", True),
+    ("float16", True),
+    ("float16", False),
+    ("int8", True),
+    ("int8", False),
+]
+
+
+def bench_mode(dtype, rescore, vectors, metadatas, queries, k, rescore_factor, workdir):
+    store = NumpyFlatVectorStore(
+        persist_directory=os.path.join(workdir, f"{dtype}_{rescore}"),
+        embedding_function=None,
+        dtype=dtype,
+        rescore=rescore,
+        rescore_factor=rescore_factor,
+    )
+    store.add_embeddings([str(i) for i in range(len(vectors))], vectors, metadatas=metadatas)
+
+    results, latencies = [], []
+    for query in queries:
+        start = time.perf_counter()
+        hits = store._search_by_vector_with_index(query, k)
+        latencies.append(time.perf_counter() - start)
+        results.append([i for i, _ in hits])
+    return results, latencies, store.storage_stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du stockage compact du vectorstore NumPy")
+    parser.add_argument("--chroma-path", help="Chroma persistant existant à relire (sinon données synthétiques)")
+    parser.add_argument("--n", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--rescore-factor", type=int, default=4)
+    args = parser.parse_args()
+
+    if args.chroma_path:
+        vectors, metadatas = load_chroma_dataset(args.chroma_path)
+    else:
+        vectors, metadatas = synthetic_dataset(args.n, args.dim)
+    queries = make_queries(vectors, args.queries)
+    truth = exact_top_k(vectors, queries, args.k)
+
+    print(f"📦 Corpus: {len(vectors)} chunks, dimension {vectors.shape[1]}, {len(queries)} requêtes, k={args.k}")
+    print(f"  {'mode':<18} {'rappel':>8} {'p50 ms':>8} {'p95 ms':>8} {'balayé o/chunk':>15} {'disque o/chunk':>15}")
+
+    with tempfile.TemporaryDirectory() as workdir:
+        for dtype, rescore in MODES:
+            results, latencies, stats = bench_mode(
+                dtype, rescore, vectors, metadatas, queries, args.k, args.rescore_factor, workdir
+            )
+            timing = latency_summary(latencies)
+            label = f"{dtype}{'+rescore' if rescore and dtype != 'float32' else ''}"
+            print(
+                f"  {label:<18} {recall_at_k(results, truth):>8.4f} {timing['p50_ms']:>8.2f} "
+                f"{timing['p95_ms']:>8.2f} {stats['scan_bytes_per_chunk']:>15} {stats['disk_bytes_per_chunk']:>15}"
+            )
+
+
+if __name__ == "__main__":
+    main()
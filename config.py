@@ -30,12 +30,89 @@ class Config:
     RAG_CONVERSATION_MEMORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'conversation_memory.pkl')
     RAG_TEMP_IMAGES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'temp_images')
     
+    # Backend vectoriel : 'chroma' (défaut) ou 'numpy' (matrice plate mappée en mémoire)
+    RAG_VECTOR_BACKEND = os.environ.get('RAG_VECTOR_BACKEND') or 'chroma'
+    RAG_NUMPY_VECTOR_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'vectors_numpy')
+    # Stockage compact du backend NumPy : 'float32', 'float16' ou 'int8'
+    # (candidats sur la matrice compacte, puis re-scoring exact si RAG_VECTOR_RESCORE :
+    # une copie float32 est alors conservée sur disque en plus de la matrice compacte)
+    RAG_VECTOR_DTYPE = os.environ.get('RAG_VECTOR_DTYPE') or 'float32'
+    RAG_VECTOR_RESCORE = os.environ.get('RAG_VECTOR_RESCORE', 'false').lower() in ['true', 'on', '1']
+    RAG_VECTOR_RESCORE_FACTOR = int(os.environ.get('RAG_VECTOR_RESCORE_FACTOR') or 4)
+    
+    # Questions groupées (/chatbot/ask-batch) : générations simultanées maximum
+    RAG_BATCH_MAX_CONCURRENCY = int(os.environ.get('RAG_BATCH_MAX_CONCURRENCY') or 4)
+    
+    # Préchargement en arrière-plan du système RAG et des modèles au démarrage
+    RAG_WARMUP_ON_STARTUP = os.environ.get('RAG_WARMUP_ON_STARTUP', 'true').lower() in ['true', 'on', '1']
+    RAG_WARMUP_KEEP_ALIVE = os.environ.get('RAG_WARMUP_KEEP_ALIVE') or '10m'
+    
     # Modèles IA
     OLLAMA_BASE_URL = os.environ.get('OLLAMA_BASE_URL') or 'http://localhost:11434'
+    # Client LLM partagé : délai maximal par appel (s), nouvelles tentatives, concurrence
+    OLLAMA_TIMEOUT = float(os.environ.get('OLLAMA_TIMEOUT') or 300)
+    OLLAMA_CONNECT_TIMEOUT = float(os.environ.get('OLLAMA_CONNECT_TIMEOUT') or 10)
+    OLLAMA_MAX_RETRIES = int(os.environ.get('OLLAMA_MAX_RETRIES') or 2)
+    OLLAMA_RETRY_BACKOFF = float(os.environ.get('OLLAMA_RETRY_BACKOFF') or 1.0)
+    OLLAMA_POOL_SIZE = int(os.environ.get('OLLAMA_POOL_SIZE') or 10)
+    # Générations simultanées par modèle (défaut) et surcharges : "llama3.2=4,DeepSeek-R1=1"
+    OLLAMA_MAX_CONCURRENCY = int(os.environ.get('OLLAMA_MAX_CONCURRENCY') or 2)
+    OLLAMA_MODEL_CONCURRENCY = os.environ.get('OLLAMA_MODEL_CONCURRENCY') or ''
+    # Ordonnanceur : modèles gardés chargés en même temps, taille maximale d'une série
+    # d'appels au même modèle et attente maximale (s) avant de laisser passer un autre modèle
+    OLLAMA_RESIDENT_MODELS = int(os.environ.get('OLLAMA_RESIDENT_MODELS') or 1)
+    OLLAMA_SCHEDULER_MAX_BATCH = int(os.environ.get('OLLAMA_SCHEDULER_MAX_BATCH') or 8)
+    OLLAMA_SCHEDULER_MAX_WAIT = float(os.environ.get('OLLAMA_SCHEDULER_MAX_WAIT') or 30)
+    # keep_alive envoyé à Ollama : tant que du travail attend le modèle / quand un autre modèle attend
+    OLLAMA_KEEP_ALIVE = os.environ.get('OLLAMA_KEEP_ALIVE') or '10m'
+    OLLAMA_SWITCH_KEEP_ALIVE = os.environ.get('OLLAMA_SWITCH_KEEP_ALIVE') or 0
+    # Fenêtre de contexte adaptative : num_ctx = tokens du prompt + num_predict, arrondi
+    # au palier supérieur et plafonné (surcharges par modèle : "llama3.2=131072,nous-hermes=4096")
+    OLLAMA_ADAPTIVE_NUM_CTX = os.environ.get('OLLAMA_ADAPTIVE_NUM_CTX', 'true').lower() in ['true', 'on', '1']
+    OLLAMA_NUM_CTX_BUCKETS = os.environ.get('OLLAMA_NUM_CTX_BUCKETS') or '2048,4096,8192,16384,32768'
+    OLLAMA_MAX_NUM_CTX = int(os.environ.get('OLLAMA_MAX_NUM_CTX') or 32768)
+    OLLAMA_MODEL_MAX_NUM_CTX = os.environ.get('OLLAMA_MODEL_MAX_NUM_CTX') or ''
+    # Réponse réservée quand l'appel ne fixe pas num_predict
+    OLLAMA_DEFAULT_NUM_PREDICT = int(os.environ.get('OLLAMA_DEFAULT_NUM_PREDICT') or 1024)
+    # Regrouper les prompts identiques en cours en une seule génération (single-flight)
+    OLLAMA_SINGLE_FLIGHT = os.environ.get('OLLAMA_SINGLE_FLIGHT', 'true').lower() in ['true', 'on', '1']
     DEFAULT_SUMMARIZATION_MODEL = 'DeepSeek-R1'
     DEFAULT_VISION_MODEL = 'granite3.2-vision'
     DEFAULT_VERIFICATION_MODEL = 'nous-hermes'
     
+    # Cache disque des résultats LLM déterministes (résumés, traductions, slides)
+    LLM_RESULT_CACHE_ENABLED = os.environ.get('LLM_RESULT_CACHE_ENABLED', 'true').lower() in ['true', 'on', '1']
+    LLM_RESULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'llm_result_cache.sqlite')
+    LLM_RESULT_CACHE_MAX_MB = int(os.environ.get('LLM_RESULT_CACHE_MAX_MB') or 256)
+    # Images envoyées au modèle de vision : côté maximal (px) et planches de petites figures
+    LLM_VISION_MAX_SIDE = int(os.environ.get('LLM_VISION_MAX_SIDE') or 768)
+    LLM_VISION_MONTAGE = os.environ.get('LLM_VISION_MONTAGE', 'false').lower() in ['true', 'on', '1']
+    LLM_VISION_MONTAGE_SIZE = int(os.environ.get('LLM_VISION_MONTAGE_SIZE') or 4)
+    # Délai maximal (s) de description d'une figure, attente d'un créneau comprise
+    LLM_VISION_IMAGE_TIMEOUT = float(os.environ.get('LLM_VISION_IMAGE_TIMEOUT') or 120)
+    # Au-delà de cette taille (caractères), le texte est résumé en map-reduce par blocs
+    LLM_SUMMARY_CHUNK_CHARS = int(os.environ.get('LLM_SUMMARY_CHUNK_CHARS') or 12000)
+    # Taille maximale (caractères) d'un bloc de paragraphes traduit en un appel
+    LLM_TRANSLATE_CHUNK_CHARS = int(os.environ.get('LLM_TRANSLATE_CHUNK_CHARS') or 2000)
+    # Pré-compression extractive avant résumé : part des tokens conservée (1.0 = nettoyage seul)
+    LLM_SUMMARY_COMPRESSION_RATIO = float(os.environ.get('LLM_SUMMARY_COMPRESSION_RATIO') or 0.5)
+    # En dessous de ce nombre de tokens (texte nettoyé), aucune phrase n'est retirée
+    LLM_SUMMARY_MIN_INPUT_TOKENS = int(os.environ.get('LLM_SUMMARY_MIN_INPUT_TOKENS') or 3000)
+    
+    # Artefacts des documents (texte, figures, résumés, slides, podcast) indexés par SHA-256 du PDF
+    ARTIFACT_STORE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'artifacts')
+    
+    # Jobs asynchrones de résumé (/summarize/jobs) : workers et durée de conservation (s) des jobs terminés
+    SUMMARIZE_JOB_WORKERS = int(os.environ.get('SUMMARIZE_JOB_WORKERS') or 2)
+    SUMMARIZE_JOB_TTL = int(os.environ.get('SUMMARIZE_JOB_TTL') or 3600)
+    
+    # Synthèse vocale : 'edge' (edge-tts) ou 'local' (moteur hors ligne de remplacement)
+    TTS_BACKEND = os.environ.get('TTS_BACKEND') or 'edge'
+    # Cache disque de l'audio synthétisé (clé : texte, voix, débit), éviction LRU au-delà de la taille max
+    TTS_AUDIO_CACHE_ENABLED = os.environ.get('TTS_AUDIO_CACHE_ENABLED', 'true').lower() in ['true', 'on', '1']
+    TTS_AUDIO_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'tts_cache')
+    TTS_AUDIO_CACHE_MAX_MB = int(os.environ.get('TTS_AUDIO_CACHE_MAX_MB') or 512)
+    
     # Langues supportées
     SUPPORTED_LANGUAGES = {
         'fr': 'Français',
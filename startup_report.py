@@ -0,0 +1,84 @@
+# startup_report.py
+"""
+Rapport de temps de démarrage de l'application ArticSpace.
+
+Usage :
+    python startup_report.py            # temps d'import et de create_app()
+    python startup_report.py --warmup   # attend aussi le préchargement RAG / modèles
+"""
+import os
+import sys
+import time
+import argparse
+
+# Ajouter le répertoire du projet au path Python
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# Dépendances lourdes qui ne doivent pas être chargées par create_app()
+HEAVY_MODULES = [
+    'torch',
+    'sentence_transformers',
+    'langchain',
+    'langchain_community',
+    'langchain_ollama',
+    'chromadb',
+    'transformers',
+]
+
+def _loaded_heavy_modules():
+    return [name for name in HEAVY_MODULES if name in sys.modules]
+
+def run_report(with_warmup=False, warmup_timeout=600.0):
+    """Mesure les étapes du démarrage et affiche un rapport"""
+    if not with_warmup:
+        os.environ['RAG_WARMUP_ON_STARTUP'] = 'false'
+
+    timings = {}
+
+    start = time.perf_counter()
+    import backend
+    timings['import backend'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    app = backend.create_app()
+    timings['create_app()'] = time.perf_counter() - start
+
+    heavy_after_create = _loaded_heavy_modules()
+
+    warmup_status = None
+    if with_warmup:
+        from backend.services import get_warmup_status, start_background_warmup
+        thread = start_background_warmup(app)
+        start = time.perf_counter()
+        thread.join(timeout=warmup_timeout)
+        timings['préchargement (attente)'] = time.perf_counter() - start
+        warmup_status = get_warmup_status()
+
+    print("📊 Rapport de démarrage ArticSpace")
+    print("-" * 50)
+    for step, duration in timings.items():
+        print(f"  {step:<28} {duration * 1000:>9.1f} ms")
+    print("-" * 50)
+    total = timings['import backend'] + timings['create_app()']
+    timings["total (app prête)"] = total
+    print(f"  {'total (app prête)':<28} {total * 1000:>9.1f} ms")
+
+    if heavy_after_create:
+        print(f"⚠️ Modules lourds chargés au démarrage: {', '.join(heavy_after_create)}")
+    else:
+        print("✅ Aucun module ML lourd chargé par create_app()")
+
+    if warmup_status:
+        print(f"🔥 Préchargement: {warmup_status['state']} ({warmup_status['duration']}s)")
+        for name, step in warmup_status['steps'].items():
+            detail = f"{step['duration']}s" if step['status'] == 'ok' else step.get('error')
+            print(f"    - {name}: {step['status']} ({detail})")
+
+    return timings
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Rapport de temps de démarrage ArticSpace")
+    parser.add_argument('--warmup', action='store_true', help="Attendre et chronométrer le préchargement RAG / modèles")
+    parser.add_argument('--timeout', type=float, default=600.0, help="Délai maximal d'attente du préchargement (s)")
+    args = parser.parse_args()
+    run_report(with_warmup=args.warmup, warmup_timeout=args.timeout)
@@ -0,0 +1,169 @@
+# tests/conftest.py
+"""
+Fixtures communes : aucun service externe (Ollama, edge-tts) n'est appelé.
+Le client LLM est remplacé par un faux client.
+"""
+
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pytest
+from langchain_core.embeddings import Embeddings
+
+# Ajouter le répertoire du projet au path Python
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class HashEmbeddings(Embeddings):
+    """Sac de mots haché : embeddings déterministes, sans modèle"""
+
+    dim = 64
+
+    def __init__(self):
+        self.calls = []
+
+    def _embed(self, text):
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for word in re.findall(r'\w+', text.lower()):
+            vector[int(hashlib.md5(word.encode()).hexdigest(), 16) % self.dim] += 1.0
+        return vector.tolist()
+
+    def embed_query(self, text):
+        self.calls.append(('query', 1))
+        return self._embed(text)
+
+    def embed_documents(self, texts):
+        self.calls.append(('documents', len(texts)))
+        return [self._embed(text) for text in texts]
+
+
+class FakeLLM:
+    """Remplace ``llm_client.chat`` : réponse fixe (ou calculée), appels enregistrés"""
+
+    def __init__(self, reply="ANSWER"):
+        self.reply = reply
+        self.calls = []
+
+    def chat(self, model, messages, options=None, **kwargs):
+        self.calls.append({'model': model, 'messages': messages, 'options': options, 'kwargs': kwargs})
+        content = self.reply(model, messages) if callable(self.reply) else self.reply
+        return {'message': {'role': 'assistant', 'content': content}}
+
+    def prompts(self):
+        return [call['messages'][-1]['content'] for call in self.calls]
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    from backend.services import llm_client
+    fake = FakeLLM()
+    monkeypatch.setattr(llm_client, 'chat', fake.chat)
+    monkeypatch.setattr(llm_client, 'prewarm', lambda models: [])
+    # Pas de cache de résultats LLM partagé entre les tests
+    from config import Config
+    monkeypatch.setattr(Config, 'LLM_RESULT_CACHE_ENABLED', False)
+    return fake
+
+
+class FakeOllamaServer:
+    """
+    Serveur HTTP local qui imite /api/chat et /api/generate d'Ollama.
+    ``handler(path, body)`` retourne (statut, réponse JSON, délai en secondes).
+    """
+
+    def __init__(self):
+        self.requests = []
+        self.active = 0
+        self.max_active = 0
+        self.handler = lambda path, body: (200, self.reply(body), 0)
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get('Content-Length') or 0)) or b'{}')
+                with server._lock:
+                    server.requests.append({'path': self.path, 'body': body, 'port': self.client_address[1]})
+                    server.active += 1
+                    server.max_active = max(server.max_active, server.active)
+                try:
+                    status, payload, delay = server.handler(self.path, body)
+                    time.sleep(delay)
+                finally:
+                    with server._lock:
+                        server.active -= 1
+                data = json.dumps(payload).encode()
+                try:
+                    self.send_response(status)
+                    self.send_header('Content-Type', 'application/json')
+                    self.send_header('Content-Length', str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+                except OSError:
+                    pass  # client parti (délai dépassé)
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        self._server.block_on_close = False
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}"
+        threading.Thread(target=self._server.serve_forever, args=(0.05,), daemon=True).start()
+
+    @staticmethod
+    def reply(body, content=None):
+        """Réponse Ollama complète (chat ou generate) pour la requête ``body``"""
+        if content is None:
+            messages = body.get('messages') or [{'content': body.get('prompt', '')}]
+            content = "echo: " + messages[-1]['content']
+        payload = {'model': body.get('model'), 'created_at': '2024-01-01T00:00:00Z', 'done': True,
+                   'prompt_eval_count': 10, 'eval_count': 5, 'eval_duration': 1000000}
+        if 'messages' in body:
+            payload['message'] = {'role': 'assistant', 'content': content}
+        else:
+            payload['response'] = content
+        return payload
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+@pytest.fixture
+def ollama_server():
+    server = FakeOllamaServer()
+    yield server
+    server.close()
+
+
+
+@pytest.fixture
+def result_cache(tmp_path, monkeypatch):
+    """Cache de résultats LLM isolé et activé"""
+    from backend.services import result_cache as result_cache_module
+    from config import Config
+    cache = result_cache_module.ResultCache(str(tmp_path / 'llm_results.sqlite'))
+    monkeypatch.setattr(result_cache_module, '_result_cache', cache)
+    monkeypatch.setattr(Config, 'LLM_RESULT_CACHE_ENABLED', True)
+    return cache
+
+
+@pytest.fixture
+def audio_cache(tmp_path, monkeypatch):
+    """Cache audio isolé dans un dossier temporaire"""
+    from backend.services import audio_cache as audio_cache_module
+    from config import Config
+    cache = audio_cache_module.AudioCache(str(tmp_path / 'tts_cache'), max_bytes=1024 * 1024)
+    monkeypatch.setattr(audio_cache_module, '_audio_cache', cache)
+    monkeypatch.setattr(Config, 'TTS_AUDIO_CACHE_ENABLED', True)
+    return cache
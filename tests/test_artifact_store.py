@@ -0,0 +1,118 @@
+# tests/test_artifact_store.py
+import io
+import os
+import threading
+
+import pytest
+
+from backend.services.artifact_store import ArtifactStore, artifact_name, hash_upload
+
+DOCUMENT_ID = "ab" + "0" * 62
+
+
+def test_hash_upload_is_the_pdf_sha256():
+    import hashlib
+    data = b"%PDF-1.7 " * 100000
+    document_id, buffer = hash_upload(io.BytesIO(data), chunk_size=4096)
+    assert document_id == hashlib.sha256(data).hexdigest()
+    assert buffer.read() == data
+
+
+def test_invalid_document_id_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        ArtifactStore(str(tmp_path)).document_dir("../../etc")
+
+
+def test_artifact_roundtrip(tmp_path):
+    store = ArtifactStore(str(tmp_path))
+    assert store.get_text(DOCUMENT_ID) is None and store.get_figures(DOCUMENT_ID) is None
+    store.put_json(DOCUMENT_ID, 'summary', {'summary': 'Résumé', 'translations': {}})
+    store.put_bytes(DOCUMENT_ID, artifact_name('podcast', 'fr', 'Interview'), b"ID3")
+    store.update_json(DOCUMENT_ID, 'summary', lambda value: dict(value, translations={'en': 'Summary'}))
+
+    assert store.get_json(DOCUMENT_ID, 'summary') == {'summary': 'Résumé', 'translations': {'en': 'Summary'}}
+    assert store.get_bytes(DOCUMENT_ID, artifact_name('podcast', 'fr', 'Interview')) == b"ID3"
+    assert store.document_dir(DOCUMENT_ID).startswith(os.path.join(str(tmp_path), "ab"))
+
+
+def test_figures_are_published_in_one_step(tmp_path, monkeypatch):
+    store = ArtifactStore(str(tmp_path))
+    figures_dir = os.path.join(store.document_dir(DOCUMENT_ID), "figures")
+    written = []
+    real_open = open
+
+    def watching_open(path, mode='r', *args, **kwargs):
+        if 'w' in mode and str(path).endswith('.png'):
+            # Pendant l'écriture, le dossier publié n'existe pas encore
+            written.append((path, os.path.exists(figures_dir)))
+        return real_open(path, mode, *args, **kwargs)
+
+    monkeypatch.setattr('builtins.open', watching_open)
+    paths = store.put_figures(DOCUMENT_ID, [b"png-1", b"png-2", b"png-3"])
+    monkeypatch.undo()
+
+    assert len(written) == 3 and not any(published for _, published in written)
+    assert all(os.path.dirname(path) != figures_dir for path, _ in written)
+    assert [os.path.basename(path) for path in paths] == ["001.png", "002.png", "003.png"]
+    assert [real_open(path, 'rb').read() for path in paths] == [b"png-1", b"png-2", b"png-3"]
+    assert sorted(os.listdir(store.document_dir(DOCUMENT_ID))) == ["figures"]
+
+
+def test_published_figures_are_never_rewritten(tmp_path):
+    store = ArtifactStore(str(tmp_path))
+    first = store.put_figures(DOCUMENT_ID, [b"png-1", b"png-2"])
+    inodes = [os.stat(path).st_ino for path in first]
+
+    assert store.put_figures(DOCUMENT_ID, [b"other"]) == first
+    assert [os.stat(path).st_ino for path in first] == inodes
+    assert store.put_figures("cd" + "0" * 62, []) == []
+
+
+def test_concurrent_extractions_publish_one_complete_set(tmp_path):
+    store = ArtifactStore(str(tmp_path))
+    figures = [bytes([index]) * 1000 for index in range(20)]
+    seen = []
+    done = threading.Event()
+
+    def reader():
+        while not done.is_set():
+            listed = store.get_figures(DOCUMENT_ID)
+            if listed is not None:
+                seen.append(len(listed))
+
+    thread = threading.Thread(target=reader)
+    thread.start()
+    writers = [threading.Thread(target=store.put_figures, args=(DOCUMENT_ID, figures)) for _ in range(4)]
+    for writer in writers:
+        writer.start()
+    for writer in writers:
+        writer.join()
+    done.set()
+    thread.join()
+
+    assert set(seen) <= {20}
+    assert len(store.get_figures(DOCUMENT_ID)) == 20
+    assert os.listdir(store.document_dir(DOCUMENT_ID)) == ["figures"]
+
+
+def test_pipeline_writes_the_text_last(tmp_path, monkeypatch):
+    from backend.services import summarize_pipeline
+    store = ArtifactStore(str(tmp_path))
+    order = []
+    monkeypatch.setattr(store, 'put_figures', lambda *args: order.append('figures'))
+    monkeypatch.setattr(store, 'put_text', lambda *args: order.append('text'))
+    monkeypatch.setattr('backend.services.artifact_store.get_artifact_store', lambda: store)
+    monkeypatch.setattr('backend.services.llm_client.prewarm', lambda models: [])
+    monkeypatch.setattr('backend.services.summarization_service.extract_from_pdf',
+                        lambda stream: ("1 Introduction\nTexte.", [b"png"]))
+
+    class Stop(Exception):
+        pass
+
+    def stop(*args, **kwargs):
+        raise Stop()
+
+    monkeypatch.setattr('backend.services.summarization_service.summarize_document_with_vision', stop)
+    with pytest.raises(Stop):
+        summarize_pipeline.summarize_document(None, DOCUMENT_ID, io.BytesIO(b"%PDF"))
+    assert order == ['figures', 'text']
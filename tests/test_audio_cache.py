@@ -0,0 +1,88 @@
+# tests/test_audio_cache.py
+import asyncio
+import os
+import time
+
+from backend.services.audio_cache import AudioCache
+from backend.services.tts_service import get_tts_backend, stream_speech, synthesize_cached
+
+from test_tts_service import _wav_data_size
+
+
+def test_stream_speech_caches_completed_stream(audio_cache):
+    backend = get_tts_backend('local')
+    chunks = list(stream_speech("Texte assez long pour plusieurs blocs audio", "voice", backend=backend))
+    assert len(chunks) > 1
+    audio = b"".join(chunks)
+    _wav_data_size(audio)
+
+    key = audio_cache.make_key("Texte assez long pour plusieurs blocs audio", "voice", "+0%", "local")
+    assert audio_cache.get(key) == audio
+
+    # Deuxième lecture : un seul bloc, servi depuis le cache
+    cached = list(stream_speech("Texte assez long pour plusieurs blocs audio", "voice", backend=backend))
+    assert cached == [audio]
+
+
+def test_interrupted_stream_is_not_cached(audio_cache):
+    backend = get_tts_backend('local')
+    stream = stream_speech("Texte interrompu par le client", "voice", backend=backend)
+    next(stream)
+    stream.close()
+
+    key = audio_cache.make_key("Texte interrompu par le client", "voice", "+0%", "local")
+    assert audio_cache.get(key) is None
+
+
+def test_use_cache_false_resynthesizes(audio_cache):
+    backend = get_tts_backend('local')
+    list(stream_speech("Bonjour", "voice", backend=backend))
+    chunks = list(stream_speech("Bonjour", "voice", backend=backend, use_cache=False))
+    assert len(chunks) > 1
+
+
+def test_synthesize_cached(audio_cache):
+    backend = get_tts_backend('local')
+    first = asyncio.run(synthesize_cached("Intro du podcast", "voice", backend=backend))
+    assert audio_cache.misses == 1
+    second = asyncio.run(synthesize_cached("Intro du podcast", "voice", backend=backend))
+    assert second == first
+    assert audio_cache.hits == 1
+
+
+def test_audio_cache_evicts_least_recently_used(tmp_path):
+    cache = AudioCache(str(tmp_path), max_bytes=250)
+    cache.set("a" * 64, b"x" * 100)
+    cache.set("b" * 64, b"x" * 100)
+    # "a" relu : "b" devient le moins récemment utilisé
+    path_b = cache._path("b" * 64)
+    os.utime(path_b, (time.time() - 60, time.time() - 60))
+    assert cache.get("a" * 64) is not None
+    cache.set("c" * 64, b"x" * 100)
+
+    assert cache.get("b" * 64) is None
+    assert cache.get("a" * 64) is not None
+    assert cache.get("c" * 64) is not None
+    assert cache.stats()['size_bytes'] <= 250
+
+
+def test_podcast_segment_retries_once_then_gives_up(monkeypatch):
+    from backend.services import podcast_service
+    calls = []
+
+    async def failing_synthesis(text, voice):
+        calls.append(text)
+        raise ConnectionError("edge-tts indisponible")
+
+    monkeypatch.setattr(podcast_service, 'synthesize_cached', failing_synthesis)
+
+    # Texte avec didascalies : texte nettoyé, puis une seule tentative sur le texte brut
+    assert asyncio.run(podcast_service.generate_emotional_audio_segment(
+        "(smiling) Bonjour à tous", ['happy'], "voice", "fr")) is None
+    assert calls == ["Bonjour à tous", "(smiling) Bonjour à tous"]
+
+    # Texte déjà propre : pas de nouvelle tentative identique
+    calls.clear()
+    assert asyncio.run(podcast_service.generate_emotional_audio_segment(
+        "Bonjour à tous", [], "voice", "fr")) is None
+    assert calls == ["Bonjour à tous"]
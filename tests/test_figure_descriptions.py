@@ -0,0 +1,255 @@
+# tests/test_figure_descriptions.py
+import base64
+import io
+import random
+
+from PIL import Image, ImageDraw
+
+from backend.services.summarization_service import (
+    DHASH_DUPLICATE_DISTANCE, collapse_near_duplicate_images, dhash_distance, image_dhash,
+    process_images_in_parallel,
+)
+
+
+def figure_png(seed, size=(600, 400), fmt="PNG"):
+    """Figure synthétique (barres et traits) propre à ``seed``"""
+    rng = random.Random(seed)
+    image = Image.new("RGB", size, "white")
+    draw = ImageDraw.Draw(image)
+    width, height = size
+    for _ in range(12):
+        x0, y0 = rng.randrange(width - 40), rng.randrange(height - 40)
+        shade = tuple(rng.randrange(256) for _ in range(3))
+        draw.rectangle([x0, y0, x0 + rng.randrange(20, width // 2), y0 + rng.randrange(20, height // 2)], fill=shade)
+    buffer = io.BytesIO()
+    image.save(buffer, fmt)
+    return buffer.getvalue()
+
+
+def resized(png, size, fmt="PNG"):
+    buffer = io.BytesIO()
+    Image.open(io.BytesIO(png)).convert("RGB").resize(size, Image.LANCZOS).save(buffer, fmt)
+    return buffer.getvalue()
+
+
+def sent_images(call):
+    """Images PIL envoyées au modèle de vision lors d'un appel"""
+    return [Image.open(io.BytesIO(base64.b64decode(data))) for data in call['messages'][-1].get('images', [])]
+
+
+def figure_index(call, figures):
+    """Indice de la figure envoyée (empreinte la plus proche)"""
+    fingerprint = image_dhash(sent_images(call)[0])
+    distances = [dhash_distance(fingerprint, image_dhash(Image.open(io.BytesIO(f)))) for f in figures]
+    return distances.index(min(distances))
+
+
+def vision_reply(figures):
+    return lambda model, messages: f"Description of figure {figure_index({'messages': messages}, figures) + 1}"
+
+
+def test_dhash_is_stable_to_resizing_and_recompression():
+    figure = Image.open(io.BytesIO(figure_png(1)))
+    fingerprint = image_dhash(figure)
+    assert len(fingerprint) == 64
+    for variant in (resized(figure_png(1), (300, 200)), resized(figure_png(1), (900, 600), "JPEG")):
+        assert dhash_distance(fingerprint, image_dhash(Image.open(io.BytesIO(variant)))) <= DHASH_DUPLICATE_DISTANCE
+    assert dhash_distance(fingerprint, image_dhash(Image.open(io.BytesIO(figure_png(2))))) > DHASH_DUPLICATE_DISTANCE
+
+
+def test_near_duplicates_collapse_to_the_largest_copy():
+    small_copy = resized(figure_png(1), (300, 200))
+    large_copy = resized(figure_png(1), (900, 600))
+    other = figure_png(2)
+    kept = collapse_near_duplicate_images([small_copy, other, large_copy, b"not an image"])
+
+    assert [figure for figure, _ in kept] == [large_copy, other, b"not an image"]
+    assert kept[2][1] is None
+
+
+def test_descriptions_are_cached_by_perceptual_hash(fake_llm, result_cache):
+    figures = [figure_png(1), figure_png(2)]
+    fake_llm.reply = vision_reply(figures)
+
+    first = process_images_in_parallel(figures, max_workers=2)
+    assert first == {1: "Description of figure 1", 2: "Description of figure 2"}
+    assert len(fake_llm.calls) == 2
+
+    # Mêmes pixels réencodés (autres octets, même empreinte) et un doublon : aucun nouvel appel
+    reencoded = io.BytesIO()
+    Image.open(io.BytesIO(figures[0])).save(reencoded, "PNG", optimize=True, compress_level=1)
+    assert reencoded.getvalue() != figures[0]
+    variants = [reencoded.getvalue(), figures[1], figures[1]]
+    assert process_images_in_parallel(variants, max_workers=2) == first
+    assert len(fake_llm.calls) == 2
+    assert process_images_in_parallel(figures, max_workers=2, use_cache=False) == first
+    assert len(fake_llm.calls) == 4
+
+
+def test_duplicates_are_described_once(fake_llm):
+    figures = [figure_png(1), figure_png(1), resized(figure_png(1), (300, 200))]
+    fake_llm.reply = vision_reply(figures)
+    events = []
+    assert process_images_in_parallel(figures, max_workers=2, progress_callback=events.append) == \
+        {1: "Description of figure 1"}
+    assert len(fake_llm.calls) == 1
+    assert events[0]['event'] == 'started' and events[0]['duplicates_removed'] == 2
+
+
+def test_vision_payload_is_downscaled(fake_llm):
+    from backend.services.summarization_service import prepare_vision_image
+    large = figure_png(3, size=(2400, 1600))
+    image = Image.open(io.BytesIO(base64.b64decode(prepare_vision_image(large, max_side=768))))
+    assert image.size == (768, 512)
+    # Figure déjà petite : taille conservée
+    small = Image.open(io.BytesIO(base64.b64decode(prepare_vision_image(figure_png(3, size=(300, 200))))))
+    assert small.size == (300, 200)
+
+    process_images_in_parallel([large], max_workers=1)
+    assert max(sent_images(fake_llm.calls[0])[0].size) == 768
+
+
+def test_montage_tiles_figures_in_two_columns():
+    from backend.services.summarization_service import build_figure_montage
+    montage = Image.open(io.BytesIO(base64.b64decode(
+        build_figure_montage([figure_png(seed, size=(400, 300)) for seed in range(3)], max_side=768)
+    )))
+    label_height = 768 // 24
+    cell = min(768 // 2, 768 // 2 - label_height)
+    assert montage.size == (2 * cell, 2 * (cell + label_height))
+    # Quatrième case vide (fond blanc)
+    empty = montage.crop((cell + 2, cell + label_height + 2 + label_height, 2 * cell - 2, montage.height - 2))
+    assert empty.getextrema() == ((255, 255), (255, 255), (255, 255))
+
+
+def test_split_montage_response():
+    from backend.services.summarization_service import split_montage_response
+    text = "**Figure 1:** A bar chart.\nFigure 2. A pipeline\ndiagram.\n## Figure 3 - A table."
+    assert split_montage_response(text, 3) == {1: "A bar chart.", 2: "A pipeline\ndiagram.", 3: "A table."}
+    assert split_montage_response("Figure 1: only one", 2) is None
+    assert split_montage_response("No sections at all", 1) is None
+
+
+def _montage_reply(model, messages):
+    import re
+    count = re.search(r'montage of (\d+) separate figures', messages[-1]['content'])
+    if count:
+        return "\n".join(f"Figure {k}: montage description {k}" for k in range(1, int(count.group(1)) + 1))
+    return "single description"
+
+
+def test_small_figures_are_described_in_one_montage_call(fake_llm, result_cache, monkeypatch):
+    from config import Config
+    monkeypatch.setattr(Config, 'LLM_VISION_MONTAGE', True)
+    monkeypatch.setattr(Config, 'LLM_VISION_MONTAGE_SIZE', 4)
+    fake_llm.reply = _montage_reply
+    figures = [figure_png(seed, size=(400, 300)) for seed in range(3)] + [figure_png(9, size=(1200, 800))]
+
+    descriptions = process_images_in_parallel(figures, max_workers=2)
+
+    assert descriptions == {1: "montage description 1", 2: "montage description 2",
+                            3: "montage description 3", 4: "single description"}
+    assert len(fake_llm.calls) == 2
+    # Descriptions de planche mémorisées par figure : relues sans appel
+    assert process_images_in_parallel(figures[:3], max_workers=2) == \
+        {1: "montage description 1", 2: "montage description 2", 3: "montage description 3"}
+    assert len(fake_llm.calls) == 2
+
+
+def test_unparseable_montage_falls_back_to_single_figures(fake_llm, monkeypatch):
+    from config import Config
+    monkeypatch.setattr(Config, 'LLM_VISION_MONTAGE', True)
+    figures = [figure_png(seed, size=(400, 300)) for seed in range(2)]
+    fake_llm.reply = lambda model, messages: ("I see two charts." if 'montage' in messages[-1]['content']
+                                              else vision_reply(figures)(model, messages))
+
+    assert process_images_in_parallel(figures, max_workers=1) == \
+        {1: "Description of figure 1", 2: "Description of figure 2"}
+    assert len(fake_llm.calls) == 3
+
+
+def _timed_vision(figures, delays, ignore_timeout=False):
+    """Faux appel de vision : durée propre à chaque figure, délai de l'appel respecté"""
+    import time
+    from backend.services.llm_client import LLMTimeoutError
+    calls = []
+
+    def chat(model, messages, options=None, timeout=None, **kwargs):
+        index = figure_index({'messages': messages}, figures)
+        calls.append((index + 1, timeout))
+        delay = delays[index]
+        if not ignore_timeout and timeout is not None and delay > timeout:
+            time.sleep(timeout)
+            raise LLMTimeoutError(f"Délai de {timeout}s dépassé")
+        time.sleep(delay)
+        return {'message': {'role': 'assistant', 'content': f"Description of figure {index + 1}"}}
+
+    return chat, calls
+
+
+def test_results_are_collected_in_completion_order(fake_llm, monkeypatch):
+    from backend.services import llm_client
+    figures = [figure_png(seed) for seed in range(3)]
+    chat, calls = _timed_vision(figures, [0.4, 0.05, 0.2])
+    monkeypatch.setattr(llm_client, 'chat', chat)
+    events = []
+
+    descriptions = process_images_in_parallel(figures, max_workers=3, progress_callback=events.append)
+
+    assert descriptions == {number: f"Description of figure {number}" for number in (1, 2, 3)}
+    assert [event['event'] for event in events] == ['started', 'image_done', 'image_done', 'image_done', 'done']
+    assert [event['image'] for event in events if event['event'] == 'image_done'] == [2, 3, 1]
+    assert [event['completed'] for event in events] == [0, 1, 2, 3, 3]
+    assert all(event['total'] == 3 and event['stage'] == 'image_descriptions' for event in events)
+    assert events[-1]['described'] == 3
+
+
+def test_slow_figure_times_out_without_blocking_the_others(fake_llm, monkeypatch):
+    import time
+    from backend.services import llm_client
+    figures = [figure_png(seed) for seed in range(3)]
+    chat, calls = _timed_vision(figures, [0.05, 5, 0.05])
+    monkeypatch.setattr(llm_client, 'chat', chat)
+    events = []
+
+    start = time.monotonic()
+    descriptions = process_images_in_parallel(figures, max_workers=2, image_timeout=0.3,
+                                              progress_callback=events.append)
+
+    assert time.monotonic() - start < 1.5
+    assert descriptions == {1: "Description of figure 1", 3: "Description of figure 3"}
+    # Le délai par figure est transmis à l'appel de vision
+    assert all(timeout == 0.3 for _, timeout in calls)
+    failed = [event for event in events if event['event'] == 'image_failed']
+    assert [event['image'] for event in failed] == [2] and "Délai" in failed[0]['error']
+    assert events[-1] == dict(events[-1], event='done', completed=3, described=2)
+
+
+def test_collection_stops_waiting_for_a_stuck_task(fake_llm, monkeypatch):
+    import time
+    from backend.services import llm_client
+    figures = [figure_png(seed) for seed in range(2)]
+    # Appel qui ignore son délai : la collecte abandonne la figure à l'échéance
+    chat, _ = _timed_vision(figures, [0.05, 3], ignore_timeout=True)
+    monkeypatch.setattr(llm_client, 'chat', chat)
+    events = []
+
+    start = time.monotonic()
+    descriptions = process_images_in_parallel(figures, max_workers=2, image_timeout=0.3,
+                                              progress_callback=events.append)
+
+    assert time.monotonic() - start < 2
+    assert descriptions == {1: "Description of figure 1"}
+    assert [event['image'] for event in events if event['event'] == 'image_timeout'] == [2]
+    assert events[-1]['event'] == 'done'
+
+
+def test_failing_progress_callback_is_ignored(fake_llm):
+    figures = [figure_png(1)]
+    fake_llm.reply = vision_reply(figures)
+
+    def callback(event):
+        raise RuntimeError("client SSE déconnecté")
+
+    assert process_images_in_parallel(figures, max_workers=1, progress_callback=callback) == \
+        {1: "Description of figure 1"}
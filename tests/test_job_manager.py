@@ -0,0 +1,169 @@
+# tests/test_job_manager.py
+import json
+import threading
+import time
+
+import pytest
+from flask import Flask
+
+from backend.services import job_manager as job_manager_module
+from backend.services.job_manager import JobManager
+
+
+def _wait_finished(manager, job_id, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = manager.get(job_id)
+        if job['status'] in ('completed', 'error'):
+            return job
+        time.sleep(0.01)
+    raise AssertionError("le job ne s'est pas terminé")
+
+
+def test_job_runs_and_records_stage_events():
+    manager = JobManager(max_workers=1)
+
+    def work(progress):
+        progress({'stage': 'extraction', 'event': 'started'})
+        progress({'stage': 'extraction', 'event': 'done'})
+        progress({'stage': 'summary', 'event': 'progress', 'completed': 1, 'total': 2})
+        return {'summary': 'ok'}
+
+    job, attached = manager.submit('summarize', 'doc', work, stages=('extraction', 'summary'))
+    assert not attached
+    assert job['status'] in ('queued', 'running')
+
+    job = _wait_finished(manager, job['job_id'])
+    assert job['status'] == 'completed'
+    assert job['stages']['extraction']['status'] == 'done'
+    assert 'duration' in job['stages']['extraction']
+    assert job['stages']['summary'] == {'status': 'running', 'completed': 1, 'total': 2}
+    assert job['progress'] == 0.5
+
+    snapshot, result, client_error = manager.get_result(job['job_id'])
+    assert result == {'summary': 'ok'}
+    assert not client_error
+
+
+def test_same_key_attaches_to_running_job():
+    manager = JobManager(max_workers=2)
+    release = threading.Event()
+    runs = []
+
+    def work(progress):
+        runs.append(1)
+        release.wait(5)
+        return 'done'
+
+    first, _ = manager.submit('summarize', ('summarize', 'doc', ('use_cache', True)), work)
+    second, attached = manager.submit('summarize', ('summarize', 'doc', ('use_cache', True)), work)
+    other, other_attached = manager.submit('summarize', ('summarize', 'doc', ('use_cache', False)), work)
+    release.set()
+
+    assert attached and second['job_id'] == first['job_id']
+    assert not other_attached and other['job_id'] != first['job_id']
+    _wait_finished(manager, first['job_id'])
+    _wait_finished(manager, other['job_id'])
+    assert len(runs) == 2
+
+    # Job terminé : une nouvelle soumission crée un nouveau job
+    third, attached = manager.submit('summarize', ('summarize', 'doc', ('use_cache', True)), work)
+    assert not attached and third['job_id'] != first['job_id']
+
+
+def test_value_error_is_a_client_error():
+    manager = JobManager(max_workers=1)
+
+    def work(progress):
+        progress({'stage': 'extraction', 'event': 'started'})
+        raise ValueError("PDF sans texte")
+
+    job, _ = manager.submit('summarize', None, work, stages=('extraction',))
+    job = _wait_finished(manager, job['job_id'])
+    assert job['status'] == 'error'
+    assert job['error'] == "PDF sans texte"
+    assert job['stages']['extraction']['status'] == 'error'
+    assert manager.get_result(job['job_id'])[2] is True
+
+
+def test_finished_jobs_expire_on_read():
+    manager = JobManager(max_workers=1, ttl=0.05)
+    job, _ = manager.submit('summarize', None, lambda progress: 'done')
+    _wait_finished(manager, job['job_id'])
+    time.sleep(0.1)
+    assert manager.get(job['job_id']) is None
+    assert manager.status() == {'jobs': {}, 'active_keys': 0}
+
+
+def test_wait_events_returns_new_events():
+    manager = JobManager(max_workers=1)
+    step = threading.Event()
+
+    def work(progress):
+        progress({'stage': 'a', 'event': 'started'})
+        step.wait(5)
+        progress({'stage': 'a', 'event': 'done'})
+        return None
+
+    job, _ = manager.submit('summarize', None, work, stages=('a',))
+    events, finished = manager.wait_events(job['job_id'], after=0, timeout=5)
+    assert [event['event'] for event in events] == ['started'] and not finished
+
+    step.set()
+    events, finished = manager.wait_events(job['job_id'], after=events[-1]['id'], timeout=5)
+    assert events[0]['event'] == 'done'
+    _wait_finished(manager, job['job_id'])
+    assert manager.wait_events(job['job_id'], after=2, timeout=0.1) == ([], True)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    from backend.routes.summarization import summarization_bp
+    manager = JobManager(max_workers=1)
+    monkeypatch.setattr(job_manager_module, '_job_manager', manager)
+    app = Flask(__name__)
+    app.register_blueprint(summarization_bp)
+    return app.test_client(), manager
+
+
+def _parse_sse(body):
+    messages = []
+    for block in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.split("\n") if not line.startswith(":"))
+        if fields:
+            messages.append(fields)
+    return messages
+
+
+def test_job_routes_stream_events_and_result(client):
+    client, manager = client
+
+    def work(progress):
+        progress({'stage': 'extraction', 'event': 'started'})
+        progress({'stage': 'extraction', 'event': 'done'})
+        return {'summary': 'ok'}
+
+    job, _ = manager.submit('summarize', None, work, stages=('extraction',))
+    job_id = job['job_id']
+
+    response = client.get(f'/summarize/jobs/{job_id}/events')
+    assert response.mimetype == 'text/event-stream'
+    messages = _parse_sse(response.get_data(as_text=True))
+    assert [json.loads(m['data'])['event'] for m in messages if 'id' in m] == ['started', 'done']
+    assert messages[-1]['event'] == 'end'
+    assert json.loads(messages[-1]['data'])['status'] == 'completed'
+
+    # Reprise après le premier événement (Last-Event-ID)
+    resumed = _parse_sse(client.get(f'/summarize/jobs/{job_id}/events',
+                                    headers={'Last-Event-ID': '1'}).get_data(as_text=True))
+    assert [m['id'] for m in resumed if 'id' in m] == ['2']
+
+    assert client.get(f'/summarize/jobs/{job_id}').get_json()['status'] == 'completed'
+    assert client.get(f'/summarize/jobs/{job_id}/result').get_json() == {'summary': 'ok'}
+
+
+def test_job_routes_unknown_job(client):
+    client, _ = client
+    assert client.get('/summarize/jobs/unknown').status_code == 404
+    assert client.get('/summarize/jobs/unknown/events').status_code == 404
+    assert client.get('/summarize/jobs/unknown/result').status_code == 404
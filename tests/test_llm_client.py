@@ -0,0 +1,203 @@
+# tests/test_llm_client.py
+import threading
+import time
+
+import ollama
+import pytest
+
+from backend.services.llm_client import LLMClient, LLMTimeoutError
+
+MESSAGES = [{'role': 'user', 'content': 'Bonjour'}]
+
+
+def _client(server, **kwargs):
+    options = dict(base_url=server.url, timeout=5, retry_backoff=0.01, adaptive_num_ctx=False)
+    options.update(kwargs)
+    return LLMClient(**options)
+
+
+def test_chat_returns_ollama_response(ollama_server):
+    client = _client(ollama_server)
+    response = client.chat('llama3.2', MESSAGES, options={'temperature': 0})
+    assert response['message']['content'] == "echo: Bonjour"
+    body = ollama_server.requests[0]['body']
+    assert body['model'] == 'llama3.2' and body['options'] == {'temperature': 0}
+    assert body['keep_alive'] == '10m'
+    assert client.get_metrics()['llama3.2']['calls'] == 1
+
+
+def test_deadline_interrupts_http_request(ollama_server):
+    ollama_server.handler = lambda path, body: (200, ollama_server.reply(body), 3)
+    client = _client(ollama_server)
+    start = time.monotonic()
+    with pytest.raises(LLMTimeoutError):
+        client.chat('llama3.2', MESSAGES, timeout=0.5)
+    assert time.monotonic() - start < 1.5
+    metrics = client.get_metrics()['llama3.2']
+    assert metrics['timeouts'] == 1 and metrics['in_flight'] == 0
+    # Le créneau du modèle est libéré
+    assert client.scheduler.status()['running'] == {}
+
+
+def test_deadline_hook_is_installed_on_the_http_client(ollama_server, monkeypatch):
+    # Échoue si le délai par appel n'atteint plus la requête HTTP
+    client = _client(ollama_server)
+    seen = []
+    apply_deadline = client._apply_deadline
+    monkeypatch.setattr(client, '_apply_deadline',
+                        lambda request: (apply_deadline(request), seen.append(request.extensions['timeout'])))
+    client.chat('llama3.2', MESSAGES, timeout=2)
+    assert len(seen) == 1
+    assert 0 < seen[0]['read'] <= 2 and seen[0]['connect'] <= client.connect_timeout
+    # Hors appel, le délai global du client s'applique
+    assert getattr(client._request_timeout, 'value') is None
+
+
+def test_transient_errors_are_retried(ollama_server):
+    statuses = [503, 503, 200]
+    ollama_server.handler = lambda path, body: (statuses.pop(0), ollama_server.reply(body), 0)
+    client = _client(ollama_server, max_retries=2)
+    assert client.chat('llama3.2', MESSAGES)['message']['content'] == "echo: Bonjour"
+    assert len(ollama_server.requests) == 3
+    assert client.get_metrics()['llama3.2']['retries'] == 2
+
+
+def test_retries_are_bounded(ollama_server):
+    ollama_server.handler = lambda path, body: (503, {'error': 'overloaded'}, 0)
+    client = _client(ollama_server, max_retries=1)
+    with pytest.raises(ollama.ResponseError):
+        client.chat('llama3.2', MESSAGES)
+    assert len(ollama_server.requests) == 2
+
+
+def test_client_errors_are_not_retried(ollama_server):
+    ollama_server.handler = lambda path, body: (400, {'error': 'bad request'}, 0)
+    client = _client(ollama_server, max_retries=3)
+    with pytest.raises(ollama.ResponseError):
+        client.chat('llama3.2', MESSAGES)
+    assert len(ollama_server.requests) == 1
+    assert client.get_metrics()['llama3.2']['errors'] == 1
+
+
+def test_connections_are_reused(ollama_server):
+    client = _client(ollama_server)
+    for index in range(3):
+        client.chat('llama3.2', [{'role': 'user', 'content': f'question {index}'}])
+    assert len({request['port'] for request in ollama_server.requests}) == 1
+
+
+def test_model_concurrency_limit(ollama_server):
+    ollama_server.handler = lambda path, body: (200, ollama_server.reply(body), 0.2)
+    client = _client(ollama_server, max_concurrency=1)
+    threads = [threading.Thread(target=client.chat, args=('llama3.2', [{'role': 'user', 'content': str(i)}]))
+               for i in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(ollama_server.requests) == 3
+    assert ollama_server.max_active == 1
+
+
+def _concurrent(count, func):
+    results, errors = [None] * count, [None] * count
+
+    def run(index):
+        try:
+            results[index] = func()
+        except Exception as e:
+            errors[index] = e
+
+    threads = [threading.Thread(target=run, args=(index,)) for index in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, errors
+
+
+def test_identical_concurrent_requests_share_one_upstream_call(ollama_server):
+    ollama_server.handler = lambda path, body: (200, ollama_server.reply(body), 0.3)
+    client = _client(ollama_server, max_concurrency=4)
+
+    results, errors = _concurrent(5, lambda: client.chat('llama3.2', MESSAGES, options={'temperature': 0}))
+
+    assert errors == [None] * 5
+    assert len(ollama_server.requests) == 1
+    assert all(result['message']['content'] == "echo: Bonjour" for result in results)
+    assert client.get_metrics()['llama3.2']['coalesced'] == 4
+
+    # Requête terminée : un nouvel appel repart vers le serveur
+    client.chat('llama3.2', MESSAGES, options={'temperature': 0})
+    assert len(ollama_server.requests) == 2
+
+
+def test_single_flight_error_reaches_every_waiter(ollama_server):
+    ollama_server.handler = lambda path, body: (400, {'error': 'model not found'}, 0.3)
+    client = _client(ollama_server, max_concurrency=4)
+
+    results, errors = _concurrent(4, lambda: client.chat('missing-model', MESSAGES))
+
+    assert len(ollama_server.requests) == 1
+    assert all(isinstance(error, ollama.ResponseError) for error in errors)
+    assert client._in_flight == {}
+
+
+def test_different_or_uncoalesced_requests_are_not_shared(ollama_server):
+    ollama_server.handler = lambda path, body: (200, ollama_server.reply(body), 0.2)
+    client = _client(ollama_server, max_concurrency=4)
+
+    _concurrent(2, lambda: client.chat('llama3.2', MESSAGES, coalesce=False))
+    assert len(ollama_server.requests) == 2
+
+    options = [{'temperature': 0}, {'temperature': 1}]
+    _concurrent(2, lambda: client.chat('llama3.2', MESSAGES, options=options.pop()))
+    assert len(ollama_server.requests) == 4
+
+
+def _sized(client, model, chars, num_predict=None, images=0, options=None):
+    options = dict(options or {})
+    if num_predict is not None:
+        options['num_predict'] = num_predict
+    kwargs = {'messages': [{'role': 'user', 'content': 'x' * chars, 'images': ['img'] * images}],
+              'options': options}
+    num_ctx, _ = client._size_context(model, kwargs)
+    assert kwargs['options'].get('num_ctx') == num_ctx
+    return num_ctx
+
+
+def test_num_ctx_is_rounded_up_to_a_bucket():
+    client = LLMClient(num_ctx_buckets='2048,4096,8192', max_num_ctx=8192, default_num_predict=512)
+    # 3,5 caractères par token + num_predict + marge de 256 tokens
+    assert _sized(client, 'llama3.2', 0) == 2048
+    assert _sized(client, 'llama3.2', int(3.5 * (2048 - 512 - 256))) == 2048
+    assert _sized(client, 'llama3.2', int(3.5 * (2048 - 512 - 256)) + 4) == 4096
+    assert _sized(client, 'llama3.2', 3500, num_predict=2000) == 4096
+    # Une image compte pour 768 tokens
+    assert _sized(client, 'llava', 0, num_predict=1024, images=1) == 2048
+    assert _sized(client, 'llava', 0, num_predict=1024, images=2) == 4096
+
+
+def test_num_ctx_is_clamped_to_the_configured_maximum():
+    client = LLMClient(num_ctx_buckets='2048,4096,8192,16384', max_num_ctx=8192,
+                       model_max_num_ctx='DeepSeek-R1=4096')
+    assert _sized(client, 'llama3.2', 100000) == 8192
+    assert _sized(client, 'DeepSeek-R1', 100000) == 4096
+    assert _sized(client, 'DeepSeek-R1', 10) == 2048
+
+
+def test_explicit_num_ctx_is_kept():
+    client = LLMClient(adaptive_num_ctx=True)
+    assert _sized(client, 'llama3.2', 100000, options={'num_ctx': 1024}) == 1024
+    assert LLMClient(adaptive_num_ctx=False)._size_context('llama3.2', {'prompt': 'x'})[0] is None
+
+
+def test_num_ctx_is_sent_and_calibrated(ollama_server):
+    ollama_server.handler = lambda path, body: (200, dict(ollama_server.reply(body), prompt_eval_count=500), 0)
+    client = _client(ollama_server, adaptive_num_ctx=True, num_ctx_buckets='2048,4096', default_num_predict=256)
+    client.chat('llama3.2', [{'role': 'user', 'content': 'y' * 1500}])
+
+    assert ollama_server.requests[0]['body']['options']['num_ctx'] == 2048
+    # 1500 caractères pour 500 tokens mesurés : estimation rapprochée de 3 caractères / token
+    assert client.get_metrics()['llama3.2']['chars_per_token'] == round(0.8 * 3.5 + 0.2 * 3.0, 2)
+    assert client.get_metrics()['llama3.2']['last_num_ctx'] == 2048
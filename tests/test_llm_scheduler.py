@@ -0,0 +1,114 @@
+# tests/test_llm_scheduler.py
+import threading
+import time
+
+from backend.services.llm_scheduler import ModelScheduler
+
+
+class Calls:
+    """Appels simulés : acquire, courte génération, release ; ordre d'admission enregistré"""
+
+    def __init__(self, scheduler, duration=0.02):
+        self.scheduler = scheduler
+        self.duration = duration
+        self.order = []
+        self.threads = []
+
+    def start(self, model, timeout=5):
+        def run():
+            if self.scheduler.acquire(model, timeout):
+                self.order.append(model)
+                time.sleep(self.duration)
+                self.scheduler.release(model)
+            else:
+                self.order.append(f"timeout:{model}")
+
+        thread = threading.Thread(target=run)
+        thread.start()
+        self.threads.append(thread)
+        self.wait_queued(model)
+
+    def wait_queued(self, model):
+        # Entrées en file dans l'ordre des appels
+        deadline = time.monotonic() + 2
+        while time.monotonic() < deadline:
+            status = self.scheduler.status()
+            if status['waiting'].get(model) or model in self.order:
+                return
+            time.sleep(0.005)
+
+    def join(self):
+        for thread in self.threads:
+            thread.join()
+
+
+def test_calls_are_grouped_by_resident_model():
+    scheduler = ModelScheduler(max_resident=1, max_batch=8, max_wait=30, max_concurrency=1)
+    assert scheduler.acquire('llama3.2', 1)
+
+    calls = Calls(scheduler)
+    for model in ('DeepSeek-R1', 'llama3.2', 'DeepSeek-R1', 'llama3.2'):
+        calls.start(model)
+    scheduler.release('llama3.2')
+    calls.join()
+
+    # Le modèle chargé termine sa série avant le changement de modèle
+    assert calls.order == ['llama3.2', 'llama3.2', 'DeepSeek-R1', 'DeepSeek-R1']
+    assert scheduler.model_switches == 2
+    assert scheduler.status()['resident_models'] == ['DeepSeek-R1']
+
+
+def test_waiting_model_is_not_starved_by_a_long_batch():
+    scheduler = ModelScheduler(max_resident=1, max_batch=2, max_wait=30, max_concurrency=1)
+    assert scheduler.acquire('llama3.2', 1)
+
+    calls = Calls(scheduler)
+    calls.start('DeepSeek-R1')
+    for _ in range(4):
+        calls.start('llama3.2')
+    scheduler.release('llama3.2')
+    calls.join()
+
+    # Série limitée à max_batch appels (dont celui en cours) : DeepSeek-R1 passe ensuite
+    assert calls.order.index('DeepSeek-R1') == 1
+    assert calls.order.count('llama3.2') == 4
+
+
+def test_waiting_model_is_loaded_after_max_wait():
+    scheduler = ModelScheduler(max_resident=1, max_batch=1000, max_wait=0.3, max_concurrency=1)
+    assert scheduler.acquire('llama3.2', 1)
+    calls = Calls(scheduler, duration=0.05)
+    calls.start('DeepSeek-R1')
+    for _ in range(20):
+        calls.start('llama3.2')
+    scheduler.release('llama3.2')
+    calls.join()
+
+    # Appels de 50 ms : la série s'arrête après max_wait (0,3 s), bien avant la fin de la file
+    position = calls.order.index('DeepSeek-R1')
+    assert 0 < position <= 10
+
+
+def test_unload_after_when_another_model_waits():
+    scheduler = ModelScheduler(max_resident=1, max_concurrency=1)
+    assert scheduler.acquire('llama3.2', 1)
+    assert not scheduler.unload_after('llama3.2')
+
+    calls = Calls(scheduler)
+    calls.start('DeepSeek-R1')
+    assert scheduler.unload_after('llama3.2')
+    scheduler.release('llama3.2')
+    calls.join()
+    assert calls.order == ['DeepSeek-R1']
+
+
+def test_acquire_times_out_while_model_is_busy():
+    scheduler = ModelScheduler(max_resident=2, max_concurrency=1, model_concurrency={'llava': 2})
+    assert scheduler.acquire('llama3.2', 1)
+    start = time.monotonic()
+    assert not scheduler.acquire('llama3.2', 0.1)
+    assert time.monotonic() - start < 0.5
+    # Limite propre au modèle, et deux modèles résidents à la fois
+    assert scheduler.acquire('llava', 0.1) and scheduler.acquire('llava', 0.1)
+    assert scheduler.status()['running'] == {'llama3.2': 1, 'llava': 2}
+    assert scheduler.status()['waiting'] == {}
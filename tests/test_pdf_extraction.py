@@ -0,0 +1,231 @@
+# tests/test_pdf_extraction.py
+import io
+import base64
+import os
+from types import SimpleNamespace
+from concurrent.futures import ThreadPoolExecutor
+
+import fitz
+import numpy as np
+import pytest
+from PIL import Image
+
+from backend.services import summarization_service
+from backend.services.rag_system import EnhancedMUragSystem
+from backend.services.summarization_service import (
+    FIGURE_DETECTION_DPI, FIGURE_DETECTION_DPI_DENSE, FIGURE_DETECTION_DPI_LOW, FIGURE_RENDER_DPI,
+    PAGE_BREAK, detect_figure_regions, extract_from_pdf, figure_detection_dpi, pixmap_array,
+)
+
+from test_figure_descriptions import figure_png, resized
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+def build_pdf(pages):
+    """
+    PDF construit avec PyMuPDF : chaque page est une liste d'éléments
+    ``("text", texte)``, ``("image", bytes, rect)`` ou ``("lines", n)`` (tracés vectoriels).
+    """
+    doc = fitz.open()
+    for elements in pages:
+        page = doc.new_page()
+        y = 72
+        for kind, *args in elements:
+            if kind == "text":
+                page.insert_text((72, y), args[0])
+                y += 20
+            elif kind == "image":
+                page.insert_image(fitz.Rect(*args[1]), stream=args[0])
+            elif kind == "lines":
+                for index in range(args[0]):
+                    page.draw_line((100, 300 + index * 0.5), (400, 320 + index * 0.5))
+    return doc.tobytes()
+
+
+def test_extract_from_pdf_returns_in_memory_pngs(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    jpeg = figure_png(2, fmt="JPEG")
+    pdf = io.BytesIO(build_pdf([
+        [("text", "First page"), ("image", figure_png(1), (72, 100, 372, 300))],
+        # Doublon de la page 1 et icône trop petite : ignorés
+        [("text", "Second page"), ("image", figure_png(1), (72, 100, 372, 300)),
+         ("image", resized(figure_png(3), (40, 40)), (400, 100, 440, 140))],
+        [("text", "Third page"), ("image", jpeg, (72, 100, 372, 300))],
+    ]))
+
+    text, figures = extract_from_pdf(pdf, use_opencv=False)
+
+    assert text.split(PAGE_BREAK) == ["First page\n", "Second page\n", "Third page\n"]
+    assert len(figures) == 2
+    assert all(isinstance(figure, bytes) and figure.startswith(PNG_SIGNATURE) for figure in figures)
+    # Le JPEG intégré est converti en PNG
+    assert Image.open(io.BytesIO(figures[1])).size == Image.open(io.BytesIO(jpeg)).size
+    # Aucun fichier temporaire et le flux est rembobiné pour l'appelant
+    assert os.listdir(tmp_path) == []
+    assert pdf.tell() == 0
+
+
+def test_extract_from_pdf_is_safe_concurrently():
+    pdfs = [build_pdf([[("text", f"Document {seed}"), ("image", figure_png(seed), (72, 100, 372, 300))]])
+            for seed in range(6)]
+
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        results = list(pool.map(lambda data: extract_from_pdf(io.BytesIO(data), use_opencv=False), pdfs))
+
+    for seed, (text, figures) in enumerate(results):
+        assert text == f"Document {seed}\n"
+        assert len(figures) == 1
+        assert figures[0] == extract_from_pdf(io.BytesIO(pdfs[seed]), use_opencv=False)[1][0]
+
+
+def test_pixmap_array_is_a_zero_copy_view():
+    page = fitz.open().new_page()
+    page.draw_rect(fitz.Rect(100, 200, 400, 400), color=(0, 0, 0), fill=(0.2, 0.4, 0.8))
+    for colorspace, alpha, channels in ((fitz.csGRAY, False, 1), (fitz.csRGB, True, 4)):
+        pix = page.get_pixmap(colorspace=colorspace, alpha=alpha)
+        array = pixmap_array(pix)
+        assert array.shape == (pix.height, pix.width, channels)
+        assert np.shares_memory(array, np.frombuffer(pix.samples_mv, dtype=np.uint8))
+        assert array.tobytes() == pix.samples
+
+
+def test_pixmap_array_skips_row_padding():
+    # Rangées de 3 pixels RGB (9 octets) alignées sur 12 octets
+    rows = [bytes(range(row * 10, row * 10 + 9)) + b"\xff" * 3 for row in range(2)]
+    pix = SimpleNamespace(samples_mv=memoryview(b"".join(rows)), width=3, height=2, n=3, stride=12)
+    array = pixmap_array(pix)
+    assert array.shape == (2, 3, 3)
+    assert array[1, 2].tolist() == [16, 17, 18]
+    assert 255 not in array
+
+
+def test_detect_figure_regions_on_the_pixmap_view():
+    page = fitz.open().new_page()
+    page.insert_text((72, 72), "Figure 1: a filled box")
+    page.draw_rect(fitz.Rect(100, 200, 400, 400), color=(0, 0, 0), fill=(0.2, 0.4, 0.8))
+
+    (region,) = detect_figure_regions(page)
+
+    assert abs(region.x0 - 100) < 3 and abs(region.y0 - 200) < 3
+    assert abs(region.x1 - 400) < 3 and abs(region.y1 - 400) < 3
+
+
+def test_figure_detection_dpi_triage():
+    pages = {
+        "text": [("text", "Only body text on this page.")],
+        "rules": [("text", "A page with a few rules."), ("lines", 3)],
+        "uncaptioned image": [("text", "Photo without caption."), ("image", figure_png(1), (72, 100, 372, 300))],
+        "captioned image": [("text", "Figure 2: Overview."), ("image", figure_png(1), (72, 100, 372, 300))],
+        "vector figure": [("text", "Results."), ("lines", 40)],
+        "dense plot": [("text", "Scatter."), ("lines", 600)],
+    }
+    doc = fitz.open(stream=build_pdf(pages.values()), filetype="pdf")
+
+    dpis = {name: figure_detection_dpi(page, page.get_text()) for name, page in zip(pages, doc)}
+
+    assert dpis == {
+        "text": None,
+        "rules": None,
+        "uncaptioned image": None,
+        "captioned image": FIGURE_DETECTION_DPI_LOW,
+        "vector figure": FIGURE_DETECTION_DPI,
+        "dense plot": FIGURE_DETECTION_DPI_DENSE,
+    }
+
+
+def test_extract_from_pdf_renders_only_triaged_pages(monkeypatch):
+    rendered = []
+
+    def fake_detect(page, dpi=FIGURE_DETECTION_DPI):
+        rendered.append((page.number, dpi))
+        return [fitz.Rect(100, 300, 400, 620)]
+
+    monkeypatch.setattr(summarization_service, "detect_figure_regions", fake_detect)
+    pdf = io.BytesIO(build_pdf([
+        [("text", "Introduction text only.")],
+        [("text", "Results."), ("lines", 40)],
+        [("text", "More text only.")],
+        [("text", "Scatter."), ("lines", 600)],
+    ]))
+
+    text, figures = extract_from_pdf(pdf)
+
+    assert rendered == [(1, FIGURE_DETECTION_DPI), (3, FIGURE_DETECTION_DPI_DENSE)]
+    assert len(figures) == 2
+    # Les zones retenues sont rendues à FIGURE_RENDER_DPI
+    width, height = Image.open(io.BytesIO(figures[0])).size
+    assert abs(width - 300 * FIGURE_RENDER_DPI / 72) <= 2 and abs(height - 320 * FIGURE_RENDER_DPI / 72) <= 2
+
+
+def draw_table(page, rows, top, left=72, caption=None):
+    """Tableau à filets ; la légende éventuelle est placée juste au-dessus"""
+    if caption:
+        page.insert_text((left, top - 10), caption)
+    width = 150 * len(rows[0])
+    for index in range(len(rows) + 1):
+        page.draw_line((left, top + index * 30), (left + width, top + index * 30))
+    for index in range(len(rows[0]) + 1):
+        page.draw_line((left + index * 150, top), (left + index * 150, top + len(rows) * 30))
+    for row_index, row in enumerate(rows):
+        for column, cell in enumerate(row):
+            page.insert_text((left + column * 150 + 5, top + row_index * 30 + 20), cell)
+
+
+@pytest.fixture
+def elements_pdf(tmp_path):
+    doc = fitz.open()
+    page = doc.new_page()
+    draw_table(page, [["Model", "Accuracy"], ["BERT", "91.2"], ["GPT", "93.5"]], top=100,
+               caption="Table 1: Accuracy by model")
+    page.draw_rect(fitz.Rect(100, 250, 400, 380), color=(0, 0, 0))
+    page.insert_text((110, 300), "loss")
+    page.insert_text((72, 400), "Figure 1: Training loss decreases with epochs")
+    draw_table(page, [["Split", "Size"], ["train", "8000"]], top=500)
+    path = tmp_path / "elements.pdf"
+    doc.save(str(path))
+    return str(path)
+
+
+@pytest.fixture
+def rag(monkeypatch):
+    # Système RAG sans __init__ : seule l'extraction PDF est testée
+    rag = object.__new__(EnhancedMUragSystem)
+    rag.ocr_calls = []
+
+    def fake_ocr(png_bytes):
+        rag.ocr_calls.append(png_bytes)
+        return "OCR TEXT"
+
+    monkeypatch.setattr(rag, "_ocr_image", fake_ocr)
+    return rag
+
+
+def test_figures_and_tables_come_from_the_text_layer(rag, elements_pdf):
+    elements = rag._extract_figures_tables_from_pdf(elements_pdf)
+
+    assert [(element["type"], element["caption"].strip()) for element in elements] == [
+        ("table", "Table 1: Accuracy by model"),
+        ("figure", "Figure 1: Training loss decreases with epochs"),
+        ("table", ""),
+    ]
+    assert elements[0]["text_content"] == "Model | Accuracy\nBERT | 91.2\nGPT | 93.5"
+    assert "Training loss" in elements[1]["text_content"]
+    assert elements[2]["text_content"] == "Split | Size\ntrain | 8000"
+    for element in elements:
+        assert base64.b64decode(element["image_data"]).startswith(PNG_SIGNATURE)
+    # Couche texte présente : Tesseract n'est jamais lancé
+    assert rag.ocr_calls == []
+
+
+def test_ocr_runs_only_when_the_text_layer_is_empty(rag, elements_pdf, monkeypatch):
+    # Cellules sans couche texte (tableau scanné sous une légende numérique)
+    monkeypatch.setattr(EnhancedMUragSystem, "_table_text", staticmethod(lambda table: ""))
+
+    elements = rag._extract_figures_tables_from_pdf(elements_pdf)
+
+    tables = [element for element in elements if element["type"] == "table"]
+    assert [element["text_content"] for element in tables] == ["OCR TEXT", ""]
+    assert len(rag.ocr_calls) == 1
+    assert base64.b64decode(tables[0]["image_data"]) == rag.ocr_calls[0]
+    assert "Training loss" in elements[1]["text_content"]
@@ -0,0 +1,126 @@
+# tests/test_rag_batch.py
+import pytest
+from flask import Flask
+
+from backend.services.rag_system import EnhancedMUragSystem
+from backend.services.vector_store import NumpyFlatVectorStore
+
+from conftest import HashEmbeddings
+
+CONTEXT_MARKER = "=== DOCUMENT CONTEXT ==="
+
+CHUNKS = [
+    ("Transformers use self attention over token sequences.", 1),
+    ("Attention weights are computed with scaled dot products.", 1),
+    ("The dataset contains ten thousand annotated abstracts.", 1),
+    ("Retrieval augmented generation grounds answers in documents.", 2),
+    ("Dense retrieval encodes queries and passages as vectors.", 2),
+    ("The benchmark reports latency and memory usage.", 2),
+    ("Quantized vectors reduce memory with a small recall loss.", 2),
+]
+
+QUESTIONS = [
+    "How is attention computed?",
+    "What does the dataset contain?",
+    "How does dense retrieval work?",
+]
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config.update(DEFAULT_SUMMARIZATION_MODEL='fake-model', RAG_BATCH_MAX_CONCURRENCY=2)
+    with app.app_context():
+        yield app
+
+
+@pytest.fixture
+def rag(app, tmp_path, fake_llm):
+    # Système RAG sans __init__ : pas d'Ollama ni de base de données
+    rag = object.__new__(EnhancedMUragSystem)
+    rag.user_id = 7
+    rag.vector_backend = 'numpy'
+    rag.embeddings = HashEmbeddings()
+    rag.vectorstore = NumpyFlatVectorStore(str(tmp_path / 'vectors'), rag.embeddings)
+    rag.vectorstore.add_texts(
+        [text for text, _ in CHUNKS],
+        metadatas=[{'user_id': 7, 'article_id': article_id, 'source': f'a{article_id}.pdf', 'page': index}
+                   for index, (_, article_id) in enumerate(CHUNKS)]
+    )
+    rag.retriever = rag.vectorstore.as_retriever(search_type="mmr", search_kwargs={"k": 5, "lambda_mult": 0.6})
+    rag.conversation_memory = []
+    rag._save_conversation_memory = lambda: None
+    fake_llm.reply = lambda model, messages: "ANSWER: " + messages[-1]['content'].rsplit("CURRENT QUESTION: ", 1)[1].split("\n")[0]
+    return rag
+
+
+def _document_contexts(fake_llm):
+    return [prompt.split(CONTEXT_MARKER, 1)[1] for prompt in fake_llm.prompts()]
+
+
+@pytest.mark.parametrize('backend', ['numpy', 'chroma'])
+@pytest.mark.parametrize('article_id,user_id', [(None, None), (None, 7), (2, 7)])
+def test_ask_batch_matches_ask(rag, fake_llm, article_id, user_id, backend):
+    # 'chroma' : chemins de repli (une recherche par question) sur le même store
+    rag.vector_backend = backend
+    rag.user_id = user_id
+    single = []
+    for question in QUESTIONS:
+        rag.conversation_memory = []
+        single.append(rag.ask(question, article_id=article_id))
+    single_contexts = _document_contexts(fake_llm)
+
+    fake_llm.calls.clear()
+    rag.conversation_memory = []
+    results = rag.ask_batch(QUESTIONS, article_id=article_id)
+    batch_contexts = _document_contexts(fake_llm)
+
+    assert [result['question'] for result in results] == QUESTIONS
+    assert [result['answer'] for result in results] == single
+    # Les appels concurrents n'arrivent pas forcément dans l'ordre
+    assert sorted(batch_contexts) == sorted(single_contexts)
+    assert all(result['sources'] > 0 for result in results)
+    if article_id:
+        assert all("a1.pdf" not in context for context in batch_contexts)
+
+
+@pytest.mark.parametrize('article_id', [None, 2])
+def test_ask_batch_embeds_and_searches_once(rag, fake_llm, monkeypatch, article_id):
+    store = rag.vectorstore
+    products = []
+    scores = store._scores
+    monkeypatch.setattr(store, '_scores', lambda queries: products.append(len(queries)) or scores(queries))
+    rag.embeddings.calls.clear()
+
+    rag.ask_batch(QUESTIONS, article_id=article_id)
+
+    assert rag.embeddings.calls == [('documents', len(QUESTIONS))]
+    assert products == [len(QUESTIONS)]
+
+
+def test_ask_batch_records_memory_once(rag, fake_llm):
+    saves = []
+    rag._save_conversation_memory = lambda: saves.append(len(rag.conversation_memory))
+    rag.ask_batch(QUESTIONS)
+    assert [entry['question'] for entry in rag.conversation_memory] == QUESTIONS
+    assert saves == [len(QUESTIONS)]
+
+
+def test_ask_batch_runs_verification(rag, fake_llm, monkeypatch):
+    verified = []
+    monkeypatch.setattr(rag, '_verify_context_relevance',
+                        lambda question, context: verified.append(question) or {'score': 0.9})
+    monkeypatch.setattr(rag, '_verify_answer_faithfulness', lambda context, answer: {'score': 0.9})
+    monkeypatch.setattr(rag, '_verify_answer_relevance', lambda question, answer: {'score': 0.9})
+
+    results = rag.ask_batch(QUESTIONS, return_metadata=True)
+
+    assert sorted(verified) == sorted(QUESTIONS)
+    assert all(result['verification_status'] == 'validated' for result in results)
+    assert all(result['verification_score'] == pytest.approx(0.9) for result in results)
+    assert all(set(result['verification_details']) ==
+               {'context_relevance', 'answer_faithfulness', 'answer_relevance'} for result in results)
+
+
+def test_ask_batch_empty(rag):
+    assert rag.ask_batch([]) == []
@@ -0,0 +1,84 @@
+# tests/test_result_cache.py
+import json
+import time
+
+from backend.services.result_cache import ResultCache, cached_llm_result
+
+
+def test_key_is_stable_and_covers_every_field():
+    key = ResultCache.make_key('summarize_text', 'llama3.2', 1, ['texte', 3], {'temperature': 0.2, 'top_p': 0.9})
+    assert key == ResultCache.make_key('summarize_text', 'llama3.2', 1, ['texte', 3], {'top_p': 0.9, 'temperature': 0.2})
+    assert len(key) == 64
+    assert key != ResultCache.make_key('summarize_text', 'llama3.2', 2, ['texte', 3], {'temperature': 0.2, 'top_p': 0.9})
+    assert key != ResultCache.make_key('summarize_text', 'DeepSeek-R1', 1, ['texte', 3], {'temperature': 0.2, 'top_p': 0.9})
+    assert key != ResultCache.make_key('summarize_text', 'llama3.2', 1, ['texte', 4], {'temperature': 0.2, 'top_p': 0.9})
+    assert key != ResultCache.make_key('translate_text', 'llama3.2', 1, ['texte', 3], {'temperature': 0.2, 'top_p': 0.9})
+    assert key != ResultCache.make_key('summarize_text', 'llama3.2', 1, ['texte', 3], {'temperature': 0.3, 'top_p': 0.9})
+
+
+def test_values_persist_across_instances(tmp_path):
+    path = str(tmp_path / 'cache.sqlite')
+    ResultCache(path).set('k', {'slides': [{'title': 'Résultats'}]})
+    found, value = ResultCache(path).get('k')
+    assert found and value == {'slides': [{'title': 'Résultats'}]}
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    entry = "x" * 100
+    size = len(json.dumps(entry))
+    # Après éviction, la taille redescend à 90 % de la limite : une entrée sur quatre part
+    cache = ResultCache(str(tmp_path / 'cache.sqlite'), max_bytes=int(3.5 * size))
+    for key in ('a', 'b', 'c'):
+        cache.set(key, entry)
+        time.sleep(0.01)
+    assert cache.get('a')[0]  # "a" relu : "b" devient le moins récemment utilisé
+    cache.set('d', entry)
+
+    assert [cache.get(key)[0] for key in ('a', 'b', 'c', 'd')] == [True, False, True, True]
+    assert cache.stats()['size_bytes'] == 3 * size
+
+
+def test_empty_or_failed_results_are_not_stored(tmp_path):
+    cache = ResultCache(str(tmp_path / 'cache.sqlite'))
+    for index, failed in enumerate([None, "", [], {}]):
+        assert cache.get_or_compute(f'k{index}', lambda: failed) == failed
+        assert cache.get(f'k{index}') == (False, None)
+
+    calls = []
+    assert cache.get_or_compute('ok', lambda: calls.append(1) or ['point']) == ['point']
+    assert cache.get_or_compute('ok', lambda: calls.append(1) or ['other']) == ['point']
+    assert cache.get_or_compute('ok', lambda: calls.append(1) or ['fresh'], bypass=True) == ['fresh']
+    assert cache.get('ok') == (True, ['fresh'])
+    assert len(calls) == 2
+
+
+def test_cached_llm_result(result_cache, monkeypatch):
+    calls = []
+    compute = lambda: calls.append(1) or "résumé"
+    assert cached_llm_result('summarize_text', 'llama3.2', 1, 'texte', {}, compute) == "résumé"
+    assert cached_llm_result('summarize_text', 'llama3.2', 1, 'texte', {}, compute) == "résumé"
+    assert len(calls) == 1
+    assert cached_llm_result('summarize_text', 'llama3.2', 1, 'texte', {}, compute, use_cache=False) == "résumé"
+    assert len(calls) == 2
+
+    from config import Config
+    monkeypatch.setattr(Config, 'LLM_RESULT_CACHE_ENABLED', False)
+    cached_llm_result('summarize_text', 'llama3.2', 1, 'texte', {}, compute)
+    assert len(calls) == 3
+
+
+def test_failed_key_point_extraction_is_retried(fake_llm, result_cache):
+    from backend.services.pptx_service import extract_key_points
+
+    fake_llm.reply = '{"slides": []}'
+    assert extract_key_points("Résumé de l'article") == []
+    fake_llm.reply = "Je ne peux pas répondre."
+    assert extract_key_points("Résumé de l'article") == []
+
+    fake_llm.reply = '<think>...</think>{"slides": [{"title": "Méthode", "type": "content", "bullets": ["A"]}]}'
+    slides = extract_key_points("Résumé de l'article")
+    assert [slide['title'] for slide in slides] == ["Méthode"]
+    # Résultat valide : servi depuis le cache
+    fake_llm.reply = '{"slides": []}'
+    assert extract_key_points("Résumé de l'article") == slides
+    assert len(fake_llm.calls) == 3
@@ -0,0 +1,175 @@
+# tests/test_summarization.py
+import random
+import re
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from backend.services import summarization_service
+from backend.services.llm_scheduler import ModelScheduler
+from backend.services.summarization_service import (
+    split_text_for_summary, split_text_for_translation, summarize_text, translate_text,
+)
+
+HEADINGS = ["1 Introduction", "2 Methods", "3 Results", "4 Discussion", "5 Conclusion"]
+
+
+def _article():
+    sections = []
+    for number, heading in enumerate(HEADINGS, 1):
+        body = " ".join(f"Section {number} sentence {index} reports value {number * 10 + index}."
+                        for index in range(12))
+        sections.append(f"{heading}\n{body}")
+    return "\n\n".join(sections)
+
+
+def _reply(model, messages):
+    """Faux LLM : chaque étape du map-reduce répond de façon reconnaissable"""
+    prompt = messages[-1]['content']
+    part = re.search(r'Part (\d+)/(\d+):', prompt)
+    if part:
+        return f"PARTIAL {part.group(1)} " + "detail " * 40
+    if "Merge them into one detailed summary" in prompt:
+        return "MERGED(" + ",".join(re.findall(r'PARTIAL (\d+)', prompt)) + ")"
+    return "FINAL SUMMARY"
+
+
+@pytest.fixture
+def small_chunks(monkeypatch):
+    from config import Config
+    monkeypatch.setattr(Config, 'LLM_SUMMARY_CHUNK_CHARS', 700)
+
+
+def test_split_text_for_summary_prefers_headings():
+    text = _article()
+    chunks = split_text_for_summary(text, 700)
+    assert "".join(chunks) == text
+    assert all(len(chunk) <= 700 for chunk in chunks)
+    assert [chunk.lstrip().split("\n", 1)[0] for chunk in chunks] == HEADINGS
+
+
+def test_split_text_for_summary_cuts_long_sections_at_lines():
+    text = "1 Introduction\n" + "".join(f"line {index} of a very long section\n" for index in range(100))
+    chunks = split_text_for_summary(text, 300)
+    assert "".join(chunks) == text
+    assert all(len(chunk) <= 300 and chunk.endswith("\n") for chunk in chunks)
+
+
+def test_short_text_is_summarized_in_one_call(fake_llm):
+    fake_llm.reply = _reply
+    timings = {}
+    assert summarize_text("1 Introduction\nA short article.", timings=timings) == "FINAL SUMMARY"
+    assert len(fake_llm.calls) == 1
+    assert 'summarize' in timings and 'compression' in timings
+
+
+def test_long_text_is_summarized_by_map_reduce(fake_llm, small_chunks):
+    fake_llm.reply = _reply
+    timings = {}
+    summary = summarize_text(_article(), timings=timings, compression_ratio=1.0)
+    prompts = fake_llm.prompts()
+
+    assert summary == "FINAL SUMMARY"
+    assert timings['chunks'] == len(HEADINGS)
+    # Map : un résumé par section, chaque bloc commence à son titre
+    map_prompts = [prompt for prompt in prompts if re.search(r'Part \d+/\d+:', prompt)]
+    assert len(map_prompts) == len(HEADINGS)
+    for heading in HEADINGS:
+        assert sum(f"\n{heading}\n" in prompt or f":\n    {heading}\n" in prompt for prompt in map_prompts) == 1
+    # Reduce hiérarchique : fusions dans l'ordre des parties, puis résumé final des fusions
+    merge_prompts = [prompt for prompt in prompts if "Merge them into one detailed summary" in prompt]
+    assert merge_prompts and timings['reduce_levels'] == 2
+    merged = [re.findall(r'PARTIAL (\d+)', prompt) for prompt in merge_prompts]
+    assert sorted(int(number) for numbers in merged for number in numbers) == [1, 2, 3, 4, 5]
+    final_prompt = prompts[-1]
+    assert "Summaries of the consecutive parts of the article" in final_prompt
+    assert re.findall(r'MERGED\(([\d,]+)\)', final_prompt) == [",".join(numbers) for numbers in merged]
+    assert len(fake_llm.calls) == len(HEADINGS) + len(merge_prompts) + 1
+
+
+def test_map_reduce_results_are_cached(fake_llm, small_chunks, result_cache):
+    fake_llm.reply = _reply
+    summarize_text(_article(), compression_ratio=1.0)
+    calls = len(fake_llm.calls)
+    assert summarize_text(_article(), compression_ratio=1.0) == "FINAL SUMMARY"
+    assert len(fake_llm.calls) == calls
+
+
+def test_llm_failure_is_reported(fake_llm, monkeypatch):
+    def fail(*args, **kwargs):
+        raise RuntimeError("Ollama indisponible")
+    monkeypatch.setattr(summarization_service.llm_client, 'chat', fail)
+    assert summarize_text("1 Introduction\nA short article.").startswith("Erreur lors de la génération du résumé")
+
+
+PARAGRAPHS = [f"Paragraph {index}. " + " ".join(f"Sentence {index}.{n} of the summary." for n in range(6))
+              for index in range(8)]
+
+
+def _translation_reply(model, messages):
+    """Faux traducteur : réponses désordonnées dans le temps, reconnaissables par bloc"""
+    time.sleep(random.uniform(0.01, 0.03))
+    chunk = messages[-1]['content'].split("Text to translate:\n", 1)[1]
+    return "<think>brouillon</think>" + "\n\n".join(f"FR({paragraph.split('.')[0]})"
+                                                      for paragraph in chunk.split("\n\n"))
+
+
+@pytest.fixture
+def translation_pool(monkeypatch):
+    from config import Config
+    monkeypatch.setattr(Config, 'LLM_TRANSLATE_CHUNK_CHARS', 450)
+    scheduler = ModelScheduler(max_concurrency=3)
+    monkeypatch.setattr(summarization_service.llm_client, 'get_llm_client',
+                        lambda: SimpleNamespace(scheduler=scheduler))
+
+
+def test_split_text_for_translation_groups_paragraphs():
+    chunks = split_text_for_translation("\n\n".join(PARAGRAPHS), 450)
+    assert len(chunks) > 2 and all(len(chunk) <= 450 for chunk in chunks)
+    assert "\n\n".join(chunks).split("\n\n") == PARAGRAPHS
+    # Un paragraphe plus long que la limite est coupé entre deux phrases
+    long_chunks = split_text_for_translation(PARAGRAPHS[0], 60)
+    assert " ".join(long_chunks) == PARAGRAPHS[0]
+    assert all(chunk.endswith(".") for chunk in long_chunks)
+
+
+def test_translate_text_reassembles_chunks_in_order(fake_llm, translation_pool):
+    active, peak, lock = [0], [0], threading.Lock()
+
+    def counted_reply(model, messages):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        try:
+            return _translation_reply(model, messages)
+        finally:
+            with lock:
+                active[0] -= 1
+
+    fake_llm.reply = counted_reply
+    translation = translate_text("\n\n".join(PARAGRAPHS), "fr")
+
+    assert translation == "\n\n".join(f"FR(Paragraph {index})" for index in range(len(PARAGRAPHS)))
+    assert len(fake_llm.calls) == len(split_text_for_translation("\n\n".join(PARAGRAPHS), 450))
+    assert all("into French" in prompt for prompt in fake_llm.prompts())
+    assert 1 < peak[0] <= 3
+
+
+def test_translation_chunks_are_cached(fake_llm, translation_pool, result_cache):
+    fake_llm.reply = _translation_reply
+    text = "\n\n".join(PARAGRAPHS)
+    translate_text(text, "fr")
+    chunk_count = len(fake_llm.calls)
+
+    assert translate_text(text, "fr") == "\n\n".join(f"FR(Paragraph {index})" for index in range(len(PARAGRAPHS)))
+    assert len(fake_llm.calls) == chunk_count
+
+    # Seul le bloc modifié est retraduit
+    edited = PARAGRAPHS[:-1] + [PARAGRAPHS[-1].replace("summary", "article")]
+    translate_text("\n\n".join(edited), "fr")
+    assert len(fake_llm.calls) == chunk_count + 1
+    # Autre langue : autre clé de cache
+    translate_text(text, "de")
+    assert len(fake_llm.calls) == 2 * chunk_count + 1
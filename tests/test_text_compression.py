@@ -0,0 +1,136 @@
+# tests/test_text_compression.py
+import random
+
+from backend.services.text_compression import (
+    PAGE_BREAK, SECTION_HEADING_PATTERN, compress_text, estimate_tokens, split_sentences, strip_boilerplate, strip_references,
+    textrank_scores,
+)
+
+TOPICS = ["transformer", "retrieval", "attention", "benchmark", "dataset", "embedding", "latency", "memory"]
+
+
+def _sentence(rng, number):
+    words = rng.sample(TOPICS, 3)
+    return f"The {words[0]} model {number} improves {words[1]} accuracy with {words[2]} features."
+
+
+def _article(sentences_per_section=40, seed=0):
+    rng = random.Random(seed)
+    numbers = iter(range(10 ** 6))
+    sections = []
+    for heading in ("Abstract", "1 Introduction", "2 Methods", "3 Results", "Conclusion"):
+        paragraphs = [" ".join(_sentence(rng, next(numbers)) for _ in range(5))
+                      for _ in range(sentences_per_section // 5)]
+        sections.append(heading + "\n" + "\n\n".join(paragraphs))
+    body = "\n\n".join(sections)
+    return body + "\n\nReferences\n[1] A. Author. Some paper. 2020.\n[2] B. Author. Another paper. 2021."
+
+
+def test_strip_boilerplate_removes_repeated_headers_and_page_numbers():
+    pages = [
+        f"Journal of Examples\nBody text of page {n} with results.\n42\nMore text on page {n}.\n{n}"
+        for n in range(1, 5)
+    ]
+    text = "arXiv:2101.00001 [cs.CL]\n" + PAGE_BREAK.join(pages)
+    cleaned = strip_boilerplate(text).splitlines()
+
+    assert "Journal of Examples" not in cleaned
+    assert not any(line.startswith("arXiv") for line in cleaned)
+    # Numéros de page en fin de page retirés, valeur de tableau "42" conservée
+    assert cleaned.count("42") == 4
+    assert "1" not in cleaned and "4" not in cleaned
+    assert "Body text of page 3 with results." in cleaned
+    assert "More text on page 4." in cleaned
+
+
+def test_strip_boilerplate_keeps_numbers_without_page_breaks():
+    text = "Table 1\nModel\n12\n12\n12\nBaseline\n7"
+    assert strip_boilerplate(text) == text
+
+
+def test_strip_references_keeps_appendix():
+    head = "Introduction\n" + "Body sentence. " * 50
+    text = head + "\nReferences\n[1] Someone. 2020.\nAppendix A Proofs\nProof of lemma."
+    stripped = strip_references(text)
+    assert "[1] Someone" not in stripped
+    assert stripped.startswith(head)
+    assert "Appendix A Proofs\nProof of lemma." in stripped
+
+
+def test_split_sentences_rejoins_lines_and_numbers_paragraphs():
+    text = "First sent-\nence here. Second one\ncontinues.\n\nThird paragraph."
+    assert split_sentences(text) == [
+        (0, "First sentence here."),
+        (0, "Second one continues."),
+        (1, "Third paragraph."),
+    ]
+
+
+def test_textrank_prefers_central_sentences(monkeypatch):
+    from backend.services import text_compression
+    # Pas de bonus d'ouverture pour comparer les seuls scores de centralité
+    monkeypatch.setattr(text_compression, 'LEAD_BONUS', 1.0)
+    sentences = [
+        "Cats purr loudly.",
+        "Retrieval augmented generation uses dense retrieval.",
+        "Dense retrieval improves generation quality.",
+        "Retrieval quality drives generation results.",
+        "Bananas are yellow.",
+    ]
+    scores = textrank_scores(sentences)
+    assert scores[1] > scores[0] and scores[2] > scores[4]
+
+
+def test_compress_text_respects_budget_and_keeps_headings():
+    text = _article()
+    compressed, stats = compress_text(text, compression_ratio=0.3, min_tokens=100)
+
+    assert stats['compressed_tokens'] <= stats['budget_tokens']
+    assert stats['kept_sentences'] < stats['sentences']
+    assert "[1] A. Author" not in compressed
+    lines = compressed.splitlines()
+    for heading in ("Abstract", "1 Introduction", "2 Methods", "3 Results", "Conclusion"):
+        assert heading in lines
+    # Une phrase par ligne, dans l'ordre d'origine
+    kept = [line for line in lines if line.endswith(".")]
+    positions = [text.index(line) for line in kept]
+    assert positions == sorted(positions)
+
+
+def test_compress_text_ratio_one_only_cleans():
+    text = _article()
+    compressed, stats = compress_text(text, compression_ratio=1.0, min_tokens=0)
+    assert compressed == strip_references(strip_boilerplate(text))
+    assert stats['compressed_tokens'] == stats['cleaned_tokens'] == estimate_tokens(compressed)
+    assert 'kept_sentences' not in stats
+
+
+def test_compress_text_short_text_is_kept():
+    text = "Introduction\nA short article. It has two sentences."
+    compressed, stats = compress_text(text, compression_ratio=0.1, min_tokens=3000)
+    assert compressed == text
+
+
+def test_split_text_for_summary_cuts_at_headings():
+    from backend.services.summarization_service import split_text_for_summary
+    compressed, _ = compress_text(_article(), compression_ratio=0.5, min_tokens=100)
+    chunks = split_text_for_summary(compressed, max_chars=len(compressed) // 3)
+    assert len(chunks) > 1
+    assert "".join(chunks) == compressed
+    assert all(chunk.lstrip().split("\n", 1)[0] in
+               ("Abstract", "1 Introduction", "2 Methods", "3 Results", "Conclusion")
+               for chunk in chunks)
+
+
+def test_numeric_body_lines_are_not_headings():
+    text = "\n".join([
+        "2.1 Related Work",
+        "12 patients received the treatment and improved",
+        "3 of them were excluded from analysis.",
+        "3 Results",
+        "40 Participants completed the survey in two weeks.",
+        "4.2. Ablation Study",
+        "Discussion",
+    ])
+    headings = [match.group().strip() for match in SECTION_HEADING_PATTERN.finditer(text)]
+    assert headings == ["2.1 Related Work", "3 Results", "4.2. Ablation Study", "Discussion"]
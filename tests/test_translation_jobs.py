@@ -0,0 +1,149 @@
+# tests/test_translation_jobs.py
+import time
+from types import SimpleNamespace
+
+import pytest
+from flask import Flask
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from backend.models.article import Article, ArticleTranslation
+from backend.models.database import db
+from backend.models.user import User
+from backend.services import artifact_store, translation_jobs
+from backend.services.artifact_store import ArtifactStore
+from backend.services.llm_scheduler import ModelScheduler
+from backend.services.translation_jobs import (
+    get_translation_fanout, save_translation, start_translation_fanout,
+)
+
+DOCUMENT_ID = "cd" + "0" * 62
+
+
+@pytest.fixture
+def app(tmp_path):
+    # Base SQLite dans un fichier : une seconde connexion peut écrire en parallèle
+    app = Flask(__name__)
+    app.config.update(SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'test.db'}",
+                      SQLALCHEMY_TRACK_MODIFICATIONS=False)
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        user = User(username='reader', email='reader@example.com', password_hash='x')
+        db.session.add(user)
+        db.session.commit()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def make_article(title):
+    user = User.query.first()
+    article = Article(title=title, original_filename='paper.pdf', file_path='/tmp/paper.pdf', user_id=user.id)
+    db.session.add(article)
+    db.session.commit()
+    return article
+
+
+@pytest.fixture
+def fanout_jobs(monkeypatch):
+    jobs = {}
+    monkeypatch.setattr(translation_jobs, '_fanout_jobs', jobs)
+    return jobs
+
+
+def test_save_translation_updates_in_place(app):
+    first = save_translation(DOCUMENT_ID, 'en', 'Summary v1', 'fr', 'model-a')
+    second = save_translation(DOCUMENT_ID, 'en', 'Summary v2', 'fr', 'model-b')
+
+    assert first.id == second.id
+    translation = ArticleTranslation.query.filter_by(document_id=DOCUMENT_ID).one()
+    assert (translation.language, translation.summary, translation.model) == ('en', 'Summary v2', 'model-b')
+
+
+def test_save_translation_retries_after_concurrent_insert(app):
+    attempts = []
+
+    def insert_concurrently(session, flush_context, instances):
+        # Une autre requête enregistre la même langue juste avant notre INSERT
+        if not attempts:
+            with db.engine.begin() as connection:
+                connection.execute(ArticleTranslation.__table__.insert().values(
+                    document_id=DOCUMENT_ID, language='de', summary='Concurrent',
+                    created_at=db.func.now(), updated_at=db.func.now()))
+        attempts.append(len(session.new))
+
+    event.listen(Session, 'before_flush', insert_concurrently)
+    try:
+        translation = save_translation(DOCUMENT_ID, 'de', 'Zusammenfassung', 'fr', 'model-a')
+    finally:
+        event.remove(Session, 'before_flush', insert_concurrently)
+
+    # 1re tentative : INSERT refusé par la contrainte unique ; 2e : mise à jour
+    assert attempts == [1, 0]
+    assert translation is not None and translation.summary == 'Zusammenfassung'
+    rows = ArticleTranslation.query.filter_by(document_id=DOCUMENT_ID, language='de').all()
+    assert [row.summary for row in rows] == ['Zusammenfassung']
+
+
+def test_translation_is_shared_between_articles(app):
+    first, second = make_article('Upload 1'), make_article('Upload 2')
+    save_translation(DOCUMENT_ID, 'es', 'Resumen', 'fr', article_id=first.id)
+    translation = save_translation(DOCUMENT_ID, 'es', 'Resumen 2', 'fr', article_id=second.id)
+
+    # Lier le second article ne retire pas le lien du premier
+    assert sorted(article.id for article in translation.articles) == [first.id, second.id]
+    assert first.translations.one().summary == 'Resumen 2'
+    assert second.get_summary_languages() == ['es']
+
+    # Supprimer un article ne retire que son lien
+    db.session.delete(first)
+    db.session.commit()
+    translation = ArticleTranslation.query.filter_by(document_id=DOCUMENT_ID).one()
+    assert [article.id for article in translation.articles] == [second.id]
+
+
+def test_finished_fanout_jobs_expire(fanout_jobs, monkeypatch):
+    from config import Config
+    monkeypatch.setattr(Config, 'SUMMARIZE_JOB_TTL', 60)
+    now = time.time()
+    job = {'status': 'completed', 'languages': ['en'], 'completed': ['en'], 'errors': {}}
+    fanout_jobs.update({
+        'expired': dict(job, finished_at=now - 120),
+        'recent': dict(job, finished_at=now - 10),
+        'running': dict(job, status='running', completed=[], finished_at=None),
+    })
+
+    assert get_translation_fanout('expired') is None
+    assert get_translation_fanout('recent')['status'] == 'completed'
+    assert get_translation_fanout('running')['status'] == 'running'
+    assert sorted(fanout_jobs) == ['recent', 'running']
+
+
+def test_translation_fanout_stores_every_language(app, fanout_jobs, fake_llm, tmp_path, monkeypatch):
+    from backend.services import llm_client, summarization_service
+    store = ArtifactStore(str(tmp_path / 'artifacts'))
+    store.put_json(DOCUMENT_ID, 'summary', {'summary': 'Résumé', 'translations': {}})
+    monkeypatch.setattr(artifact_store, '_artifact_store', store)
+    scheduler = ModelScheduler(max_concurrency=2)
+    monkeypatch.setattr(llm_client, 'get_llm_client', lambda: SimpleNamespace(scheduler=scheduler))
+
+    def fake_translate(text, language, use_cache=True):
+        if language == 'it':
+            return "❌ Une erreur est survenue lors de la traduction : timeout"
+        return f"{text} [{language}]"
+
+    monkeypatch.setattr(summarization_service, 'translate_text', fake_translate)
+    article = make_article('Upload')
+
+    start_translation_fanout(app, DOCUMENT_ID, 'Résumé', 'fr', ['en', 'de', 'it'], article_id=article.id)
+    deadline = time.time() + 5
+    while get_translation_fanout(DOCUMENT_ID)['status'] in ('queued', 'running') and time.time() < deadline:
+        time.sleep(0.01)
+
+    job = get_translation_fanout(DOCUMENT_ID)
+    assert job['status'] == 'error'
+    assert job['completed'] == ['en', 'de'] and list(job['errors']) == ['it']
+    assert store.get_json(DOCUMENT_ID, 'summary')['translations'] == {'en': 'Résumé [en]', 'de': 'Résumé [de]'}
+    db.session.expire_all()
+    assert sorted(translation.language for translation in article.translations) == ['de', 'en']
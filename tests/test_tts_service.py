@@ -0,0 +1,78 @@
+# tests/test_tts_service.py
+import asyncio
+import struct
+import time
+
+import pytest
+
+from backend.services.tts_service import (
+    LocalTTSBackend, get_tts_backend, register_tts_backend, stream_speech, TTS_BACKENDS
+)
+
+
+def _wav_data_size(audio):
+    assert audio[:4] == b"RIFF" and audio[8:12] == b"WAVE"
+    riff_size, = struct.unpack("<I", audio[4:8])
+    data_size, = struct.unpack("<I", audio[40:44])
+    assert riff_size == 36 + data_size
+    return data_size
+
+
+def test_local_backend_produces_valid_wav():
+    backend = get_tts_backend('local')
+    audio = asyncio.run(backend.synthesize("Bonjour", "fr-FR-DeniseNeural"))
+    data_size = _wav_data_size(audio)
+    assert len(audio) == 44 + data_size
+    # 60 ms par caractère, 16 bits mono
+    assert data_size == 2 * int(LocalTTSBackend.SAMPLE_RATE * 0.06 * len("Bonjour"))
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        get_tts_backend('missing')
+
+
+def test_register_backend(monkeypatch):
+    from backend.services import tts_service
+
+    class SilentBackend(LocalTTSBackend):
+        name = "silent"
+
+    # Registre et instances restaurés après le test
+    monkeypatch.setattr(tts_service, 'TTS_BACKENDS', dict(TTS_BACKENDS))
+    monkeypatch.setattr(tts_service, '_backends', {})
+    register_tts_backend("silent", SilentBackend)
+    assert isinstance(get_tts_backend("silent"), SilentBackend)
+
+
+@pytest.fixture
+def no_audio_cache(monkeypatch):
+    from config import Config
+    monkeypatch.setattr(Config, 'TTS_AUDIO_CACHE_ENABLED', False)
+
+
+def test_stream_speech_yields_chunks(no_audio_cache):
+    backend = get_tts_backend('local')
+    chunks = list(stream_speech("Texte assez long pour plusieurs blocs audio", "voice", backend=backend))
+    assert len(chunks) > 1
+    audio = b"".join(chunks)
+    assert len(audio) == 44 + _wav_data_size(audio)
+
+
+def test_closed_stream_stops_synthesis(no_audio_cache):
+    produced = []
+
+    class CountingBackend(LocalTTSBackend):
+        async def stream(self, text, voice, rate):
+            async for chunk in super().stream(text, voice, rate):
+                produced.append(chunk)
+                yield chunk
+
+    stream = stream_speech("Texte interrompu par le client " * 200, "voice", backend=CountingBackend())
+    next(stream)
+    stream.close()
+    time.sleep(0.5)
+    count = len(produced)
+    time.sleep(0.5)
+    # Le moteur s'arrête au plus une file bornée plus loin : 30 s d'audio = 61 blocs
+    assert len(produced) == count < 61
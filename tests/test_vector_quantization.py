@@ -0,0 +1,84 @@
+# tests/test_vector_quantization.py
+import os
+
+import numpy as np
+import pytest
+
+from backend.services.vector_store import COMPACT_DTYPES, VECTORS_FILENAME, NumpyFlatVectorStore
+
+from conftest import HashEmbeddings
+
+MODES = [("float32", False), ("float16", False), ("float16", True), ("int8", False), ("int8", True)]
+
+
+def _random_store(directory, dtype, rescore, count=2000, dim=64, seed=0):
+    rng = np.random.default_rng(seed)
+    vectors = rng.standard_normal((count, dim)).astype(np.float32)
+    store = NumpyFlatVectorStore(directory, None, dtype=dtype, rescore=rescore)
+    store.add_embeddings([str(i) for i in range(count)], vectors, metadatas=[{'row': i} for i in range(count)])
+    return store, vectors
+
+
+@pytest.mark.parametrize('dtype,rescore', MODES)
+def test_recall_against_exact_search(tmp_path, dtype, rescore):
+    store, vectors = _random_store(str(tmp_path), dtype, rescore)
+    queries = np.random.default_rng(1).standard_normal((50, vectors.shape[1])).astype(np.float32)
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    k, hits = 10, 0
+    for query in queries:
+        exact = set(np.argsort(-(normalized @ query))[:k])
+        found = {i for i, _ in store._search_by_vector_with_index(query, k)}
+        hits += len(exact & found)
+    recall = hits / (k * len(queries))
+    assert recall >= {"float32": 1.0, "float16": 0.99, "int8": 0.9}[dtype]
+    if rescore:
+        assert recall >= 0.99
+
+
+@pytest.mark.parametrize('dtype,rescore', MODES)
+def test_roundtrip_after_reopen(tmp_path, dtype, rescore):
+    store, vectors = _random_store(str(tmp_path), dtype, rescore, count=300)
+    before = [store._search_by_vector_with_index(vector, 5) for vector in vectors[:20]]
+
+    reopened = NumpyFlatVectorStore(str(tmp_path), None, dtype=dtype, rescore=rescore)
+    assert len(reopened) == 300
+    assert [reopened._search_by_vector_with_index(vector, 5) for vector in vectors[:20]] == before
+    # Chaque vecteur se retrouve lui-même en premier
+    assert [hits[0][0] for hits in before] == list(range(20))
+    assert reopened._to_document(7).metadata == {'row': 7}
+
+
+@pytest.mark.parametrize('dtype', list(COMPACT_DTYPES))
+def test_compact_storage_without_rescore_keeps_no_float32_copy(tmp_path, dtype):
+    store, _ = _random_store(str(tmp_path / 'compact'), dtype, False, count=100)
+    exact, _ = _random_store(str(tmp_path / 'exact'), 'float32', False, count=100)
+
+    assert not os.path.exists(os.path.join(str(tmp_path / 'compact'), VECTORS_FILENAME))
+    stats = store.storage_stats()
+    assert stats['disk_bytes_per_chunk'] < exact.storage_stats()['disk_bytes_per_chunk']
+    assert stats['scan_bytes_per_chunk'] < exact.storage_stats()['scan_bytes_per_chunk']
+
+
+def test_rescore_is_off_by_default(tmp_path):
+    store = NumpyFlatVectorStore(str(tmp_path), HashEmbeddings(), dtype='int8')
+    assert store.rescore is False
+
+
+def test_from_texts_keeps_storage_options(tmp_path):
+    store = NumpyFlatVectorStore.from_texts(["dense retrieval", "sparse retrieval"], HashEmbeddings(),
+                                            persist_directory=str(tmp_path), dtype='int8', rescore_factor=2)
+    assert (store.dtype, store.rescore, store.rescore_factor) == ('int8', False, 2)
+    assert os.path.exists(os.path.join(str(tmp_path), COMPACT_DTYPES['int8'][1]))
+    assert store.similarity_search("dense retrieval", k=1)[0].page_content == "dense retrieval"
+
+
+@pytest.mark.parametrize('dtype,rescore', [('int8', False), ('float32', False), ('float16', True)])
+def test_reopening_with_another_mode_fails(tmp_path, dtype, rescore):
+    _random_store(str(tmp_path), 'float16', False, count=10)
+    with pytest.raises(ValueError):
+        NumpyFlatVectorStore(str(tmp_path), None, dtype=dtype, rescore=rescore)
+
+
+def test_rescore_flag_is_ignored_for_float32(tmp_path):
+    _random_store(str(tmp_path), 'float32', True, count=10)
+    assert len(NumpyFlatVectorStore(str(tmp_path), None, dtype='float32', rescore=False)) == 10
@@ -0,0 +1,69 @@
+# tests/test_vector_store.py
+import multiprocessing
+
+import pytest
+
+from backend.services.vector_store import NumpyFlatVectorStore, fcntl
+
+from conftest import HashEmbeddings
+
+
+def _append(directory, worker, count):
+    store = NumpyFlatVectorStore(directory, HashEmbeddings(), initial_capacity=4)
+    for index in range(count):
+        store.add_texts([f"worker {worker} chunk {index}"], metadatas=[{'worker': worker}])
+
+
+def test_search_with_metadata_filter(tmp_path):
+    store = NumpyFlatVectorStore(str(tmp_path), HashEmbeddings())
+    store.add_texts(["dense retrieval vectors", "dense retrieval passages", "cooking recipes"],
+                    metadatas=[{'article_id': 1}, {'article_id': 2}, {'article_id': 2}])
+
+    docs = store.similarity_search("dense retrieval", k=2, filter={'article_id': 2})
+    assert [doc.page_content for doc in docs] == ["dense retrieval passages", "cooking recipes"]
+    assert [len(d) for d in store.similarity_search_by_vectors(
+        [HashEmbeddings().embed_query("dense"), HashEmbeddings().embed_query("recipes")], k=1)] == [1, 1]
+
+
+def test_store_is_reloaded_from_disk(tmp_path):
+    store = NumpyFlatVectorStore(str(tmp_path), HashEmbeddings(), initial_capacity=2)
+    ids = store.add_texts([f"chunk number {i}" for i in range(5)], metadatas=[{'page': i} for i in range(5)])
+
+    reopened = NumpyFlatVectorStore(str(tmp_path), HashEmbeddings())
+    assert len(reopened) == 5
+    assert reopened._ids == ids
+    doc, score = reopened.similarity_search_with_score("chunk number 3", k=1)[0]
+    assert doc.page_content == "chunk number 3" and doc.metadata == {'page': 3}
+    assert score == pytest.approx(1.0, abs=1e-5)
+
+
+def test_other_worker_appends_are_seen(tmp_path):
+    reader = NumpyFlatVectorStore(str(tmp_path), HashEmbeddings())
+    writer = NumpyFlatVectorStore(str(tmp_path), HashEmbeddings())
+    writer.add_texts(["written by another worker"])
+    assert [doc.page_content for doc in reader.similarity_search("another worker", k=1)] == \
+        ["written by another worker"]
+
+
+def test_mmr_search_diversifies(tmp_path):
+    store = NumpyFlatVectorStore(str(tmp_path), HashEmbeddings())
+    store.add_texts(["dense retrieval vectors", "dense retrieval vectors again", "retrieval latency numbers"])
+    docs = store.max_marginal_relevance_search("dense retrieval", k=2, fetch_k=3, lambda_mult=0.3)
+    assert [doc.page_content for doc in docs] == ["dense retrieval vectors", "retrieval latency numbers"]
+
+
+@pytest.mark.skipif(fcntl is None, reason="verrou de fichier indisponible")
+def test_concurrent_appends_from_processes(tmp_path):
+    directory = str(tmp_path)
+    context = multiprocessing.get_context('fork')
+    workers = [context.Process(target=_append, args=(directory, worker, 20)) for worker in range(4)]
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join(60)
+        assert process.exitcode == 0
+
+    store = NumpyFlatVectorStore(directory, HashEmbeddings())
+    assert len(store) == 80
+    texts = {doc.page_content for doc in store.similarity_search("worker chunk", k=80)}
+    assert texts == {f"worker {w} chunk {i}" for w in range(4) for i in range(20)}